@@ -0,0 +1,252 @@
+"""initial schema
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.models.shared import (
+    ApplicationStatus,
+    ApplicationType,
+    DocumentNodeTypeEnum,
+    GoalStatus,
+    GoalType,
+    PolicyStatus,
+    PolicyType,
+    PrecedentDecisionOutcome,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_initial_schema"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "constraints",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("severity", sa.String(), nullable=True),
+        sa.Column("source_document", sa.String(), nullable=True),
+        sa.Column("geometry", postgresql.JSONB(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+    )
+    op.create_table(
+        "goals",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("target_metric", sa.String(), nullable=False),
+        sa.Column("target_value", sa.Float(), nullable=True),
+        sa.Column("current_value", sa.Float(), nullable=True),
+        sa.Column("unit", sa.String(), nullable=True),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("status", sa.Enum(GoalStatus), nullable=False),
+        sa.Column("type", sa.Enum(GoalType), nullable=False),
+        sa.Column("risks", postgresql.JSONB(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("contributing_policy_ids", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("contributing_site_ids", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("related_goal_ids", postgresql.ARRAY(sa.String()), nullable=True),
+    )
+    op.create_table(
+        "plan_documents",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("version", sa.String(), nullable=True),
+        sa.Column("document_status", sa.String(), nullable=True),
+        sa.Column("unresolved_issues", sa.JSON(), nullable=True),
+        sa.Column("linked_entities", sa.JSON(), nullable=True),
+        sa.Column("last_modified", sa.String(), nullable=True),
+        sa.Column("author", sa.String(), nullable=True),
+    )
+    op.create_table(
+        "scenarios",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("baseline_scenario_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("tags", sa.JSON(), nullable=True),
+        sa.Column("summary_metrics", sa.JSON(), nullable=True),
+        sa.Column("included_site_ids", sa.JSON(), nullable=True),
+        sa.Column("excluded_site_ids", sa.JSON(), nullable=True),
+        sa.Column("active_policy_ids", sa.JSON(), nullable=True),
+        sa.Column("modified_policies", sa.JSON(), nullable=True),
+        sa.Column("goal_performance", sa.JSON(), nullable=True),
+        sa.Column("soundness_flags", sa.JSON(), nullable=True),
+        sa.Column("ai_commentary", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("last_modified", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "sites",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("address", sa.String(), nullable=True),
+        sa.Column("uprn", sa.String(), nullable=True),
+        sa.Column("lpa_code", sa.String(), nullable=True),
+        sa.Column("coordinates", sa.JSON(), nullable=True),
+        sa.Column("area_ha", sa.Float(), nullable=True),
+        sa.Column("parish", sa.String(), nullable=True),
+        sa.Column("plan_making_status", sa.String(), nullable=True),
+        sa.Column("submission_date", sa.DateTime(), nullable=True),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("proposed_use_plan_making", sa.String(), nullable=True),
+        sa.Column("planning_history_summary", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("constraints", sa.JSON(), nullable=True),
+        sa.Column("applicable_policies", sa.JSON(), nullable=True),
+        sa.Column("policy_requirements_summary", sa.JSON(), nullable=True),
+        sa.Column("allocation_justification", sa.String(), nullable=True),
+        sa.Column("ai_draft_justification", sa.String(), nullable=True),
+        sa.Column("strategic_goal_contributions", sa.JSON(), nullable=True),
+        sa.Column("deliverability_assessment", sa.JSON(), nullable=True),
+        sa.Column("soundness_checks_plan_making", sa.JSON(), nullable=True),
+    )
+    op.create_table(
+        "document_nodes",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "document_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("plan_documents.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("parent_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("document_nodes.id"), nullable=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("type", sa.Enum(DocumentNodeTypeEnum), nullable=False),
+        sa.Column("reference", sa.String(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("order", sa.String(), nullable=True),
+        sa.Column("unresolved_issues", sa.JSON(), nullable=True),
+        sa.Column("linked_entities", sa.JSON(), nullable=True),
+        sa.Column("last_modified", sa.String(), nullable=True),
+        sa.Column("author", sa.String(), nullable=True),
+    )
+    op.create_table(
+        "planning_applications",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("reference_number", sa.String(), nullable=False),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("site_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("sites.id"), nullable=True),
+        sa.Column("site_description", sa.Text(), nullable=True),
+        sa.Column("proposal_details", sa.Text(), nullable=False),
+        sa.Column("application_type", sa.Enum(ApplicationType), nullable=False),
+        sa.Column("status", sa.Enum(ApplicationStatus), nullable=False),
+        sa.Column("received_date", sa.DateTime(), nullable=False),
+        sa.Column("validated_date", sa.DateTime(), nullable=True),
+        sa.Column("decision_date", sa.DateTime(), nullable=True),
+        sa.Column("decision", sa.String(), nullable=True),
+        sa.Column("applicant_name", sa.String(), nullable=True),
+        sa.Column("agent_name", sa.String(), nullable=True),
+        sa.Column("case_officer", sa.String(), nullable=True),
+        sa.Column("constraints", sa.JSON(), nullable=True),
+        sa.Column("relevant_policies", sa.JSON(), nullable=True),
+        sa.Column("reasoning_steps", sa.JSON(), nullable=True),
+        sa.Column("trade_off_analysis", sa.JSON(), nullable=True),
+        sa.Column("linked_precedents", sa.JSON(), nullable=True),
+    )
+    op.create_table(
+        "policies",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("reference", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("wording", sa.Text(), nullable=False),
+        sa.Column("status", sa.Enum(PolicyStatus), nullable=False),
+        sa.Column("type", sa.Enum(PolicyType), nullable=False),
+        sa.Column("version", sa.String(), nullable=True),
+        sa.Column("last_modified", sa.DateTime(), nullable=True),
+        sa.Column("author", sa.String(), nullable=True),
+        sa.Column("author_notes", sa.Text(), nullable=True),
+        sa.Column("supporting_text", sa.Text(), nullable=True),
+        sa.Column("internal_notes", sa.Text(), nullable=True),
+        sa.Column("affected_site_categories", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("keywords", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column(
+            "document_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("plan_documents.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("requirements_summary", sa.String(), nullable=True),
+        sa.Column("linked_policies", postgresql.JSON(), nullable=True),
+        sa.Column("strategic_goal_alignments", postgresql.JSON(), nullable=True),
+        sa.Column("ai_guidance", postgresql.JSON(), nullable=True),
+    )
+    op.create_table(
+        "officer_reports",
+        sa.Column(
+            "application_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("planning_applications.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("version", sa.String(), nullable=False),
+        sa.Column("sections", sa.JSON(), nullable=False),
+        sa.Column("recommendation", sa.Text(), nullable=True),
+        sa.Column("supporting_evidence", sa.JSON(), nullable=True),
+        sa.Column("conflict_summary", sa.Text(), nullable=True),
+        sa.Column("compliance_flags", sa.JSON(), nullable=True),
+        sa.Column("last_modified", sa.DateTime(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+    )
+    op.create_table(
+        "precedent_cases",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "application_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("planning_applications.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("case_reference", sa.String(), nullable=False),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("decision_type", sa.String(), nullable=False),
+        sa.Column("decision_date", sa.DateTime(), nullable=False),
+        sa.Column("outcome", sa.Enum(PrecedentDecisionOutcome), nullable=False),
+        sa.Column("key_policies_cited", sa.JSON(), nullable=False),
+        sa.Column("inspector_reasoning_summary", sa.Text(), nullable=True),
+        sa.Column("decision_extract_link", sa.String(), nullable=True),
+        sa.Column("relevance_summary", sa.Text(), nullable=True),
+        sa.Column("similarity_criteria", sa.JSON(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in (
+        "precedent_cases",
+        "officer_reports",
+        "policies",
+        "planning_applications",
+        "document_nodes",
+        "sites",
+        "scenarios",
+        "plan_documents",
+        "goals",
+        "constraints",
+    ):
+        op.drop_table(table)
+    for enum in (
+        "precedentdecisionoutcome",
+        "policytype",
+        "policystatus",
+        "applicationstatus",
+        "applicationtype",
+        "documentnodetypeenum",
+        "goaltype",
+        "goalstatus",
+    ):
+        sa.Enum(name=enum).drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,33 @@
+"""keyset pagination indexes
+
+Revision ID: 0002_keyset_pagination_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_keyset_pagination_indexes"
+down_revision: Union[str, None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_policies_last_modified_id", "policies", ["last_modified", "id"])
+    op.create_index("ix_scenarios_last_modified_id", "scenarios", ["last_modified", "id"])
+    op.create_index(
+        "ix_document_nodes_document_parent_id", "document_nodes", ["document_id", "parent_id", "id"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_document_nodes_document_parent_id", table_name="document_nodes")
+    op.drop_index("ix_scenarios_last_modified_id", table_name="scenarios")
+    op.drop_index("ix_policies_last_modified_id", table_name="policies")
@@ -0,0 +1,59 @@
+"""full-text search vectors for policies and document nodes
+
+Revision ID: 0003_full_text_search
+Revises: 0002_keyset_pagination_indexes
+Create Date: 2026-10-18 10:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_full_text_search"
+down_revision: Union[str, None] = "0002_keyset_pagination_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POLICY_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(reference, '') || ' ' || coalesce(title, '') || ' ' || tpa_array_to_text(keywords::text[])), 'A')"
+    " || setweight(to_tsvector('english', coalesce(wording, '')), 'B')"
+    " || setweight(to_tsvector('english', coalesce(supporting_text, '')), 'C')"
+)
+NODE_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(reference, '') || ' ' || coalesce(title, '')), 'A')"
+    " || setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # array_to_string is only STABLE, which generated columns reject
+    op.execute(
+        "CREATE OR REPLACE FUNCTION tpa_array_to_text(text[]) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ SELECT coalesce(array_to_string($1, ' '), '') $$"
+    )
+    op.add_column(
+        "policies",
+        sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(POLICY_VECTOR, persisted=True)),
+    )
+    op.add_column(
+        "document_nodes",
+        sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(NODE_VECTOR, persisted=True)),
+    )
+    op.create_index("ix_policies_search_vector", "policies", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_document_nodes_search_vector", "document_nodes", ["search_vector"], postgresql_using="gin"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_document_nodes_search_vector", table_name="document_nodes")
+    op.drop_index("ix_policies_search_vector", table_name="policies")
+    op.drop_column("document_nodes", "search_vector")
+    op.drop_column("policies", "search_vector")
+    op.execute("DROP FUNCTION IF EXISTS tpa_array_to_text(text[])")
@@ -0,0 +1,66 @@
+"""PostGIS geometry for site coordinates and constraint geometry
+
+Revision ID: 0004_postgis_geometry
+Revises: 0003_full_text_search
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_postgis_geometry"
+down_revision: Union[str, None] = "0003_full_text_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    # Existing values are either GeoJSON or the frontend's {lat, lon} shorthand
+    op.execute(
+        """
+        ALTER TABLE sites ALTER COLUMN coordinates TYPE geometry(Geometry, 4326) USING (
+            CASE
+                WHEN coordinates IS NULL THEN NULL
+                WHEN (coordinates::jsonb) ? 'type'
+                    THEN ST_SetSRID(ST_GeomFromGeoJSON(coordinates::text), 4326)
+                WHEN (coordinates::jsonb) ? 'lat'
+                    THEN ST_SetSRID(ST_MakePoint((coordinates->>'lon')::float8, (coordinates->>'lat')::float8), 4326)
+            END
+        )
+        """
+    )
+    op.execute(
+        """
+        ALTER TABLE constraints ALTER COLUMN geometry TYPE geometry(Geometry, 4326) USING (
+            CASE WHEN geometry IS NULL THEN NULL
+                 ELSE ST_SetSRID(ST_GeomFromGeoJSON(geometry::text), 4326)
+            END
+        )
+        """
+    )
+    op.create_index("ix_sites_coordinates", "sites", ["coordinates"], postgresql_using="gist")
+    op.create_index("ix_constraints_geometry", "constraints", ["geometry"], postgresql_using="gist")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_constraints_geometry", table_name="constraints")
+    op.drop_index("ix_sites_coordinates", table_name="sites")
+    op.execute(
+        "ALTER TABLE constraints ALTER COLUMN geometry TYPE jsonb USING ST_AsGeoJSON(geometry)::jsonb"
+    )
+    op.execute(
+        """
+        ALTER TABLE sites ALTER COLUMN coordinates TYPE json USING (
+            CASE WHEN GeometryType(coordinates) = 'POINT'
+                 THEN json_build_object('lat', ST_Y(coordinates), 'lon', ST_X(coordinates))
+                 ELSE ST_AsGeoJSON(coordinates)::json
+            END
+        )
+        """
+    )
@@ -0,0 +1,84 @@
+"""site/constraint overlay table and geometry change tracking
+
+Revision ID: 0005_site_constraint_overlay
+Revises: 0004_postgis_geometry
+Create Date: 2026-10-18 11:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_site_constraint_overlay"
+down_revision: Union[str, None] = "0004_postgis_geometry"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TOUCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION tpa_touch_{table}_geometry() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.{column} IS DISTINCT FROM OLD.{column} THEN
+        NEW.geometry_updated_at := clock_timestamp();
+    END IF;
+    RETURN NEW;
+END $$
+"""
+TOUCHED = (("sites", "coordinates"), ("constraints", "geometry"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in TOUCHED:
+        op.add_column(table, sa.Column("geometry_updated_at", sa.DateTime(), nullable=True))
+        op.execute(TOUCH_FUNCTION.format(table=table, column=column))
+        op.execute(
+            f"CREATE TRIGGER tpa_touch_{table}_geometry BEFORE INSERT OR UPDATE OF {column} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION tpa_touch_{table}_geometry()"
+        )
+        op.create_index(f"ix_{table}_geometry_updated_at", table, ["geometry_updated_at"])
+
+    op.create_table(
+        "site_constraints",
+        sa.Column(
+            "site_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("sites.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "constraint_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("constraints.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("overlap_area_ha", sa.Float(), nullable=True),
+        sa.Column("overlap_percent", sa.Float(), nullable=True),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_site_constraints_constraint_id", "site_constraints", ["constraint_id"])
+    op.create_table(
+        "overlay_runs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("full", sa.Boolean(), nullable=False),
+        sa.Column("sites_changed", sa.Integer(), nullable=True),
+        sa.Column("constraints_changed", sa.Integer(), nullable=True),
+        sa.Column("pairs_written", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("overlay_runs")
+    op.drop_index("ix_site_constraints_constraint_id", table_name="site_constraints")
+    op.drop_table("site_constraints")
+    for table, _ in TOUCHED:
+        op.drop_index(f"ix_{table}_geometry_updated_at", table_name=table)
+        op.execute(f"DROP TRIGGER IF EXISTS tpa_touch_{table}_geometry ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS tpa_touch_{table}_geometry()")
+        op.drop_column(table, "geometry_updated_at")
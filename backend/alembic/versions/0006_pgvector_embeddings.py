@@ -0,0 +1,47 @@
+"""pgvector embedding columns with HNSW indexes
+
+Revision ID: 0006_pgvector_embeddings
+Revises: 0005_site_constraint_overlay
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_pgvector_embeddings"
+down_revision: Union[str, None] = "0005_site_constraint_overlay"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXED = ("policies", "document_nodes", "precedent_cases")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    for table in INDEXED + ("planning_applications",):
+        op.add_column(table, sa.Column("embedding", Vector(settings.vector_dim), nullable=True))
+    for table in INDEXED:
+        op.create_index(
+            f"ix_{table}_embedding",
+            table,
+            ["embedding"],
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in INDEXED:
+        op.drop_index(f"ix_{table}_embedding", table_name=table)
+    for table in INDEXED + ("planning_applications",):
+        op.drop_column(table, "embedding")
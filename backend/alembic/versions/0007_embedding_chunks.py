@@ -0,0 +1,53 @@
+"""content-hashed embedding chunks
+
+Revision ID: 0007_embedding_chunks
+Revises: 0006_pgvector_embeddings
+Create Date: 2026-10-18 13:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_embedding_chunks"
+down_revision: Union[str, None] = "0006_pgvector_embeddings"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "embedding_chunks",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("source_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("chunk_index", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(64), nullable=False),
+        sa.Column("encoder", sa.String(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("embedding", Vector(settings.vector_dim), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("source", "source_id", "chunk_index", name="uq_embedding_chunks_source_chunk"),
+    )
+    op.create_index(
+        "ix_embedding_chunks_embedding",
+        "embedding_chunks",
+        ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_embedding_chunks_embedding", table_name="embedding_chunks")
+    op.drop_table("embedding_chunks")
@@ -0,0 +1,29 @@
+"""goals.last_modified for ETag stamps
+
+Revision ID: 0008_goal_last_modified
+Revises: 0007_embedding_chunks
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_goal_last_modified"
+down_revision: Union[str, None] = "0007_embedding_chunks"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("goals", sa.Column("last_modified", sa.DateTime(), nullable=True))
+    op.execute("UPDATE goals SET last_modified = now() AT TIME ZONE 'utc'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("goals", "last_modified")
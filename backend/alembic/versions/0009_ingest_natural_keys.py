@@ -0,0 +1,37 @@
+"""natural-key unique indexes for bulk ingestion upserts
+
+Revision ID: 0009_ingest_natural_keys
+Revises: 0008_goal_last_modified
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_ingest_natural_keys"
+down_revision: Union[str, None] = "0008_goal_last_modified"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fails if existing rows already share a key; de-duplicate those first.
+    op.create_index(
+        "uq_sites_uprn", "sites", ["uprn"], unique=True, postgresql_where=sa.text("uprn IS NOT NULL")
+    )
+    op.create_index(
+        "uq_planning_applications_reference_number", "planning_applications", ["reference_number"], unique=True
+    )
+    op.create_index("uq_precedent_cases_case_reference", "precedent_cases", ["case_reference"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_precedent_cases_case_reference", table_name="precedent_cases")
+    op.drop_index("uq_planning_applications_reference_number", table_name="planning_applications")
+    op.drop_index("uq_sites_uprn", table_name="sites")
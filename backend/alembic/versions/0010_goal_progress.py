@@ -0,0 +1,91 @@
+"""goal progress aggregates and snapshot time series
+
+Revision ID: 0010_goal_progress
+Revises: 0009_ingest_natural_keys
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_goal_progress"
+down_revision: Union[str, None] = "0009_ingest_natural_keys"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FACTS = (
+    ("homes", sa.Float()),
+    ("jobs", sa.Float()),
+    ("allocated", sa.Integer()),
+    ("allocated_homes", sa.Float()),
+    ("applications", sa.Integer()),
+    ("approved", sa.Integer()),
+    ("refused", sa.Integer()),
+    ("pending", sa.Integer()),
+    ("approved_homes", sa.Float()),
+    ("approved_jobs", sa.Float()),
+)
+
+
+def _facts():
+    return [sa.Column(name, type_, nullable=False, server_default="0") for name, type_ in FACTS]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "site_progress_facts",
+        sa.Column(
+            "site_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("sites.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        *_facts(),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        "goal_progress",
+        sa.Column(
+            "goal_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("goals.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("sites", sa.Integer(), nullable=False, server_default="0"),
+        *_facts(),
+        sa.Column("value", sa.Float(), nullable=True),
+        sa.Column("progress", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        "goal_snapshots",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "goal_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("goals.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("taken_at", sa.DateTime(), nullable=False),
+        sa.Column("value", sa.Float(), nullable=True),
+        sa.Column("target_value", sa.Float(), nullable=True),
+        sa.Column("progress", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("aggregates", sa.JSON(), nullable=True),
+    )
+    op.create_index("ix_goal_snapshots_goal_taken_at", "goal_snapshots", ["goal_id", "taken_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_goal_snapshots_goal_taken_at", table_name="goal_snapshots")
+    op.drop_table("goal_snapshots")
+    op.drop_table("goal_progress")
+    op.drop_table("site_progress_facts")
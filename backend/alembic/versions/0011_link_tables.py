@@ -0,0 +1,183 @@
+"""normalised link tables for id-list columns, trigger-maintained and backfilled
+
+Revision ID: 0011_link_tables
+Revises: 0010_goal_progress
+Create Date: 2026-10-18 18:30:00.000000
+
+"""
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_link_tables"
+down_revision: Union[str, None] = "0010_goal_progress"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UUID_OR_NULL = r"""
+CREATE OR REPLACE FUNCTION tpa_uuid_or_null(value text) RETURNS uuid LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN btrim(value) ~* '^\{?[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}\}?$'
+        THEN btrim(value)::uuid
+    END
+$$
+"""
+# Elements of a JSON array with their 0-based position; anything else is treated as empty
+JSON_ITEMS = """
+CREATE OR REPLACE FUNCTION tpa_json_items(value json) RETURNS TABLE (pos integer, item json) LANGUAGE sql IMMUTABLE AS $$
+    SELECT (t.ordinality - 1)::integer, t.elem
+    FROM json_array_elements(CASE WHEN json_typeof(value) = 'array' THEN value ELSE '[]'::json END)
+        WITH ORDINALITY AS t(elem, ordinality)
+$$
+"""
+# An id out of a list element that is either a bare string or an object holding it under ``key``
+ITEM_ID = "tpa_uuid_or_null(CASE json_typeof(i.item) WHEN 'object' THEN i.item->>'{key}' ELSE i.item #>> ARRAY[]::text[] END)"
+
+# owner table -> (id-list columns, link tables, statements rebuilding one owner's rows from ``o``)
+LINKS = {
+    "goals": (
+        ("contributing_site_ids", "contributing_policy_ids", "related_goal_ids"),
+        ("goal_sites", "goal_policies", "goal_related_goals"),
+        (
+            "INSERT INTO goal_sites (goal_id, site_id)"
+            " SELECT o.id, tpa_uuid_or_null(v) FROM {source} o, unnest(o.contributing_site_ids) v"
+            " WHERE tpa_uuid_or_null(v) IS NOT NULL ON CONFLICT DO NOTHING",
+            "INSERT INTO goal_policies (goal_id, policy_id)"
+            " SELECT o.id, tpa_uuid_or_null(v) FROM {source} o, unnest(o.contributing_policy_ids) v"
+            " WHERE tpa_uuid_or_null(v) IS NOT NULL ON CONFLICT DO NOTHING",
+            "INSERT INTO goal_related_goals (goal_id, related_goal_id)"
+            " SELECT o.id, tpa_uuid_or_null(v) FROM {source} o, unnest(o.related_goal_ids) v"
+            " WHERE tpa_uuid_or_null(v) IS NOT NULL ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "policies": (
+        ("linked_policies",),
+        ("policy_links",),
+        (
+            "INSERT INTO policy_links (policy_id, linked_policy_id, relationship)"
+            f" SELECT o.id, {ITEM_ID.format(key='policyId')}, i.item->>'relationship'"
+            " FROM {source} o, tpa_json_items(o.linked_policies) i"
+            f" WHERE json_typeof(i.item) = 'object' AND {ITEM_ID.format(key='policyId')} IS NOT NULL"
+            " ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "scenarios": (
+        ("included_site_ids", "excluded_site_ids"),
+        ("scenario_sites",),
+        (
+            "INSERT INTO scenario_sites (scenario_id, site_id, included)"
+            f" SELECT o.id, {ITEM_ID.format(key='id')}, true FROM {{source}} o, tpa_json_items(o.included_site_ids) i"
+            f" WHERE {ITEM_ID.format(key='id')} IS NOT NULL ON CONFLICT DO NOTHING",
+            "INSERT INTO scenario_sites (scenario_id, site_id, included)"
+            f" SELECT o.id, {ITEM_ID.format(key='id')}, false FROM {{source}} o, tpa_json_items(o.excluded_site_ids) i"
+            f" WHERE {ITEM_ID.format(key='id')} IS NOT NULL ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "planning_applications": (
+        ("relevant_policies",),
+        ("application_policies",),
+        (
+            "INSERT INTO application_policies (application_id, position, policy_id, policy_reference)"
+            f" SELECT o.id, i.pos, {ITEM_ID.format(key='id')},"
+            " CASE json_typeof(i.item) WHEN 'object' THEN i.item->>'reference' ELSE i.item #>> ARRAY[]::text[] END"
+            " FROM {source} o, tpa_json_items(o.relevant_policies) i",
+        ),
+    ),
+}
+OWNER_KEYS = {
+    "goal_sites": "goal_id",
+    "goal_policies": "goal_id",
+    "goal_related_goals": "goal_id",
+    "policy_links": "policy_id",
+    "scenario_sites": "scenario_id",
+    "application_policies": "application_id",
+}
+
+SYNC_FUNCTION = """
+CREATE OR REPLACE FUNCTION tpa_sync_{table}_links() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND {unchanged} THEN
+        RETURN NULL;
+    END IF;
+{statements}
+    RETURN NULL;
+END $$
+"""
+
+
+def _uuid(name: str, owner: Optional[str] = None, primary_key: bool = True) -> sa.Column:
+    if owner:
+        return sa.Column(
+            name, postgresql.UUID(as_uuid=True), sa.ForeignKey(f"{owner}.id", ondelete="CASCADE"), primary_key=True
+        )
+    return sa.Column(name, postgresql.UUID(as_uuid=True), primary_key=primary_key, nullable=not primary_key)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table("goal_sites", _uuid("goal_id", owner="goals"), _uuid("site_id"))
+    op.create_index("ix_goal_sites_site_id", "goal_sites", ["site_id"])
+    op.create_table("goal_policies", _uuid("goal_id", owner="goals"), _uuid("policy_id"))
+    op.create_index("ix_goal_policies_policy_id", "goal_policies", ["policy_id"])
+    op.create_table("goal_related_goals", _uuid("goal_id", owner="goals"), _uuid("related_goal_id"))
+    op.create_index("ix_goal_related_goals_related_goal_id", "goal_related_goals", ["related_goal_id"])
+    op.create_table(
+        "policy_links",
+        _uuid("policy_id", owner="policies"),
+        _uuid("linked_policy_id"),
+        sa.Column("relationship", sa.String(), nullable=True),
+    )
+    op.create_index("ix_policy_links_linked_policy_id", "policy_links", ["linked_policy_id"])
+    op.create_table(
+        "scenario_sites",
+        _uuid("scenario_id", owner="scenarios"),
+        _uuid("site_id"),
+        sa.Column("included", sa.Boolean(), primary_key=True),
+    )
+    op.create_index("ix_scenario_sites_site_id", "scenario_sites", ["site_id"])
+    op.create_table(
+        "application_policies",
+        _uuid("application_id", owner="planning_applications"),
+        sa.Column("position", sa.Integer(), primary_key=True),
+        _uuid("policy_id", primary_key=False),
+        sa.Column("policy_reference", sa.String(), nullable=True),
+    )
+    op.create_index("ix_application_policies_policy_id", "application_policies", ["policy_id"])
+    op.create_index("ix_application_policies_policy_reference", "application_policies", ["policy_reference"])
+
+    op.execute(UUID_OR_NULL)
+    op.execute(JSON_ITEMS)
+    for table, (columns, link_tables, inserts) in LINKS.items():
+        # json has no equality operator, so compare the text forms
+        unchanged = " AND ".join(f"NEW.{c}::text IS NOT DISTINCT FROM OLD.{c}::text" for c in columns)
+        statements = [f"DELETE FROM {link} WHERE {OWNER_KEYS[link]} = NEW.id" for link in link_tables]
+        statements += [insert.format(source="(SELECT NEW.*)") for insert in inserts]
+        op.execute(
+            SYNC_FUNCTION.format(
+                table=table,
+                unchanged=unchanged,
+                statements="\n".join(f"    {statement};" for statement in statements),
+            )
+        )
+        op.execute(
+            f"CREATE TRIGGER tpa_sync_{table}_links AFTER INSERT OR UPDATE OF {', '.join(columns)} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION tpa_sync_{table}_links()"
+        )
+        # Backfill: the same statements over the whole table
+        for insert in inserts:
+            op.execute(insert.format(source=table))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in LINKS:
+        op.execute(f"DROP TRIGGER IF EXISTS tpa_sync_{table}_links ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS tpa_sync_{table}_links()")
+    op.execute("DROP FUNCTION IF EXISTS tpa_json_items(json)")
+    op.execute("DROP FUNCTION IF EXISTS tpa_uuid_or_null(text)")
+    for link, _ in reversed(list(OWNER_KEYS.items())):
+        op.drop_table(link)
@@ -0,0 +1,69 @@
+"""plan document versions with content-addressed node deltas
+
+Revision ID: 0012_plan_document_versions
+Revises: 0011_link_tables
+Create Date: 2026-10-18 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012_plan_document_versions"
+down_revision: Union[str, None] = "0011_link_tables"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "document_node_bodies",
+        sa.Column("hash", sa.String(length=64), primary_key=True),
+        sa.Column("body", sa.JSON(), nullable=False),
+    )
+    op.create_table(
+        "document_versions",
+        sa.Column(
+            "document_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("plan_documents.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("number", sa.Integer(), primary_key=True),
+        sa.Column("label", sa.String(), nullable=True),
+        sa.Column("author", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("meta", sa.JSON(), nullable=True),
+        sa.Column("node_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("changed_nodes", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "document_version_nodes",
+        sa.Column("document_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("number", sa.Integer(), primary_key=True),
+        sa.Column("node_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("parent_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("order", sa.String(), nullable=True),
+        sa.Column("body_hash", sa.String(length=64), sa.ForeignKey("document_node_bodies.hash"), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["document_id", "number"],
+            ["document_versions.document_id", "document_versions.number"],
+            ondelete="CASCADE",
+        ),
+    )
+    op.create_index(
+        "ix_document_version_nodes_node_number", "document_version_nodes", ["document_id", "node_id", "number"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_document_version_nodes_node_number", table_name="document_version_nodes")
+    op.drop_table("document_version_nodes")
+    op.drop_table("document_versions")
+    op.drop_table("document_node_bodies")
@@ -0,0 +1,134 @@
+"""precedent similarity: MinHash-LSH bands over cited policies and precedent locations
+
+Revision ID: 0013_precedent_similarity
+Revises: 0012_plan_document_versions
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013_precedent_similarity"
+down_revision: Union[str, None] = "0012_plan_document_versions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Keep in step with LSH_BANDS / LSH_ROWS in app.services.precedent_ranking
+BANDS = 16
+ROWS = 4
+
+# "Policy H1", "h 1" and "H1" are the same citation
+POLICY_KEYS = r"""
+CREATE OR REPLACE FUNCTION tpa_policy_keys(refs text[]) RETURNS text[] LANGUAGE sql IMMUTABLE AS $$
+    SELECT coalesce(array_agg(DISTINCT k ORDER BY k), '{}')
+    FROM (
+        SELECT upper(regexp_replace(regexp_replace(r, '^\s*policy\s+', '', 'i'), '\s+', '', 'g')) AS k
+        FROM unnest(refs) r
+    ) t
+    WHERE k <> ''
+$$
+"""
+# Signature slot s is the minimum of hashtext(s:key) over the keys; each band hashes ROWS consecutive slots
+MINHASH_BANDS = f"""
+CREATE OR REPLACE FUNCTION tpa_minhash_bands(keys text[]) RETURNS TABLE (band smallint, bucket integer)
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT (s.slot / {ROWS})::smallint, hashtext(string_agg(s.value::text, ',' ORDER BY s.slot))
+    FROM (
+        SELECT slot, min(hashtext(slot || ':' || k)) AS value
+        FROM generate_series(0, {BANDS * ROWS - 1}) slot, unnest(keys) k
+        GROUP BY slot
+    ) s
+    GROUP BY s.slot / {ROWS}
+$$
+"""
+CITED_KEYS = (
+    "tpa_policy_keys(ARRAY(SELECT i.item #>> ARRAY[]::text[] FROM tpa_json_items({value}) i"
+    " WHERE json_typeof(i.item) = 'string'))"
+)
+SYNC_BANDS = f"""
+CREATE OR REPLACE FUNCTION tpa_sync_precedent_bands() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.key_policies_cited::text IS NOT DISTINCT FROM OLD.key_policies_cited::text THEN
+        RETURN NULL;
+    END IF;
+    DELETE FROM precedent_policy_bands WHERE precedent_id = NEW.id;
+    INSERT INTO precedent_policy_bands (precedent_id, band, bucket)
+        SELECT NEW.id, b.band, b.bucket FROM tpa_minhash_bands({CITED_KEYS.format(value="NEW.key_policies_cited")}) b;
+    RETURN NULL;
+END $$
+"""
+# A precedent with no location of its own takes its linked application's site
+SITE_POINT = (
+    "(SELECT ST_PointOnSurface(s.coordinates) FROM planning_applications a JOIN sites s ON s.id = a.site_id"
+    " WHERE a.id = {application})"
+)
+LOCATE = f"""
+CREATE OR REPLACE FUNCTION tpa_locate_precedent() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.location IS NULL AND NEW.application_id IS NOT NULL THEN
+        NEW.location := {SITE_POINT.format(application="NEW.application_id")};
+    END IF;
+    RETURN NEW;
+END $$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "precedent_policy_bands",
+        sa.Column(
+            "precedent_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("precedent_cases.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("band", sa.SmallInteger(), primary_key=True),
+        sa.Column("bucket", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_precedent_policy_bands_band_bucket", "precedent_policy_bands", ["band", "bucket"])
+    op.execute("ALTER TABLE precedent_cases ADD COLUMN location geometry(Point, 4326)")
+    op.create_index("ix_precedent_cases_location", "precedent_cases", ["location"], postgresql_using="gist")
+
+    op.execute(POLICY_KEYS)
+    op.execute(MINHASH_BANDS)
+    op.execute(SYNC_BANDS)
+    op.execute(
+        "CREATE TRIGGER tpa_sync_precedent_bands AFTER INSERT OR UPDATE OF key_policies_cited ON precedent_cases "
+        "FOR EACH ROW EXECUTE FUNCTION tpa_sync_precedent_bands()"
+    )
+    op.execute(LOCATE)
+    op.execute(
+        "CREATE TRIGGER tpa_locate_precedent BEFORE INSERT OR UPDATE OF application_id, location ON precedent_cases "
+        "FOR EACH ROW EXECUTE FUNCTION tpa_locate_precedent()"
+    )
+
+    # Backfill
+    op.execute(
+        "INSERT INTO precedent_policy_bands (precedent_id, band, bucket)"
+        " SELECT p.id, b.band, b.bucket FROM precedent_cases p,"
+        f" tpa_minhash_bands({CITED_KEYS.format(value='p.key_policies_cited')}) b"
+    )
+    op.execute(
+        "UPDATE precedent_cases p SET location = "
+        f"{SITE_POINT.format(application='p.application_id')}"
+        " WHERE p.location IS NULL AND p.application_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS tpa_locate_precedent ON precedent_cases")
+    op.execute("DROP FUNCTION IF EXISTS tpa_locate_precedent()")
+    op.execute("DROP TRIGGER IF EXISTS tpa_sync_precedent_bands ON precedent_cases")
+    op.execute("DROP FUNCTION IF EXISTS tpa_sync_precedent_bands()")
+    op.execute("DROP FUNCTION IF EXISTS tpa_minhash_bands(text[])")
+    op.execute("DROP FUNCTION IF EXISTS tpa_policy_keys(text[])")
+    op.drop_index("ix_precedent_cases_location", table_name="precedent_cases")
+    op.drop_column("precedent_cases", "location")
+    op.drop_table("precedent_policy_bands")
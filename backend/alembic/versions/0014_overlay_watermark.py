@@ -0,0 +1,28 @@
+"""overlay runs record the geometry watermark they read up to
+
+Revision ID: 0014_overlay_watermark
+Revises: 0013_precedent_similarity
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0014_overlay_watermark"
+down_revision: Union[str, None] = "0013_precedent_similarity"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("overlay_runs", sa.Column("watermark", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("overlay_runs", "watermark")
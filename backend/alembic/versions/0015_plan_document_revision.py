@@ -0,0 +1,75 @@
+"""plan_documents.revision, bumped by triggers on every document or node write
+
+Revision ID: 0015_plan_document_revision
+Revises: 0014_overlay_watermark
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0015_plan_document_revision"
+down_revision: Union[str, None] = "0014_overlay_watermark"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# A direct write bumps it unless the write set it (the node trigger below does)
+BUMP_DOCUMENT = """
+CREATE OR REPLACE FUNCTION tpa_bump_plan_document() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.revision = OLD.revision THEN
+        NEW.revision := OLD.revision + 1;
+    END IF;
+    RETURN NEW;
+END $$
+"""
+# Statement-level, so a bulk node load bumps each document once rather than once per node
+BUMP_FROM_NODES = """
+CREATE OR REPLACE FUNCTION tpa_bump_plan_document_nodes() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE plan_documents SET revision = revision + 1 WHERE id IN (SELECT document_id FROM new_nodes);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE plan_documents SET revision = revision + 1 WHERE id IN (SELECT document_id FROM old_nodes);
+    ELSE
+        UPDATE plan_documents SET revision = revision + 1
+        WHERE id IN (SELECT document_id FROM new_nodes UNION SELECT document_id FROM old_nodes);
+    END IF;
+    RETURN NULL;
+END $$
+"""
+NODE_TRIGGERS = {
+    "insert": "INSERT ON document_nodes REFERENCING NEW TABLE AS new_nodes",
+    "update": "UPDATE ON document_nodes REFERENCING OLD TABLE AS old_nodes NEW TABLE AS new_nodes",
+    "delete": "DELETE ON document_nodes REFERENCING OLD TABLE AS old_nodes",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("plan_documents", sa.Column("revision", sa.BigInteger(), nullable=False, server_default="0"))
+    op.execute(BUMP_DOCUMENT)
+    op.execute(
+        "CREATE TRIGGER tpa_bump_plan_document BEFORE UPDATE ON plan_documents "
+        "FOR EACH ROW EXECUTE FUNCTION tpa_bump_plan_document()"
+    )
+    op.execute(BUMP_FROM_NODES)
+    for event, clause in NODE_TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER tpa_bump_plan_document_{event} AFTER {clause} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION tpa_bump_plan_document_nodes()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event in NODE_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS tpa_bump_plan_document_{event} ON document_nodes")
+    op.execute("DROP FUNCTION IF EXISTS tpa_bump_plan_document_nodes()")
+    op.execute("DROP TRIGGER IF EXISTS tpa_bump_plan_document ON plan_documents")
+    op.execute("DROP FUNCTION IF EXISTS tpa_bump_plan_document()")
+    op.drop_column("plan_documents", "revision")
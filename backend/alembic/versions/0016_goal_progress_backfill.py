@@ -0,0 +1,103 @@
+"""site_progress_facts outlive their sites; backfill goal progress
+
+Revision ID: 0016_goal_progress_backfill
+Revises: 0015_plan_document_revision
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.db_models.goal_progress import GoalProgress, GoalSnapshot, SiteProgressFacts
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.sites import Site
+from app.services.goal_progress_service import (
+    AGGREGATES,
+    FACTS,
+    REFRESH_CHUNK,
+    application_outcomes,
+    facts_for,
+    goal_inputs,
+    settled,
+    site_inputs,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0016_goal_progress_backfill"
+down_revision: Union[str, None] = "0015_plan_document_revision"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every goal re-summed from the facts of the sites it lists (what GoalProgressService.refresh_goals writes)
+SUMS = f"""
+INSERT INTO goal_progress (goal_id, sites, {", ".join(FACTS)}, updated_at)
+SELECT g.id, count(f.site_id), {", ".join(f"coalesce(sum(f.{name}), 0)" for name in FACTS)}, :now
+FROM goals g
+    LEFT JOIN goal_sites gs ON gs.goal_id = g.id
+    LEFT JOIN site_progress_facts f ON f.site_id = gs.site_id
+GROUP BY g.id
+ON CONFLICT (goal_id) DO UPDATE SET
+    {", ".join(f"{name} = EXCLUDED.{name}" for name in (*AGGREGATES, "updated_at"))}
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A cascade removed a deleted site's facts before the job could subtract them from its goals
+    op.drop_constraint("site_progress_facts_site_id_fkey", "site_progress_facts", type_="foreignkey")
+
+    # Backfill, as `python -m app.services.goal_progress_service --full` would
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    site_ids = list(bind.execute(sa.select(Site.id).order_by(Site.id)).scalars())
+    for start in range(0, len(site_ids), REFRESH_CHUNK):
+        chunk = site_ids[start : start + REFRESH_CHUNK]
+        sites = bind.execute(site_inputs().where(Site.id.in_(chunk))).all()
+        outcomes = bind.execute(application_outcomes().where(PlanningApplication.site_id.in_(chunk))).all()
+        facts = facts_for(sites, outcomes)
+        if facts:
+            stmt = postgresql.insert(SiteProgressFacts.__table__)
+            bind.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["site_id"], set_={c: stmt.excluded[c] for c in (*FACTS, "updated_at")}
+                ),
+                [{"site_id": site_id, **values, "updated_at": now} for site_id, values in facts.items()],
+            )
+    bind.execute(sa.text(SUMS), {"now": now})
+
+    updates, snapshots = [], []
+    for row in bind.execute(goal_inputs()).mappings():
+        value, progress, status = settled(row)
+        updates.append({"goal": row["id"], "value": value, "progress": progress, "status": status})
+        snapshots.append(
+            {
+                "goal_id": row["id"],
+                "taken_at": now,
+                "value": value,
+                "target_value": row["target_value"],
+                "progress": progress,
+                "status": status,
+                "aggregates": {name: row[name] for name in AGGREGATES},
+            }
+        )
+    if updates:
+        bind.execute(
+            sa.update(GoalProgress.__table__)
+            .where(GoalProgress.__table__.c.goal_id == sa.bindparam("goal"))
+            .values(value=sa.bindparam("value"), progress=sa.bindparam("progress"), status=sa.bindparam("status")),
+            updates,
+        )
+        bind.execute(GoalSnapshot.__table__.insert(), snapshots)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM site_progress_facts WHERE site_id NOT IN (SELECT id FROM sites)")
+    op.create_foreign_key(
+        "site_progress_facts_site_id_fkey", "site_progress_facts", "sites", ["site_id"], ["id"], ondelete="CASCADE"
+    )
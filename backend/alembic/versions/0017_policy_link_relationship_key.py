@@ -0,0 +1,68 @@
+"""policy_links keyed by relationship too, so one policy can link another more than one way
+
+Revision ID: 0017_policy_link_relationship_key
+Revises: 0016_goal_progress_backfill
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0017_policy_link_relationship_key"
+down_revision: Union[str, None] = "0016_goal_progress_backfill"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ITEM_ID = "tpa_uuid_or_null(CASE json_typeof(i.item) WHEN 'object' THEN i.item->>'policyId' ELSE i.item #>> ARRAY[]::text[] END)"
+
+
+def links_insert(relationship: str) -> str:
+    return (
+        "INSERT INTO policy_links (policy_id, linked_policy_id, relationship)"
+        f" SELECT o.id, {ITEM_ID}, {relationship}"
+        " FROM {source} o, tpa_json_items(o.linked_policies) i"
+        f" WHERE json_typeof(i.item) = 'object' AND {ITEM_ID} IS NOT NULL"
+        " ON CONFLICT DO NOTHING"
+    )
+
+
+SYNC_FUNCTION = """
+CREATE OR REPLACE FUNCTION tpa_sync_policies_links() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.linked_policies::text IS NOT DISTINCT FROM OLD.linked_policies::text THEN
+        RETURN NULL;
+    END IF;
+    DELETE FROM policy_links WHERE policy_id = NEW.id;
+    {insert};
+    RETURN NULL;
+END $$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A link without a relationship is stored as '' so it can be part of the key
+    relationship = "coalesce(i.item->>'relationship', '')"
+    op.execute(SYNC_FUNCTION.format(insert=links_insert(relationship).format(source="(SELECT NEW.*)")))
+    op.execute("DELETE FROM policy_links")
+    op.execute("ALTER TABLE policy_links ALTER COLUMN relationship SET DEFAULT ''")
+    op.execute("ALTER TABLE policy_links ALTER COLUMN relationship SET NOT NULL")
+    op.execute("ALTER TABLE policy_links DROP CONSTRAINT policy_links_pkey")
+    op.execute("ALTER TABLE policy_links ADD PRIMARY KEY (policy_id, linked_policy_id, relationship)")
+    # Backfill: the links the old key collapsed come back
+    op.execute(links_insert(relationship).format(source="policies"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    relationship = "i.item->>'relationship'"
+    op.execute(SYNC_FUNCTION.format(insert=links_insert(relationship).format(source="(SELECT NEW.*)")))
+    op.execute("DELETE FROM policy_links")
+    op.execute("ALTER TABLE policy_links DROP CONSTRAINT policy_links_pkey")
+    op.execute("ALTER TABLE policy_links ADD PRIMARY KEY (policy_id, linked_policy_id)")
+    op.execute("ALTER TABLE policy_links ALTER COLUMN relationship DROP NOT NULL")
+    op.execute("ALTER TABLE policy_links ALTER COLUMN relationship DROP DEFAULT")
+    op.execute(links_insert(relationship).format(source="policies"))
@@ -0,0 +1,101 @@
+"""precedent locations derived from the application site follow the site
+
+Revision ID: 0018_precedent_location_derived
+Revises: 0017_policy_link_relationship_key
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0018_precedent_location_derived"
+down_revision: Union[str, None] = "0017_policy_link_relationship_key"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SITE_POINT = (
+    "(SELECT ST_PointOnSurface(s.coordinates) FROM planning_applications a JOIN sites s ON s.id = a.site_id"
+    " WHERE a.id = {application})"
+)
+# A location written explicitly is the precedent's own; an empty one is taken
+# from the linked application's site and re-derived whenever that link changes.
+# Setting location to NULL asks for it to be derived again.
+LOCATE = f"""
+CREATE OR REPLACE FUNCTION tpa_locate_precedent() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.location IS NOT DISTINCT FROM OLD.location THEN
+        IF NEW.location_derived AND NEW.application_id IS DISTINCT FROM OLD.application_id THEN
+            NEW.location := NULL;
+        END IF;
+    ELSIF NEW.location IS NOT NULL THEN
+        NEW.location_derived := false;
+    END IF;
+    IF NEW.location IS NULL THEN
+        NEW.location := {SITE_POINT.format(application="NEW.application_id")};
+        NEW.location_derived := NEW.location IS NOT NULL;
+    END IF;
+    RETURN NEW;
+END $$
+"""
+# Clearing a derived (or missing) location makes tpa_locate_precedent derive it again
+RELOCATE = "UPDATE precedent_cases p SET location = NULL WHERE ({where}) AND (p.location_derived OR p.location IS NULL)"
+RELOCATE_SITE = f"""
+CREATE OR REPLACE FUNCTION tpa_relocate_site_precedents() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    {RELOCATE.format(where="p.application_id IN (SELECT a.id FROM planning_applications a WHERE a.site_id = NEW.id)")};
+    RETURN NULL;
+END $$
+"""
+RELOCATE_APPLICATION = f"""
+CREATE OR REPLACE FUNCTION tpa_relocate_application_precedents() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    {RELOCATE.format(where="p.application_id = NEW.id")};
+    RETURN NULL;
+END $$
+"""
+LOCATE_0013 = f"""
+CREATE OR REPLACE FUNCTION tpa_locate_precedent() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.location IS NULL AND NEW.application_id IS NOT NULL THEN
+        NEW.location := {SITE_POINT.format(application="NEW.application_id")};
+    END IF;
+    RETURN NEW;
+END $$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE precedent_cases ADD COLUMN location_derived boolean NOT NULL DEFAULT false")
+    # Locations that still match the linked site were filled in by 0013; any other is taken as the precedent's own
+    op.execute(
+        "UPDATE precedent_cases p SET location_derived = true"
+        " WHERE p.location IS NOT NULL AND p.application_id IS NOT NULL"
+        f" AND ST_Equals(p.location, {SITE_POINT.format(application='p.application_id')})"
+    )
+    op.execute(LOCATE)
+    op.execute(RELOCATE_SITE)
+    op.execute(
+        "CREATE TRIGGER tpa_relocate_site_precedents AFTER UPDATE OF coordinates ON sites FOR EACH ROW"
+        " WHEN (OLD.coordinates IS DISTINCT FROM NEW.coordinates)"
+        " EXECUTE FUNCTION tpa_relocate_site_precedents()"
+    )
+    op.execute(RELOCATE_APPLICATION)
+    op.execute(
+        "CREATE TRIGGER tpa_relocate_application_precedents AFTER UPDATE OF site_id ON planning_applications"
+        " FOR EACH ROW WHEN (OLD.site_id IS DISTINCT FROM NEW.site_id)"
+        " EXECUTE FUNCTION tpa_relocate_application_precedents()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS tpa_relocate_application_precedents ON planning_applications")
+    op.execute("DROP FUNCTION IF EXISTS tpa_relocate_application_precedents()")
+    op.execute("DROP TRIGGER IF EXISTS tpa_relocate_site_precedents ON sites")
+    op.execute("DROP FUNCTION IF EXISTS tpa_relocate_site_precedents()")
+    op.execute(LOCATE_0013)
+    op.drop_column("precedent_cases", "location_derived")
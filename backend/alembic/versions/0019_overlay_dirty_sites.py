@@ -0,0 +1,64 @@
+"""queue sites whose constraint copies go stale without a geometry change
+
+Revision ID: 0019_overlay_dirty_sites
+Revises: 0018_precedent_location_derived
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0019_overlay_dirty_sites"
+down_revision: Union[str, None] = "0018_precedent_location_derived"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Fields copied into sites.constraints / planning_applications.constraints by the overlay job
+DESCRIBED = ("name", "type", "severity", "source_document", "description")
+
+# Runs BEFORE DELETE: the FK cascade would otherwise remove the site_constraints rows first
+MARK_FUNCTION = """
+CREATE OR REPLACE FUNCTION tpa_mark_constraint_sites() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO overlay_dirty_sites (site_id)
+        SELECT sc.site_id FROM site_constraints sc WHERE sc.constraint_id = OLD.id
+        ON CONFLICT DO NOTHING;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    RETURN NULL;
+END $$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "overlay_dirty_sites",
+        sa.Column("site_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("marked_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+    )
+    op.execute(MARK_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER tpa_mark_constraint_sites_delete BEFORE DELETE ON constraints "
+        "FOR EACH ROW EXECUTE FUNCTION tpa_mark_constraint_sites()"
+    )
+    old = ", ".join(f"OLD.{column}" for column in DESCRIBED)
+    new = ", ".join(f"NEW.{column}" for column in DESCRIBED)
+    op.execute(
+        f"CREATE TRIGGER tpa_mark_constraint_sites_update AFTER UPDATE OF {', '.join(DESCRIBED)} ON constraints "
+        f"FOR EACH ROW WHEN (({old}) IS DISTINCT FROM ({new})) EXECUTE FUNCTION tpa_mark_constraint_sites()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS tpa_mark_constraint_sites_update ON constraints")
+    op.execute("DROP TRIGGER IF EXISTS tpa_mark_constraint_sites_delete ON constraints")
+    op.execute("DROP FUNCTION IF EXISTS tpa_mark_constraint_sites()")
+    op.drop_table("overlay_dirty_sites")
@@ -1,73 +1,115 @@
 # app/api/ai.py
 
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
-from typing import Optional, List
-
-from app.services.ai_service import AIService
-from app.models.policies import AIGuidance
-from app.models.officer_reports import OfficerReport
-
-router = APIRouter(prefix="/ai", tags=["AI"])
-
-
-class GeneratePolicyGuidanceRequest(BaseModel):
-    policyText: str
-    context: Optional[dict] = None
-
-class GeneratePolicyGuidanceResponse(BaseModel):
-    suggestions: List[AIGuidance]
-
-class GenerateSiteJustificationRequest(BaseModel):
-    applicationId: str
-
-class GenerateSiteJustificationResponse(BaseModel):
-    justification: str
-
-class GenerateScenarioCommentaryRequest(BaseModel):
-    scenarioId: str
-
-class GenerateScenarioCommentaryResponse(BaseModel):
-    commentary: str
-
-class GenerateReportDraftRequest(BaseModel):
-    applicationId: str
-
-class GenerateReportDraftResponse(BaseModel):
-    report: OfficerReport
-
-
-@router.post("/generate-policy-guidance", response_model=GeneratePolicyGuidanceResponse)
-async def generate_policy_guidance(
-    body: GeneratePolicyGuidanceRequest, ai: AIService = Depends()
-):
-    return GeneratePolicyGuidanceResponse(suggestions=[])
-
-
-@router.post("/generate-site-justification", response_model=GenerateSiteJustificationResponse)
-async def generate_site_justification(
-    body: GenerateSiteJustificationRequest, ai: AIService = Depends()
-):
-    return GenerateSiteJustificationResponse(justification="")
+import json
+from typing import Any, Optional
 
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
-@router.post("/generate-scenario-commentary", response_model=GenerateScenarioCommentaryResponse)
-async def generate_scenario_commentary(
-    body: GenerateScenarioCommentaryRequest, ai: AIService = Depends()
-):
-    return GenerateScenarioCommentaryResponse(commentary="")
+from app.jobs import TERMINAL, JobQueueFull, job_runner, job_store
+from app.models.ai import (
+    GeneratePolicyGuidanceRequest,
+    GenerateReportDraftRequest,
+    GenerateScenarioCommentaryRequest,
+    GenerateSiteJustificationRequest,
+    Job,
+    JobAccepted,
+)
+from app.services import ai_jobs  # noqa: F401  registers the job handlers
+from app.instrumentation import InstrumentedRoute
+
+router = APIRouter(prefix="/ai", tags=["AI"], route_class=InstrumentedRoute)
+
+
+async def enqueue(request: Request, kind: str, body: BaseModel) -> JobAccepted:
+    try:
+        job = await job_runner.submit(kind, body.model_dump(mode="json"))
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {exc}", headers={"Retry-After": "5"})
+    return JobAccepted(
+        id=job["id"],
+        kind=kind,
+        status=job["status"],
+        statusUrl=request.url_for("get_job", job_id=job["id"]).path,
+        resultUrl=request.url_for("get_job_result", job_id=job["id"]).path,
+        eventsUrl=request.url_for("stream_job_events", job_id=job["id"]).path,
+    )
 
 
-@router.post("/generate-report-draft", response_model=GenerateReportDraftResponse)
-async def generate_report_draft(
-    body: GenerateReportDraftRequest, ai: AIService = Depends()
-):
-    return GenerateReportDraftResponse(
-        report=OfficerReport(
-            applicationId=body.applicationId,
-            version="",
-            sections=[],
-            lastModified="",
-            status="Draft",
-        )
+@router.post("/generate-policy-guidance", response_model=JobAccepted, status_code=202)
+async def generate_policy_guidance(body: GeneratePolicyGuidanceRequest, request: Request):
+    """
+    Queue policy guidance generation; the result is a GeneratePolicyGuidanceResponse.
+    """
+    return await enqueue(request, "policy_guidance", body)
+
+
+@router.post("/generate-site-justification", response_model=JobAccepted, status_code=202)
+async def generate_site_justification(body: GenerateSiteJustificationRequest, request: Request):
+    """
+    Queue a site justification; the result is a GenerateSiteJustificationResponse.
+    """
+    return await enqueue(request, "site_justification", body)
+
+
+@router.post("/generate-scenario-commentary", response_model=JobAccepted, status_code=202)
+async def generate_scenario_commentary(body: GenerateScenarioCommentaryRequest, request: Request):
+    """
+    Queue scenario commentary; the result is a GenerateScenarioCommentaryResponse.
+    """
+    return await enqueue(request, "scenario_commentary", body)
+
+
+@router.post("/generate-report-draft", response_model=JobAccepted, status_code=202)
+async def generate_report_draft(body: GenerateReportDraftRequest, request: Request):
+    """
+    Queue an officer report draft; follow eventsUrl for sections as they are written.
+    """
+    return await enqueue(request, "report_draft", body)
+
+
+@router.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    """
+    Status of a queued, running or finished job, including its result once done.
+    """
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/result", response_model=Any)
+async def get_job_result(job_id: str):
+    """
+    The finished job's result; 409 while it is still queued or running, or if it failed.
+    """
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in TERMINAL:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    if job.get("error"):
+        raise HTTPException(status_code=409, detail=f"Job failed: {job['error']}")
+    return job.get("result")
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events for a job: status changes, progress and partial output (delta),
+    ending after the final status. Reconnects resume from Last-Event-ID.
+    """
+    if await job_store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for event_id, event, data in job_store.follow(job_id, last_event_id or "0"):
+            yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
@@ -1,20 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
-from app.models.constraints import Constraint
+from app.api.ai import enqueue
+from app.api.deps import page_params
+from app.crud.constraints import ConstraintCRUD
+from app.models.pagination import Page
+from app.models.ai import JobAccepted
+from app.models.constraints import Constraint, OverlayRunRequest
+from app.services import constraints_service  # noqa: F401  registers the job handler
+from app.instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/constraints", tags=["Constraints"])
+router = APIRouter(prefix="/constraints", tags=["Constraints"], route_class=InstrumentedRoute)
 
 
-@router.get("/", response_model=List[Constraint])
-async def list_constraints(db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Page)
+async def list_constraints(
+    intersects: Optional[UUID] = Query(None, description="Only constraints intersecting this site's geometry"),
+    page: dict = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    List all constraints.
+    List constraints, one keyset page at a time, optionally projected with
+    ?fields= and restricted to those affecting the site given by ?intersects=.
     """
-    return []  # Replace with: await ConstraintCRUD(db).list_all()
+    where = (ConstraintCRUD.intersecting_site(intersects),) if intersects else ()
+    return await ConstraintCRUD(db).list_page(where=where, **page)
+
+
+@router.post("/overlay", response_model=JobAccepted, status_code=202)
+async def run_overlay(
+    request: Request,
+    full: bool = Query(False, description="Rebuild every site/constraint pair instead of only changed geometry"),
+):
+    """
+    Queue a recompute of the site/constraint overlay and the sites' constraint
+    summaries; the result is an OverlayRunResult.
+    """
+    return await enqueue(request, "constraint_overlay", OverlayRunRequest(full=full))
 
 
 @router.get("/{constraint_id}", response_model=Constraint)
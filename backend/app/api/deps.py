@@ -0,0 +1,43 @@
+from typing import List, Optional, Sequence
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+
+from app.services.export_service import EXPORTS, Exporter
+
+
+def page_params(
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's nextCursor"),
+    limit: int = Query(50, ge=1, le=500),
+    fields: Optional[str] = Query(None, description="Comma-separated camelCase fields to return, e.g. id,name,coordinates"),
+    sort: str = Query("id", description="Keyset ordering, 'id' or 'lastModified' where the resource has one"),
+) -> dict:
+    """
+    Shared query parameters for paginated list endpoints, as CRUD ``list_page`` kwargs.
+    """
+    selected: Optional[List[str]] = None
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+    return {"cursor": cursor, "limit": limit, "fields": selected, "sort": sort}
+
+
+def export_params(
+    format: str = Query("ndjson", description="ndjson, csv or geojson (resources with a geometry only)"),
+    fields: Optional[str] = Query(None, description="Comma-separated camelCase fields to export; all by default"),
+) -> dict:
+    """
+    Shared query parameters for the streaming export endpoints.
+    """
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    return {"fmt": format, "fields": selected}
+
+
+def export_response(resource: str, fmt: str, fields: Optional[List[str]], where: Sequence = ()) -> StreamingResponse:
+    """
+    Stream every row of ``resource`` as an attachment; see ``Exporter``.
+    """
+    exporter = Exporter(EXPORTS[resource], fmt, fields=fields, where=where)
+    return StreamingResponse(
+        exporter.body(),
+        media_type=exporter.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{exporter.filename(resource)}"'},
+    )
@@ -1,25 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
-from app.models.goals import Goal
+from app.db import get_db, get_job_db
+from app.api.deps import page_params
+from app.cache import response_cache
+from app.crud.goals import GoalCRUD
+from app.models.pagination import Page
+from app.models.goals import Goal, GoalProgress, GoalProgressHistory, GoalProgressRefresh
+from app.services.goal_progress_service import GoalProgressService
+from app.instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/goals", tags=["Goals"])
+router = APIRouter(prefix="/goals", tags=["Goals"], route_class=InstrumentedRoute)
 
 
-@router.get("/", response_model=List[Goal])
-async def list_goals(db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Page)
+async def list_goals(
+    page: dict = Depends(page_params), db: AsyncSession = Depends(get_db)
+):
     """
-    List all goals.
+    List goals, one keyset page at a time, optionally projected with ?fields=.
     """
-    return []  # Replace with: await GoalCRUD(db).list_all()
+    return await GoalCRUD(db).list_page(**page)
+
+
+@router.get("/progress", response_model=List[GoalProgress])
+async def list_goal_progress(db: AsyncSession = Depends(get_db)):
+    """
+    Progress of every tracked goal, served from the precomputed aggregates.
+    """
+    return await GoalProgressService(db).progress()
+
+
+@router.post("/progress/refresh", response_model=GoalProgressRefresh)
+async def refresh_goal_progress(
+    snapshot: bool = Query(False, description="Record a time-series point for every goal"),
+    db: AsyncSession = Depends(get_job_db),
+):
+    """
+    Rebuild every site's facts and every goal's aggregates from scratch.
+    """
+    return await GoalProgressService(db).rebuild(snapshot=snapshot)
 
 
 @router.get("/{goal_id}", response_model=Goal)
-async def get_goal(goal_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_goal(goal_id: UUID, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Get a single goal by ID. Sends an ETag and honours If-None-Match with 304.
+    """
+    crud = GoalCRUD(db)
+    return await response_cache.respond(
+        request,
+        "goal",
+        goal_id,
+        stamp=lambda: crud.stamp(goal_id),
+        load=lambda: crud.get(goal_id),
+        model=Goal,
+        not_found="Goal not found",
+    )
+
+
+@router.get("/{goal_id}/progress", response_model=GoalProgress)
+async def get_goal_progress(goal_id: UUID, db: AsyncSession = Depends(get_db)):
+    """
+    Current progress of a single goal.
+    """
+    found = await GoalProgressService(db).progress([goal_id])
+    if not found:
+        raise HTTPException(status_code=404, detail="Goal progress not found")
+    return found[0]
+
+
+@router.get("/{goal_id}/progress/history", response_model=GoalProgressHistory)
+async def get_goal_progress_history(
+    goal_id: UUID,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    bucket: Optional[str] = Query(None, pattern="^(day|week|month)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    A goal's snapshot time series, optionally the last point per day, week or month.
+    """
+    return await GoalProgressService(db).history(goal_id, since=since, until=until, bucket=bucket)
+
+
+@router.get("/{goal_id}/related-by", response_model=Page)
+async def list_goals_relating(goal_id: UUID, page: dict = Depends(page_params), db: AsyncSession = Depends(get_db)):
     """
-    Get a single goal by ID.
+    Goals that list this goal among their related goals.
     """
-    raise HTTPException(status_code=404, detail="Goal not found")
+    return await GoalCRUD(db).list_page(where=(GoalCRUD.relating_to(goal_id),), **page)
@@ -0,0 +1,45 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.jobs import JobQueueFull, job_runner
+from app.db import get_job_db
+from app.models.ingest import IngestReport
+from app.services.ingest_service import ENTITIES, FORMATS, detect_format, ingest
+from app.services.scenarios_service import frame_cache
+from app.instrumentation import InstrumentedRoute
+
+router = APIRouter(prefix="/ingest", tags=["Ingest"], route_class=InstrumentedRoute)
+
+
+@router.post("/{entity}", response_model=IngestReport)
+async def ingest_rows(
+    entity: str,
+    request: Request,
+    format: Optional[str] = Query(None, description="csv, ndjson or geojson; defaults from Content-Type"),
+    mode: str = Query("upsert", pattern="^(upsert|insert)$"),
+    batch_size: int = Query(settings.ingest_batch_size, alias="batchSize", ge=1, le=100000),
+    db: AsyncSession = Depends(get_job_db),
+):
+    """
+    Bulk-load sites, planning-applications or precedent-cases from the raw
+    request body, which is streamed and never held in memory whole. Upserts
+    match on uprn, reference number or case reference; rows that fail
+    validation or the database are reported, not fatal.
+    """
+    if entity not in ENTITIES:
+        raise HTTPException(status_code=404, detail=f"Unknown entity; expected one of {', '.join(ENTITIES)}")
+    fmt = format or detect_format(request.headers.get("content-type"))
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=415, detail=f"Pass ?format= or a Content-Type for one of {', '.join(FORMATS)}")
+    report = await ingest(db, entity, fmt, request.stream(), mode=mode, batch_size=batch_size)
+    if entity == "sites" and report.rowsLoaded:
+        frame_cache.invalidate()  # bulk loads bypass the ORM events that normally do this
+    if entity in ("sites", "planning-applications") and report.rowsLoaded:
+        try:
+            await job_runner.submit("goal_progress", {"full": True})
+        except JobQueueFull:
+            pass  # the next refresh catches up; the load itself succeeded
+    return report
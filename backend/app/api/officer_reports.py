@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
-from app.models.officer_reports import OfficerReport, OfficerReportSection
+from app.api.ai import enqueue
+from app.crud.officer_reports import OfficerReportCRUD
+from app.models.ai import JobAccepted
+from app.models.officer_reports import (
+    GenerateOfficerReportRequest,
+    OfficerReport,
+    OfficerReportJobParams,
+    OfficerReportSection,
+)
+from app.services import officer_reports_service  # noqa: F401  registers the job handlers
+from app.instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/planning-applications/{application_id}/officer-report", tags=["OfficerReports"])
+router = APIRouter(prefix="/planning-applications/{application_id}/officer-report", tags=["OfficerReports"], route_class=InstrumentedRoute)
 
 
 @router.get("/", response_model=OfficerReport)
@@ -14,18 +24,31 @@ async def get_officer_report(application_id: UUID, db: AsyncSession = Depends(ge
     """
     Get the officer report for a given application ID.
     """
-    raise HTTPException(status_code=404, detail="OfficerReport not found")
+    report = await OfficerReportCRUD(db).get(application_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="OfficerReport not found")
+    return report
 
 
 @router.get("/sections", response_model=List[OfficerReportSection])
 async def list_officer_report_sections(application_id: UUID, db: AsyncSession = Depends(get_db)):
     """
-    List all sections of an officer report for a given application ID.
+    List all sections of an officer report for a given application ID, in report order.
     """
-    # TODO: Implement actual DB fetch logic
-    # Example placeholder:
-    # report = await get_officer_report_from_db(application_id, db)
-    # if not report:
-    #     raise HTTPException(status_code=404, detail="OfficerReport not found")
-    # return report.sections
-    return []
+    report = await OfficerReportCRUD(db).get(application_id, fields=["sections"])
+    if report is None:
+        raise HTTPException(status_code=404, detail="OfficerReport not found")
+    return sorted(report["sections"] or [], key=lambda section: section.get("order", 0))
+
+
+@router.post("/generate", response_model=JobAccepted, status_code=202)
+async def generate_officer_report(
+    application_id: UUID, request: Request, body: Optional[GenerateOfficerReportRequest] = None
+):
+    """
+    Queue (re)generation of the officer report; the result is an OfficerReportGeneration.
+    Only sections whose inputs changed since the stored report are rendered again,
+    unless force is set, and eventsUrl streams each one as it is written.
+    """
+    params = OfficerReportJobParams(applicationId=str(application_id), force=body.force if body else False)
+    return await enqueue(request, "officer_report", params)
@@ -1,43 +1,159 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
-from app.models.plan_documents import PlanDocument, DocumentNode
+from app.db import get_db, get_primary_db
+from app.api.deps import page_params
+from app.cache import response_cache
+from app.crud.plan_documents import PlanDocumentCRUD, DocumentNodeCRUD
+from app.models.pagination import Page
+from app.models.plan_documents import (
+    DocumentDiff,
+    DocumentNode,
+    DocumentVersion,
+    DocumentVersionCreate,
+    PlanDocument,
+)
+from app.models.search import SearchResults
+from app.services.plan_documents_service import PlanDocumentService
+from app.services.plan_versions_service import PlanVersionService
+from app.services.search_service import SearchService
+from app.instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/plan-documents", tags=["PlanDocuments"])
+router = APIRouter(prefix="/plan-documents", tags=["PlanDocuments"], route_class=InstrumentedRoute)
 
 
-@router.get("/", response_model=List[PlanDocument])
-async def list_plan_documents(db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Page)
+async def list_plan_documents(
+    page: dict = Depends(page_params), db: AsyncSession = Depends(get_db)
+):
     """
-    List all plan documents.
+    List plan documents, one keyset page at a time, optionally projected with ?fields=.
     """
-    return []  # Replace with: await PlanDocumentCRUD(db).list_all()
+    return await PlanDocumentCRUD(db).list_page(**page)
 
 
 @router.get("/{document_id}", response_model=PlanDocument)
-async def get_plan_document(document_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_plan_document(
+    document_id: UUID,
+    request: Request,
+    depth: Optional[int] = Query(None, ge=0, description="Levels below the top to load; omit for the whole tree"),
+    include_content: bool = Query(True, description="False for outline views"),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Get a single plan document by ID.
+    Get a single plan document by ID, with its node tree fetched in one query.
+    Sends an ETag covering the document and all of its nodes; honours If-None-Match.
     """
-    raise HTTPException(status_code=404, detail="PlanDocument not found")
+    return await response_cache.respond(
+        request,
+        "plan_document",
+        document_id,
+        stamp=lambda: PlanDocumentCRUD(db).stamp(document_id),
+        load=lambda: PlanDocumentService(db).get_document(document_id, depth, include_content),
+        model=PlanDocument,
+        variant=f"{depth}:{include_content}",
+        not_found="PlanDocument not found",
+    )
 
 
-@router.get("/{document_id}/nodes", response_model=List[DocumentNode])
-async def list_document_nodes(document_id: UUID, db: AsyncSession = Depends(get_db)):
+@router.get("/{document_id}/search", response_model=SearchResults)
+async def search_plan_document(
+    document_id: UUID,
+    q: str = Query(..., min_length=1, description="Web-search style query"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    List top-level nodes of a plan document.
+    Full-text search over the titles and content of a document's nodes.
     """
-    return []  # Replace with: await DocumentNodeCRUD(db).list_for_document(document_id)
+    hits = await SearchService(db).search_document(document_id, q, limit)
+    return SearchResults(query=q, hits=hits)
+
+
+@router.get("/{document_id}/nodes", response_model=Page)
+async def list_document_nodes(
+    document_id: UUID,
+    page: dict = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    List top-level nodes of a plan document, one keyset page at a time.
+    """
+    return await DocumentNodeCRUD(db).list_for_document(document_id, **page)
 
 
 @router.get("/{document_id}/nodes/{node_id}", response_model=DocumentNode)
 async def get_document_node(
-    document_id: UUID, node_id: UUID, db: AsyncSession = Depends(get_db)
+    document_id: UUID,
+    node_id: UUID,
+    request: Request,
+    depth: Optional[int] = Query(None, ge=0, description="Levels below this node to load; omit for the whole subtree"),
+    include_content: bool = Query(True, description="False for outline views"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get a document node and its subtree, fetched in one query.
+    Cached alongside its document, so any edit to the document invalidates it.
+    """
+    return await response_cache.respond(
+        request,
+        "plan_document",
+        document_id,
+        stamp=lambda: PlanDocumentCRUD(db).stamp(document_id),
+        load=lambda: PlanDocumentService(db).get_subtree(document_id, node_id, depth, include_content),
+        model=DocumentNode,
+        variant=f"node:{node_id}:{depth}:{include_content}",
+        not_found="DocumentNode not found",
+    )
+
+
+@router.get("/{document_id}/versions", response_model=List[DocumentVersion])
+async def list_document_versions(document_id: UUID, db: AsyncSession = Depends(get_db)):
+    """
+    List the committed versions of a plan document, oldest first.
+    """
+    return await PlanVersionService(db).list_versions(document_id)
+
+
+@router.post("/{document_id}/versions", response_model=DocumentVersion, status_code=201)
+async def commit_document_version(
+    document_id: UUID, version: DocumentVersionCreate, db: AsyncSession = Depends(get_primary_db)
+):
+    """
+    Commit the document's current nodes as its next version.
+    Stores only the nodes added, edited, moved or removed since the previous version.
+    """
+    created = await PlanVersionService(db).commit(document_id, version.label, version.author)
+    if created is None:
+        raise HTTPException(status_code=404, detail="PlanDocument not found")
+    return created
+
+
+@router.get("/{document_id}/versions/{number}", response_model=PlanDocument)
+async def get_document_version(document_id: UUID, number: int, db: AsyncSession = Depends(get_db)):
+    """
+    Get a plan document as it stood in a committed version, rebuilt from its node deltas.
+    """
+    document = await PlanVersionService(db).reconstruct(document_id, number)
+    if document is None:
+        raise HTTPException(status_code=404, detail="DocumentVersion not found")
+    return document
+
+
+@router.get("/{document_id}/diff", response_model=DocumentDiff)
+async def diff_document_versions(
+    document_id: UUID,
+    from_version: int = Query(..., alias="fromVersion", ge=1),
+    to_version: int = Query(..., alias="toVersion", ge=1),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    Get a single document node by ID.
+    Structural and text diff between two committed versions of a plan document.
+    Only nodes changed between the two versions are read.
     """
-    raise HTTPException(status_code=404, detail="DocumentNode not found")
+    diff = await PlanVersionService(db).diff(document_id, from_version, to_version)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="DocumentVersion not found")
+    return diff
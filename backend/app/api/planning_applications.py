@@ -1,20 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
+from app.api.deps import export_params, export_response, page_params
+from app.crud.planning_applications import ApplicationCRUD
+from app.models.pagination import Page
 from app.models.planning_applications import PlanningApplication
+from app.models.policies import PolicyApplicability
+from app.services.policy_applicability import ApplicabilityService
+from app.instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/planning-applications", tags=["PlanningApplications"])
+router = APIRouter(prefix="/planning-applications", tags=["PlanningApplications"], route_class=InstrumentedRoute)
 
 
-@router.get("/", response_model=List[PlanningApplication])
-async def list_planning_applications(db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Page)
+async def list_planning_applications(
+    policy_reference: Optional[str] = Query(
+        None, alias="policyReference", description="Only applications citing this policy reference, e.g. H1"
+    ),
+    page: dict = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    List planning applications, one keyset page at a time, optionally projected
+    with ?fields= and restricted to those citing ?policyReference=.
+    """
+    where = (ApplicationCRUD.citing_reference(policy_reference),) if policy_reference else ()
+    return await ApplicationCRUD(db).list_page(where=where, **page)
+
+
+@router.get("/export")
+async def export_planning_applications(export: dict = Depends(export_params)):
     """
-    List all planning applications.
+    Stream all planning applications as NDJSON or CSV, in constant memory.
     """
-    return []  # Replace with: await ApplicationCRUD(db).list_all()
+    return export_response("planning-applications", **export)
 
 
 @router.get("/{application_id}", response_model=PlanningApplication)
@@ -25,3 +47,14 @@ async def get_planning_application(
     Get a single planning application by ID.
     """
     raise HTTPException(status_code=404, detail="PlanningApplication not found")
+
+
+@router.get("/{application_id}/applicable-policies", response_model=PolicyApplicability)
+async def get_application_applicable_policies(application_id: UUID, db: AsyncSession = Depends(get_db)):
+    """
+    Policies that currently apply to the application's site, by reference.
+    """
+    found = await ApplicabilityService(db).for_application(application_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Planning application not found or has no site")
+    return found
@@ -1,28 +1,132 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.db import get_db
-from app.models.policies import Policy
+from app.api.deps import export_params, export_response, page_params
+from app.cache import response_cache
+from app.crud.goals import GoalCRUD
+from app.crud.planning_applications import ApplicationCRUD
+from app.crud.policies import PolicyCRUD
+from app.models.pagination import Page
+from app.models.policies import Policy, PolicyConflictReport, PolicyGraphView
+from app.models.shared import RelationshipType
+from app.models.search import SearchResults
+from app.services.policy_graph import PolicyGraphService
+from app.services.search_service import SearchService
+from app.instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/policies", tags=["Policies"])
+router = APIRouter(prefix="/policies", tags=["Policies"], route_class=InstrumentedRoute)
 
 
-@router.get("/", response_model=List[Policy])
-async def list_policies(db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Page)
+async def list_policies(
+    page: dict = Depends(page_params), db: AsyncSession = Depends(get_db)
+):
     """
-    List all policies.
+    List policies, one keyset page at a time, optionally projected with ?fields=.
     """
-    return []  # Replace with: await PolicyCRUD(db).list_all()
+    return await PolicyCRUD(db).list_page(**page)
+
+
+@router.get("/export")
+async def export_policies(export: dict = Depends(export_params)):
+    """
+    Stream all policies as NDJSON or CSV, in constant memory.
+    """
+    return export_response("policies", **export)
+
+
+@router.get("/search", response_model=SearchResults)
+async def search_policies(
+    q: str = Query(..., min_length=1, description="Web-search style query, e.g. affordable housing -rural"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Full-text search over policy reference, title, keywords, wording and supporting text.
+    """
+    hits = await SearchService(db).search_policies(q, limit)
+    return SearchResults(query=q, hits=hits)
+
+
+@router.get("/graph/conflicts", response_model=PolicyConflictReport)
+async def policy_conflicts(
+    document_id: Optional[UUID] = Query(None, alias="documentId", description="Limit to one plan document"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Every CONFLICTS_WITH pair, conflict cycle and looping SUPERSEDES chain
+    touching a plan document's policies (or all policies).
+    """
+    return await PolicyGraphService(db).conflicts(document_id)
 
 
 @router.get("/{policy_id}", response_model=Policy)
-async def get_policy(policy_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_policy(policy_id: UUID, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Get a single policy by ID. Sends an ETag and honours If-None-Match with 304.
+    """
+    crud = PolicyCRUD(db)
+    return await response_cache.respond(
+        request,
+        "policy",
+        policy_id,
+        stamp=lambda: crud.stamp(policy_id),
+        load=lambda: crud.get(policy_id),
+        model=Policy,
+        not_found="Policy not found",
+    )
+
+
+@router.get("/{policy_id}/goals", response_model=Page)
+async def list_policy_goals(policy_id: UUID, page: dict = Depends(page_params), db: AsyncSession = Depends(get_db)):
+    """
+    Goals that list this policy among their contributing policies.
+    """
+    return await GoalCRUD(db).list_page(where=(GoalCRUD.with_policy(policy_id),), **page)
+
+
+@router.get("/{policy_id}/linked-from", response_model=Page)
+async def list_policies_linking(policy_id: UUID, page: dict = Depends(page_params), db: AsyncSession = Depends(get_db)):
+    """
+    Policies whose linkedPolicies point at this policy.
+    """
+    return await PolicyCRUD(db).list_page(where=(PolicyCRUD.linking_to(policy_id),), **page)
+
+
+@router.get("/{policy_id}/applications", response_model=Page)
+async def list_policy_applications(
+    policy_id: UUID, page: dict = Depends(page_params), db: AsyncSession = Depends(get_db)
+):
+    """
+    Planning applications that cite this policy among their relevant policies.
+    """
+    return await ApplicationCRUD(db).list_page(where=(ApplicationCRUD.citing_policy(policy_id),), **page)
+
+
+@router.get("/{policy_id}/graph", response_model=PolicyGraphView)
+async def get_policy_graph(
+    policy_id: UUID,
+    depth: int = Query(1, ge=0, le=settings.policy_graph_max_depth),
+    relationships: Optional[str] = Query(None, description="Comma-separated relationship types to follow; all by default"),
+    direction: str = Query("both", pattern="^(out|in|both)$"),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Get a single policy by ID.
+    The policy's neighbourhood within ?depth= hops of the relationship graph,
+    with its transitive SUPERSEDES chains, direct conflicts and the
+    CONFLICTS_WITH cycles it sits on.
     """
-    # Replace with real lookup:
-    # policy = await PolicyCRUD(db).get(policy_id)
-    # if not policy: raise ...
-    raise HTTPException(status_code=404, detail="Policy not found")
+    selected = None
+    if relationships:
+        try:
+            selected = [RelationshipType(name.strip()) for name in relationships.split(",") if name.strip()]
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    view = await PolicyGraphService(db).view(policy_id, depth=depth, relationships=selected, direction=direction)
+    if view is None:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    return view
@@ -1,20 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
-from app.models.precedent_cases import PrecedentCase
+from app.api.deps import page_params
+from app.crud.precedent_cases import PrecedentCaseCRUD
+from app.models.pagination import Page
+from app.models.precedent_cases import PrecedentCase, RankedPrecedent, SimilarPrecedent
+from app.services.precedent_cases_service import PrecedentSimilarityService
+from app.services.precedent_ranking import PrecedentRankingService
+from app.instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/precedent-cases", tags=["PrecedentCases"])
+router = APIRouter(prefix="/precedent-cases", tags=["PrecedentCases"], route_class=InstrumentedRoute)
 
 
-@router.get("/", response_model=List[PrecedentCase])
-async def list_precedent_cases(db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Page)
+async def list_precedent_cases(
+    page: dict = Depends(page_params), db: AsyncSession = Depends(get_db)
+):
     """
-    List all precedent cases.
+    List precedent cases, one keyset page at a time, optionally projected with ?fields=.
     """
-    return []  # Replace with: await PrecedentCaseCRUD(db).list_all()
+    return await PrecedentCaseCRUD(db).list_page(**page)
+
+
+@router.get("/similar", response_model=List[SimilarPrecedent])
+async def similar_precedent_cases(
+    application_id: UUID,
+    k: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    The k precedent cases most similar to an application, by embedding distance.
+    """
+    results = await PrecedentSimilarityService(db).similar_to_application(application_id, k)
+    if results is None:
+        raise HTTPException(status_code=404, detail="PlanningApplication not found")
+    return results
+
+
+@router.get("/ranked", response_model=List[RankedPrecedent])
+async def ranked_precedent_cases(
+    application_id: UUID,
+    k: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    The k precedent cases most relevant to an application, blending cited-policy overlap,
+    distance from the site and reasoning similarity, with each component reported.
+    """
+    results = await PrecedentRankingService(db).rank(application_id, k)
+    if results is None:
+        raise HTTPException(status_code=404, detail="PlanningApplication not found")
+    return results
 
 
 @router.get("/{precedent_id}", response_model=PrecedentCase)
@@ -4,17 +4,54 @@ from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
-from app.models.scenarios import Scenario
+from app.api.deps import page_params
+from app.crud.scenarios import ScenarioCRUD
+from app.models.pagination import Page
+from app.models.scenarios import (
+    Scenario,
+    ScenarioCompareRequest,
+    ScenarioComparison,
+    ScenarioDefinition,
+    ScenarioEvaluation,
+)
+from app.services.scenarios_service import ScenarioService
+from app.instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/scenarios", tags=["Scenarios"])
+router = APIRouter(prefix="/scenarios", tags=["Scenarios"], route_class=InstrumentedRoute)
 
 
-@router.get("/", response_model=List[Scenario])
-async def list_scenarios(db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Page)
+async def list_scenarios(
+    page: dict = Depends(page_params), db: AsyncSession = Depends(get_db)
+):
     """
-    List all scenarios.
+    List scenarios, one keyset page at a time, optionally projected with ?fields=.
     """
-    return []  # Replace with: await ScenarioCRUD(db).list_all()
+    return await ScenarioCRUD(db).list_page(**page)
+
+
+@router.post("/evaluate", response_model=ScenarioEvaluation)
+async def evaluate_scenario_definition(definition: ScenarioDefinition, db: AsyncSession = Depends(get_db)):
+    """
+    Evaluate an unsaved what-if scenario (site selection and policy levers)
+    against the current sites and goals.
+    """
+    return await ScenarioService(db).evaluate_definition(definition.model_dump())
+
+
+@router.post("/compare", response_model=ScenarioComparison)
+async def compare_scenarios(body: ScenarioCompareRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Compare saved scenarios and/or a densityUplift sweep (optionally limited
+    to a parish or site categories) as a matrix of SummaryMetrics and goal
+    values, with deltas against a reference row.
+    """
+    try:
+        return await ScenarioService(db).compare(body)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
 
 @router.get("/{scenario_id}", response_model=Scenario)
@@ -23,3 +60,26 @@ async def get_scenario(scenario_id: UUID, db: AsyncSession = Depends(get_db)):
     Get a single scenario by ID.
     """
     raise HTTPException(status_code=404, detail="Scenario not found")
+
+
+@router.post("/{scenario_id}/evaluate", response_model=ScenarioEvaluation)
+async def evaluate_scenario(scenario_id: UUID, db: AsyncSession = Depends(get_db)):
+    """
+    Recompute a scenario's summaryMetrics and goalPerformance and store them.
+    """
+    result = await ScenarioService(db).evaluate(scenario_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    return result
+
+
+@router.post("/{scenario_id}/evaluate-variants", response_model=List[ScenarioEvaluation])
+async def evaluate_scenario_variants(scenario_id: UUID, db: AsyncSession = Depends(get_db)):
+    """
+    Re-evaluate a baseline and every scenario branched from it, deriving each
+    variant from its baseline's cached state, and store the results.
+    """
+    results = await ScenarioService(db).evaluate_variants(scenario_id)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    return results
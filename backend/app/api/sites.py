@@ -1,20 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
+from app.api.deps import export_params, export_response, page_params
+from app.crud.goals import GoalCRUD
+from app.crud.scenarios import ScenarioCRUD
+from app.crud.sites import SiteCRUD
+from app.models.pagination import Page
+from app.models.policies import PolicyApplicability
 from app.models.sites import Site
+from app.services.policy_applicability import ApplicabilityService
+from app.spatial import parse_bbox
+from app.instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/sites", tags=["Sites"])
+router = APIRouter(prefix="/sites", tags=["Sites"], route_class=InstrumentedRoute)
 
 
-@router.get("/", response_model=List[Site])
-async def list_sites(db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Page)
+async def list_sites(
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat (EPSG:4326)"),
+    page: dict = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    List all sites.
+    List sites, one keyset page at a time, optionally projected with ?fields=
+    and restricted to those intersecting ?bbox=.
     """
-    return []  # Replace with: await SiteCRUD(db).list_all()
+    where = ()
+    if bbox:
+        try:
+            where = (SiteCRUD.in_bbox(parse_bbox(bbox)),)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    return await SiteCRUD(db).list_page(where=where, **page)
+
+
+@router.get("/export")
+async def export_sites(
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat (EPSG:4326)"),
+    export: dict = Depends(export_params),
+):
+    """
+    Stream all sites (optionally only those touching ?bbox=) as NDJSON, CSV
+    or a GeoJSON FeatureCollection, in constant memory.
+    """
+    where = ()
+    if bbox:
+        try:
+            where = (SiteCRUD.in_bbox(parse_bbox(bbox)),)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    return export_response("sites", where=where, **export)
 
 
 @router.get("/{site_id}", response_model=Site)
@@ -23,3 +61,36 @@ async def get_site(site_id: UUID, db: AsyncSession = Depends(get_db)):
     Get a single site by ID.
     """
     raise HTTPException(status_code=404, detail="Site not found")
+
+
+@router.get("/{site_id}/goals", response_model=Page)
+async def list_site_goals(site_id: UUID, page: dict = Depends(page_params), db: AsyncSession = Depends(get_db)):
+    """
+    Goals that list this site among their contributing sites.
+    """
+    return await GoalCRUD(db).list_page(where=(GoalCRUD.with_site(site_id),), **page)
+
+
+@router.get("/{site_id}/scenarios", response_model=Page)
+async def list_site_scenarios(
+    site_id: UUID,
+    included: Optional[bool] = Query(None, description="true: only includedSiteIds, false: only excludedSiteIds"),
+    page: dict = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Scenarios that include or exclude this site.
+    """
+    return await ScenarioCRUD(db).list_page(where=(ScenarioCRUD.with_site(site_id, included),), **page)
+
+
+@router.get("/{site_id}/applicable-policies", response_model=PolicyApplicability)
+async def get_site_applicable_policies(site_id: UUID, db: AsyncSession = Depends(get_db)):
+    """
+    Policies that currently apply to the site, by reference, with the site
+    categories each one matched on.
+    """
+    found = await ApplicabilityService(db).for_site(site_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Site not found")
+    return found
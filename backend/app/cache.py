@@ -0,0 +1,202 @@
+"""
+Conditional-GET response cache for read-mostly resources.
+
+Each cached entry holds the serialised body, its strong ETag and the
+resource's *stamp* (its last_modified/version columns, or a trigger-bumped
+revision). A request first reads the stamp, which is one narrow indexed row.
+The ETag is a function of the stamp alone, so a client whose If-None-Match
+matches gets a bodyless 304 whether or not this process has the body cached;
+otherwise a matching cached entry is reused. Writes made through the ORM
+invalidate entries after commit (see ``register_invalidation``), and the
+stamp check catches anything written behind the cache's back.
+
+Entries for one object are grouped so that every variant (depth, projection)
+is dropped together; the in-process LRU also caps variants per object. The
+default backend is an in-process LRU; set ``response_cache_backend=redis``
+to share entries between workers.
+"""
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+Entry = Tuple[str, str, bytes]  # (stamp, etag, body)
+
+
+class LRUBackend:
+    def __init__(self, maxsize: int = 1024, max_variants: int = 16):
+        self.maxsize = maxsize
+        self.max_variants = max_variants
+        self.groups: "OrderedDict[str, Dict[str, Entry]]" = OrderedDict()
+
+    async def get(self, group: str, variant: str) -> Optional[Entry]:
+        entries = self.groups.get(group)
+        if entries is None:
+            return None
+        self.groups.move_to_end(group)
+        return entries.get(variant)
+
+    async def set(self, group: str, variant: str, entry: Entry) -> None:
+        entries = self.groups.setdefault(group, {})
+        entries.pop(variant, None)
+        entries[variant] = entry  # dicts keep insertion order, so the first variant is the oldest
+        while len(entries) > self.max_variants:
+            del entries[next(iter(entries))]
+        self.groups.move_to_end(group)
+        while len(self.groups) > self.maxsize:
+            self.groups.popitem(last=False)
+
+    async def delete(self, groups: Iterable[str]) -> None:
+        for group in groups:
+            self.groups.pop(group, None)
+
+
+class RedisBackend:
+    """One Redis hash per object, one field per variant, expiring as a unit."""
+
+    def __init__(self, url: str, ttl: int = 3600, prefix: str = "tpa:response:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, group: str, variant: str) -> Optional[Entry]:
+        raw = await self.client.hget(self.prefix + group, variant)
+        if raw is None:
+            return None
+        stamp, etag, body = raw.split(b"\n", 2)
+        return stamp.decode(), etag.decode(), body
+
+    async def set(self, group: str, variant: str, entry: Entry) -> None:
+        stamp, etag, body = entry
+        key = self.prefix + group
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, variant, stamp.encode() + b"\n" + etag.encode() + b"\n" + body)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def delete(self, groups: Iterable[str]) -> None:
+        keys = [self.prefix + group for group in groups]
+        if keys:
+            await self.client.delete(*keys)
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: ``W/"x"`` matches ``"x"``, ``*`` matches anything."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def group(resource: str, obj_id: Any) -> str:
+        return f"{resource}:{obj_id}"
+
+    @staticmethod
+    def etag(group: str, variant: str, stamp: str) -> str:
+        return '"' + hashlib.sha256(f"{group}|{variant}|{stamp}".encode()).hexdigest()[:32] + '"'
+
+    async def respond(
+        self,
+        request: Request,
+        resource: str,
+        obj_id: Any,
+        stamp: Callable[[], Awaitable[Optional[str]]],
+        load: Callable[[], Awaitable[Optional[Any]]],
+        model: type[BaseModel],
+        variant: str = "",
+        not_found: str = "Not found",
+    ) -> Response:
+        """Serve ``resource``/``obj_id`` as JSON with a strong ETag, or 304 if the client's copy is current."""
+        current = await stamp()
+        if current is None:
+            raise HTTPException(status_code=404, detail=not_found)
+        group = self.group(resource, obj_id)
+        etag = self.etag(group, variant, current)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        entry = await self.backend.get(group, variant)
+        if entry is None or entry[0] != current:
+            data = await load()
+            if data is None:
+                raise HTTPException(status_code=404, detail=not_found)
+            body = model.model_validate(data).model_dump_json().encode()
+            entry = (current, etag, body)
+            await self.backend.set(group, variant, entry)
+        return Response(content=entry[2], media_type="application/json", headers=headers)
+
+    async def invalidate(self, *groups: str) -> None:
+        await self.backend.delete(groups)
+
+
+def build_response_cache() -> ResponseCache:
+    if settings.response_cache_backend == "redis" and settings.redis_url:
+        return ResponseCache(RedisBackend(settings.redis_url, ttl=settings.response_cache_ttl))
+    return ResponseCache(LRUBackend(settings.response_cache_size, settings.response_cache_variants))
+
+
+response_cache = build_response_cache()
+
+
+def orm_groups(obj: Any) -> Iterable[str]:
+    """Cache groups affected by a write to ``obj``; node edits invalidate their document."""
+    from app.db_models import DocumentNode, Goal, PlanDocument, Policy
+
+    if isinstance(obj, Policy):
+        return (ResponseCache.group("policy", obj.id),)
+    if isinstance(obj, Goal):
+        return (ResponseCache.group("goal", obj.id),)
+    if isinstance(obj, PlanDocument):
+        return (ResponseCache.group("plan_document", obj.id),)
+    if isinstance(obj, DocumentNode):
+        return (ResponseCache.group("plan_document", obj.document_id),)
+    return ()
+
+
+def register_invalidation(cache: ResponseCache, groups_for: Callable[[Any], Iterable[str]]) -> None:
+    """
+    Invalidate cache groups for ORM objects flushed in a session, once it commits.
+
+    ``groups_for(obj)`` maps a new/dirty/deleted instance to the groups it affects.
+    """
+
+    @event.listens_for(Session, "after_flush")
+    def collect(session, flush_context):
+        pending = session.info.setdefault("response_cache_groups", set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            pending.update(groups_for(obj))
+
+    @event.listens_for(Session, "after_commit")
+    def flush_invalidations(session):
+        groups = session.info.pop("response_cache_groups", None)
+        if groups:
+            _schedule(cache.invalidate(*groups))
+
+    @event.listens_for(Session, "after_rollback")
+    def discard(session):
+        session.info.pop("response_cache_groups", None)
+
+
+def _schedule(coro: Awaitable) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(coro)
+        return
+    loop.create_task(coro)
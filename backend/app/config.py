@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # Core DB
@@ -9,10 +10,90 @@ class Settings(BaseSettings):
     database_host: str = "db"
     database_port: int = 5432
     database_name: str = "tpa"
+    database_replica_url: Optional[str] = None  # GET/HEAD requests read from here when set
+
+    # Connection pool (per engine, per worker process)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0  # seconds to wait for a connection before failing
+    db_pool_recycle: int = 1800  # seconds; below typical proxy/firewall idle cut-offs
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 500  # asyncpg prepared statements per connection; 0 behind pgbouncer
+    db_statement_timeout_ms: int = 30000
+    db_job_statement_timeout_ms: int = 3600000  # jobs, bulk loads and maintenance CLIs; 0 disables
+    db_echo: bool = False
 
     # AI / Graph / Vector
     vector_dim: int = 768
     graph_name: str = "default_graph"
+    embedding_backend: str = "local"  # "local" (deterministic hashing) or "openai"
+    embedding_model: str = "text-embedding-3-small"
+    openai_api_key: Optional[str] = None
+    hnsw_ef_search: int = 64  # recall/latency knob for HNSW queries
+    llm_backend: str = "fake"  # "fake" (deterministic, offline) or "openai"
+    llm_model: str = "gpt-4o-mini"
+    llm_fake_latency: float = 0.0  # seconds per fake completion
+    llm_cache_size: int = 2048
+    llm_cache_ttl: int = 86400
+    llm_cache_tier: Optional[str] = None  # None, "disk" or "redis"
+    llm_cache_dir: str = ".cache/llm"
+    report_context_tokens: int = 6000  # prompt budget for retrieved report-drafting context
+    report_context_sections: int = 12  # nearest plan-document chunks considered
+    report_context_precedents: int = 8  # nearest precedents considered, on top of linked ones
+    report_section_tokens: int = 2500  # context budget per officer report section
+    report_section_concurrency: int = 4  # sections generated at once
+    report_auto_refresh: bool = True  # re-render affected sections of non-final reports when inputs change
+    precedent_candidates: int = 200  # per retrieval route (policy bands, text, location) before scoring
+    precedent_weight_policy: float = 0.4
+    precedent_weight_location: float = 0.25
+    precedent_weight_text: float = 0.35
+    precedent_distance_half_life: float = 2000.0  # metres at which the location score is 0.5
+
+    # Caching
+    redis_url: Optional[str] = None
+    response_cache_backend: str = "memory"  # "memory" (per-process LRU) or "redis"
+    response_cache_size: int = 1024  # objects, each with all of its variants
+    response_cache_variants: int = 16  # variants (depth, projection) kept per object, memory backend only
+    response_cache_ttl: int = 3600  # seconds, redis backend only
+
+    # Background jobs
+    job_backend: str = "local"  # "local" (asyncio workers in the API process) or "celery" (needs redis_url)
+    job_workers: int = 4
+    job_queue_size: int = 1000
+    job_ttl: int = 3600  # seconds job state and events are kept after finishing
+    celery_broker_url: Optional[str] = None  # defaults to redis_url
+
+    # Bulk ingestion
+    ingest_batch_size: int = 5000  # rows per COPY + merge round trip (and per commit)
+    ingest_max_rejects: int = 1000  # rejected rows listed in the report; the count is always exact
+
+    # Site/constraint overlay
+    overlay_watermark_overlap: float = 300.0  # seconds re-scanned behind the previous run's watermark
+
+    # Scenario evaluation
+    scenario_frame_ttl: float = 300.0  # seconds a process keeps its columnar site snapshot
+    scenario_state_cache_size: int = 1024  # evaluated scenarios kept per snapshot for incremental variants
+    scenario_pool_workers: Optional[int] = None  # comparison/sweep processes; None = CPU count
+    scenario_pool_threshold: int = 256  # smaller comparisons are evaluated in the API process
+
+    # Policy relationship graph
+    policy_graph_ttl: float = 600.0  # seconds before a full rebuild; link changes are patched in between
+    policy_graph_max_depth: int = 6  # largest k for k-hop neighbourhoods
+    policy_graph_memo_size: int = 4096  # traversal results kept per graph version
+
+    # Policy applicability
+    policy_index_ttl: float = 600.0  # seconds before a full rebuild; policy changes are patched in between
+    policy_applicable_statuses: List[str] = ["Adopted"]  # statuses whose policies apply to sites
+
+    # Streaming export
+    export_batch_rows: int = 1000  # rows per server-side cursor fetch
+    export_chunk_bytes: int = 65536  # response body flushed in chunks of about this size
+    export_statement_timeout_ms: int = 0  # exports outlive db_statement_timeout_ms; 0 disables
+
+    # Instrumentation
+    server_timing: bool = True  # Server-Timing header on every response
+    n_plus_one_threshold: int = 10  # repeats of one statement shape per request before flagging
+    slow_query_ms: float = 500.0
 
     # FastAPI runtime
     environment: str = "development"
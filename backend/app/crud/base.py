@@ -0,0 +1,178 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from geoalchemy2 import Geometry
+from sqlalchemy import JSON, DateTime, cast, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import Uuid
+
+from app.models.pagination import Page
+from app.utils import jsonable, row_to_api, to_snake
+
+
+class InvalidQuery(ValueError):
+    """Malformed cursor, unknown sort key or unknown projection field."""
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    payload = json.dumps([sort, [jsonable(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, List[Any]]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        sort, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as exc:
+        raise InvalidQuery("Malformed cursor") from exc
+    return sort, values
+
+
+def _coerce(column, value: Any) -> Any:
+    """JSON cursor values are strings; bind them with the column's Python type."""
+    if value is None:
+        return None
+    if isinstance(column.type, Uuid):
+        return uuid.UUID(value)
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class BaseCRUD:
+    """
+    Column-projected reads with keyset pagination over a single table.
+
+    Subclasses set ``model`` and may extend ``sort_keys`` (API sort name ->
+    ordered key columns, the last one unique) and ``aliases`` (column ->
+    API field name where the camelCase conversion doesn't line up).
+    """
+
+    model = None
+    sort_keys: Dict[str, Tuple[str, ...]] = {"id": ("id",)}
+    aliases: Dict[str, str] = {}
+    stamp_columns: Tuple[str, ...] = ()  # change whenever the row does; used for ETags
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @property
+    def table(self):
+        return self.model.__table__
+
+    @property
+    def api_columns(self) -> List:
+        """Columns that make up the API representation (excludes ``info={"internal": True}``)."""
+        return [column for column in self.table.columns if not column.info.get("internal")]
+
+    @property
+    def pk(self):
+        return self.model.__mapper__.primary_key[0]
+
+    @staticmethod
+    def read_expression(column):
+        """How a column is selected for the API; geometries come back as GeoJSON."""
+        if isinstance(column.type, Geometry):
+            # A real ::json cast: asyncpg decodes by result type, so a coerced text column would stay a str
+            return cast(func.ST_AsGeoJSON(column, 7), JSON).label(column.key)
+        return column
+
+    def project(self, fields: Optional[Iterable[str]]) -> List:
+        """Resolve API field names to select expressions; the primary key is always selected."""
+        if not fields:
+            return [self.read_expression(column) for column in self.api_columns]
+        by_field = {api: column for column, api in self.aliases.items()}
+        names = [self.pk.key]
+        for field in fields:
+            name = by_field.get(field, to_snake(field))
+            if name not in self.table.c or self.table.c[name].info.get("internal"):
+                raise InvalidQuery(f"Unknown field '{field}' for {self.table.name}")
+            if name not in names:
+                names.append(name)
+        return [self.read_expression(self.table.c[name]) for name in names]
+
+    def to_api(self, row) -> dict:
+        """Row mapping -> camelCase dict for the Pydantic models. Override for per-field shaping."""
+        return row_to_api(row, self.aliases)
+
+    async def get(self, obj_id: Any, fields: Optional[Iterable[str]] = None) -> Optional[dict]:
+        stmt = select(*self.project(fields)).where(self.pk == obj_id)
+        row = (await self.db.execute(stmt)).mappings().first()
+        return self.to_api(row) if row else None
+
+    async def stamp(self, obj_id: Any) -> Optional[str]:
+        """Cheap version marker for a row from ``stamp_columns``, None if the row doesn't exist."""
+        columns = [self.table.c[name] for name in self.stamp_columns] or [self.pk]
+        row = (await self.db.execute(select(*columns).where(self.pk == obj_id))).first()
+        return None if row is None else "|".join(str(jsonable(value)) for value in row)
+
+    async def stream(
+        self,
+        fields: Optional[Iterable[str]] = None,
+        where: Sequence = (),
+        batch_size: int = 1000,
+    ) -> AsyncIterator[dict]:
+        """
+        Every matching row in primary-key order, fetched from a server-side
+        cursor ``batch_size`` rows at a time, so memory stays flat however
+        large the table. The session must stay open until iteration ends.
+        """
+        stmt = select(*self.project(fields)).where(*where).order_by(self.pk).execution_options(yield_per=batch_size)
+        result = await self.db.stream(stmt)
+        async for row in result.mappings():
+            yield self.to_api(row)
+
+    async def list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        fields: Optional[Iterable[str]] = None,
+        sort: str = "id",
+        where: Sequence = (),
+    ) -> Page:
+        """
+        Return one page ordered by ``sort_keys[sort]``, seeking past ``cursor``.
+
+        The seek predicate is a row comparison on the key columns, so each page
+        is an index range scan no matter how deep into the table it starts.
+        Rows whose non-unique sort key is NULL are not part of that ordering.
+        """
+        if sort not in self.sort_keys:
+            raise InvalidQuery(f"Unknown sort '{sort}', expected one of {sorted(self.sort_keys)}")
+        keys = [self.table.c[name] for name in self.sort_keys[sort]]
+        columns = self.project(fields)
+        selected = {column.key for column in columns}
+        stmt = (
+            select(*columns, *[key for key in keys if key.key not in selected])
+            .where(*where, *[key.isnot(None) for key in keys[:-1]])
+            .order_by(*keys)
+            .limit(limit + 1)
+        )
+        if cursor:
+            cursor_sort, values = decode_cursor(cursor)
+            if cursor_sort != sort or len(values) != len(keys):
+                raise InvalidQuery("Cursor does not match the requested sort")
+            try:
+                bound = [_coerce(key, value) for key, value in zip(keys, values)]
+            except (ValueError, TypeError) as exc:
+                raise InvalidQuery("Malformed cursor") from exc
+            stmt = stmt.where(tuple_(*keys) > tuple_(*bound) if len(keys) > 1 else keys[0] > bound[0])
+
+        rows = (await self.db.execute(stmt)).mappings().all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(sort, [rows[-1][key.key] for key in keys])
+        items = [
+            self.to_api({k: v for k, v in row.items() if k in selected})
+            for row in rows
+        ]
+        return Page(
+            items=items,
+            nextCursor=next_cursor,
+            limit=limit,
+            fields=list(fields) if fields else None,
+        )
@@ -0,0 +1,17 @@
+from uuid import UUID
+
+from sqlalchemy import func, select
+
+from app.crud.base import BaseCRUD
+from app.db_models.constraints import Constraint
+from app.db_models.sites import Site
+
+
+class ConstraintCRUD(BaseCRUD):
+    model = Constraint
+
+    @staticmethod
+    def intersecting_site(site_id: UUID):
+        """GiST-indexable filter for constraints whose geometry intersects the site's."""
+        site_geometry = select(Site.coordinates).where(Site.id == site_id).scalar_subquery()
+        return func.ST_Intersects(Constraint.geometry, site_geometry)
@@ -0,0 +1,25 @@
+from sqlalchemy import select
+
+from app.crud.base import BaseCRUD
+from app.db_models.goals import Goal
+from app.db_models.links import GoalPolicy, GoalSite, RelatedGoal
+
+
+class GoalCRUD(BaseCRUD):
+    model = Goal
+    stamp_columns = ("last_modified",)
+
+    @staticmethod
+    def with_site(site_id):
+        """Goals listing ``site_id`` among their contributing sites (via ``goal_sites``)."""
+        return Goal.id.in_(select(GoalSite.goal_id).where(GoalSite.site_id == site_id))
+
+    @staticmethod
+    def with_policy(policy_id):
+        """Goals listing ``policy_id`` among their contributing policies (via ``goal_policies``)."""
+        return Goal.id.in_(select(GoalPolicy.goal_id).where(GoalPolicy.policy_id == policy_id))
+
+    @staticmethod
+    def relating_to(goal_id):
+        """Goals listing ``goal_id`` among their related goals (via ``goal_related_goals``)."""
+        return Goal.id.in_(select(RelatedGoal.goal_id).where(RelatedGoal.related_goal_id == goal_id))
@@ -0,0 +1,8 @@
+from app.crud.base import BaseCRUD
+from app.db_models.officer_reports import OfficerReport
+
+
+class OfficerReportCRUD(BaseCRUD):
+    model = OfficerReport
+    sort_keys = {"id": ("application_id",)}
+    aliases = {"supporting_evidence": "supportingEvidenceLinks"}
@@ -0,0 +1,71 @@
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import literal, select
+
+from app.crud.base import BaseCRUD
+from app.db_models.plan_documents import PlanDocument, DocumentNode
+from app.models.pagination import Page
+
+TREE_COLUMNS = (
+    "id",
+    "parent_id",
+    "title",
+    "type",
+    "reference",
+    "order",
+    "unresolved_issues",
+    "linked_entities",
+    "last_modified",
+    "author",
+)
+
+
+class PlanDocumentCRUD(BaseCRUD):
+    model = PlanDocument
+    stamp_columns = ("revision",)  # trigger-maintained across the document and its nodes
+
+
+class DocumentNodeCRUD(BaseCRUD):
+    model = DocumentNode
+
+    async def list_for_document(self, document_id: UUID, **page) -> Page:
+        """Top-level nodes of a document, paginated like any other list."""
+        return await self.list_page(
+            where=(DocumentNode.document_id == document_id, DocumentNode.parent_id.is_(None)),
+            **page,
+        )
+
+    async def fetch_tree_rows(
+        self,
+        document_id: UUID,
+        root_id: Optional[UUID] = None,
+        max_depth: Optional[int] = None,
+        include_content: bool = True,
+    ) -> List[dict]:
+        """
+        Flat rows for a whole document (or the subtree under ``root_id``) in one
+        recursive CTE, each tagged with its ``depth`` below the starting level.
+
+        Recursion stops at ``max_depth`` so outline views can expand lazily.
+        """
+        nodes = DocumentNode.__table__
+        names = TREE_COLUMNS + (("content",) if include_content else ())
+        columns = [nodes.c[name] for name in names]
+
+        start = nodes.c.parent_id.is_(None) if root_id is None else nodes.c.id == root_id
+        anchor = select(*columns, literal(0).label("depth")).where(
+            nodes.c.document_id == document_id, start
+        )
+        tree = anchor.cte("tree", recursive=True)
+        step = (
+            select(*columns, (tree.c.depth + 1).label("depth"))
+            .join(tree, nodes.c.parent_id == tree.c.id)
+            .where(nodes.c.document_id == document_id)
+        )
+        if max_depth is not None:
+            step = step.where(tree.c.depth < max_depth)
+        tree = tree.union_all(step)
+
+        result = await self.db.execute(select(tree))
+        return [dict(row) for row in result.mappings()]
@@ -0,0 +1,31 @@
+from sqlalchemy import and_, or_, select
+
+from app.crud.base import BaseCRUD
+from app.db_models.links import ApplicationPolicy
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.policies import Policy
+
+
+class ApplicationCRUD(BaseCRUD):
+    model = PlanningApplication
+
+    @staticmethod
+    def citing_policy(policy_id):
+        """
+        Applications whose relevantPolicies cite ``policy_id``, by id, or by
+        the policy's reference where the cited entry carries no usable id.
+        """
+        reference = select(Policy.reference).where(Policy.id == policy_id).scalar_subquery()
+        links = select(ApplicationPolicy.application_id).where(
+            or_(
+                ApplicationPolicy.policy_id == policy_id,
+                and_(ApplicationPolicy.policy_id.is_(None), ApplicationPolicy.policy_reference == reference),
+            )
+        )
+        return PlanningApplication.id.in_(links)
+
+    @staticmethod
+    def citing_reference(reference: str):
+        """Applications whose relevantPolicies cite a policy by ``reference`` (e.g. 'H1')."""
+        links = select(ApplicationPolicy.application_id).where(ApplicationPolicy.policy_reference == reference)
+        return PlanningApplication.id.in_(links)
@@ -0,0 +1,16 @@
+from sqlalchemy import select
+
+from app.crud.base import BaseCRUD
+from app.db_models.links import PolicyLink
+from app.db_models.policies import Policy
+
+
+class PolicyCRUD(BaseCRUD):
+    model = Policy
+    sort_keys = {"id": ("id",), "lastModified": ("last_modified", "id")}
+    stamp_columns = ("last_modified", "version")
+
+    @staticmethod
+    def linking_to(policy_id):
+        """Policies whose linkedPolicies name ``policy_id`` (via ``policy_links``)."""
+        return Policy.id.in_(select(PolicyLink.policy_id).where(PolicyLink.linked_policy_id == policy_id))
@@ -0,0 +1,6 @@
+from app.crud.base import BaseCRUD
+from app.db_models.precedent_cases import PrecedentCase
+
+
+class PrecedentCaseCRUD(BaseCRUD):
+    model = PrecedentCase
@@ -0,0 +1,20 @@
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.crud.base import BaseCRUD
+from app.db_models.links import ScenarioSite
+from app.db_models.scenarios import Scenario
+
+
+class ScenarioCRUD(BaseCRUD):
+    model = Scenario
+    sort_keys = {"id": ("id",), "lastModified": ("last_modified", "id")}
+
+    @staticmethod
+    def with_site(site_id, included: Optional[bool] = None):
+        """Scenarios naming ``site_id`` in includedSiteIds and/or excludedSiteIds (via ``scenario_sites``)."""
+        links = select(ScenarioSite.scenario_id).where(ScenarioSite.site_id == site_id)
+        if included is not None:
+            links = links.where(ScenarioSite.included == included)
+        return Scenario.id.in_(links)
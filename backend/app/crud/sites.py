@@ -0,0 +1,20 @@
+from sqlalchemy import func
+
+from app.crud.base import BaseCRUD
+from app.db_models.sites import Site
+from app.spatial import SRID, BBox, point_as_latlon
+
+
+class SiteCRUD(BaseCRUD):
+    model = Site
+
+    def to_api(self, row) -> dict:
+        item = super().to_api(row)
+        if "coordinates" in item:
+            item["coordinates"] = point_as_latlon(item["coordinates"])
+        return item
+
+    @staticmethod
+    def in_bbox(bbox: BBox):
+        """GiST-indexable filter for sites whose geometry touches ``bbox``."""
+        return func.ST_Intersects(Site.coordinates, func.ST_MakeEnvelope(*bbox, SRID))
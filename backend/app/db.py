@@ -1,16 +1,128 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+"""
+Engines, session factories and the per-request session dependency.
+
+The primary engine takes every write; if ``database_replica_url`` is set a
+second engine serves GET/HEAD requests. Jobs, bulk loads and the maintenance
+CLIs (overlay, goal progress rebuilds, ingest merges, embedding runs) get a
+third engine on the primary with its own pool and a much longer
+``db_job_statement_timeout_ms``, so the request timeout can stay tight. All
+use asyncpg with a bounded prepared-statement cache and a server-side
+``statement_timeout``, and their pools are sized from ``Settings``. Pool
+state (checked out, overflow, checkout wait) is published as Prometheus
+metrics and scraped from /metrics.
+"""
+import time
+from typing import AsyncIterator
+
+from fastapi import Request
+from prometheus_client import Gauge, Histogram
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
 from app.config import settings
 
-engine = create_async_engine(str(settings.database_url), echo=True, future=True)
+READ_METHODS = frozenset({"GET", "HEAD"})
 
-# Use sessionmaker to create AsyncSession factory
-AsyncSessionLocal = sessionmaker(
-    class_=AsyncSession,
-    expire_on_commit=False,
+POOL_CHECKED_OUT = Gauge("tpa_db_pool_checked_out", "Connections currently checked out", ["role"])
+POOL_OVERFLOW = Gauge("tpa_db_pool_overflow", "Connections open beyond pool_size", ["role"])
+POOL_SIZE = Gauge("tpa_db_pool_size", "Idle connections held by the pool", ["role"])
+POOL_WAIT = Histogram(
+    "tpa_db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ["role"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
 )
 
-# Dependency for FastAPI
-async def get_db():
-    async with AsyncSession(bind=engine, expire_on_commit=False) as session:
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a free connection."""
+
+    wait_seconds = POOL_WAIT.labels("primary")
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_seconds = self.wait_seconds
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_seconds.observe(time.perf_counter() - start)
+
+
+def async_url(url: str) -> str:
+    """Point any postgresql URL at the asyncpg driver (compose files use psycopg2 URLs for alembic)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+def build_engine(
+    url: str,
+    role: str = "primary",
+    statement_timeout_ms: int = settings.db_statement_timeout_ms,
+    pool_size: int = settings.db_pool_size,
+) -> AsyncEngine:
+    url = async_url(url)
+    kwargs = {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        kwargs["connect_args"] = {
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "server_settings": {
+                "statement_timeout": str(statement_timeout_ms),
+                "application_name": f"tpa-api-{role}",
+            },
+        }
+    engine = create_async_engine(
+        url,
+        echo=settings.db_echo,
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_use_lifo=True,  # lets surplus connections idle out and be recycled
+        **kwargs,
+    )
+    engine.sync_engine.pool.wait_seconds = POOL_WAIT.labels(role)
+
+    def pool():
+        return engine.sync_engine.pool  # replaced on dispose(), so look it up each scrape
+
+    POOL_CHECKED_OUT.labels(role).set_function(lambda: pool().checkedout())
+    POOL_OVERFLOW.labels(role).set_function(lambda: max(pool().overflow(), 0))
+    POOL_SIZE.labels(role).set_function(lambda: pool().checkedin())
+    return engine
+
+
+engine = build_engine(settings.database_url)
+read_engine = build_engine(settings.database_replica_url, "replica") if settings.database_replica_url else engine
+job_engine = build_engine(settings.database_url, "jobs", settings.db_job_statement_timeout_ms, settings.job_workers)
+
+AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+JobSessionLocal = async_sessionmaker(job_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+# Dependency for FastAPI: reads go to the replica, anything else to the primary
+async def get_db(request: Request) -> AsyncIterator[AsyncSession]:
+    factory = ReadSessionLocal if request.method in READ_METHODS else AsyncSessionLocal
+    async with factory() as session:
+        yield session
+
+
+# For reads that must see the caller's own just-committed writes
+async def get_primary_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+# For long-running writes (bulk loads) that would trip the request statement_timeout
+async def get_job_db() -> AsyncIterator[AsyncSession]:
+    async with JobSessionLocal() as session:
         yield session
@@ -7,7 +7,12 @@ from .scenarios import Scenario
 from .goals import Goal
 from .planning_applications import PlanningApplication
 from .officer_reports import OfficerReport
-from .precedent_cases import PrecedentCase
+from .precedent_cases import PrecedentCase, PrecedentPolicyBand
+from .site_constraints import SiteConstraint, OverlayDirtySite, OverlayRun
+from .embedding_chunks import EmbeddingChunk
+from .goal_progress import SiteProgressFacts, GoalProgress, GoalSnapshot
+from .links import GoalSite, GoalPolicy, RelatedGoal, PolicyLink, ScenarioSite, ApplicationPolicy
+from .plan_versions import DocumentNodeBody, DocumentVersion, DocumentVersionNode
 
 __all__ = [
     "Base",
@@ -21,4 +26,21 @@ __all__ = [
     "PlanningApplication",
     "OfficerReport",
     "PrecedentCase",
+    "PrecedentPolicyBand",
+    "SiteConstraint",
+    "OverlayDirtySite",
+    "OverlayRun",
+    "EmbeddingChunk",
+    "SiteProgressFacts",
+    "GoalProgress",
+    "GoalSnapshot",
+    "GoalSite",
+    "GoalPolicy",
+    "RelatedGoal",
+    "PolicyLink",
+    "ScenarioSite",
+    "ApplicationPolicy",
+    "DocumentNodeBody",
+    "DocumentVersion",
+    "DocumentVersionNode",
 ]
@@ -1,16 +1,22 @@
 import uuid
 
-from sqlalchemy import Column, String, Text
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from geoalchemy2 import Geometry
+from sqlalchemy import Column, String, Text, Index, DateTime
+from sqlalchemy.dialects.postgresql import UUID
 from app.db_models.base import Base
 
 class Constraint(Base):
     __tablename__ = "constraints"
+    __table_args__ = (
+        Index("ix_constraints_geometry", "geometry", postgresql_using="gist"),
+        Index("ix_constraints_geometry_updated_at", "geometry_updated_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     type = Column(String, nullable=False)
     severity = Column(String, nullable=True)
     source_document = Column(String, nullable=True)
-    geometry = Column(JSONB, nullable=True)
+    geometry = Column(Geometry(srid=4326, spatial_index=False), nullable=True)
+    geometry_updated_at = Column(DateTime, nullable=True, info={"internal": True})  # set by trigger
     description = Column(Text, nullable=True)
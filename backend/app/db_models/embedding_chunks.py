@@ -0,0 +1,31 @@
+from datetime import datetime
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from app.config import settings
+from app.db_models.base import Base
+
+# One embedded chunk of a policy, document node, precedent or application.
+# content_hash + encoder let the pipeline skip chunks that haven't changed.
+class EmbeddingChunk(Base):
+    __tablename__ = "embedding_chunks"
+    __table_args__ = (
+        UniqueConstraint("source", "source_id", "chunk_index", name="uq_embedding_chunks_source_chunk"),
+        Index(
+            "ix_embedding_chunks_embedding",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    source = Column(String, nullable=False)  # 'policy' | 'document_node' | 'precedent_case' | 'planning_application'
+    source_id = Column(UUID(as_uuid=True), nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    encoder = Column(String, nullable=False)
+    text = Column(Text, nullable=False)
+    embedding = Column(Vector(settings.vector_dim), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,59 @@
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, Integer, Float, String, DateTime, JSON, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.db_models.base import Base
+
+# Per-site inputs to goal progress (indicative yield, application outcomes), maintained by the goal progress job.
+# No foreign key: a deleted site's facts are kept until the job subtracts them from its goals, then removed.
+class SiteProgressFacts(Base):
+    __tablename__ = "site_progress_facts"
+
+    site_id = Column(UUID(as_uuid=True), primary_key=True)
+    homes = Column(Float, nullable=False, default=0)  # indicative yield
+    jobs = Column(Float, nullable=False, default=0)
+    allocated = Column(Integer, nullable=False, default=0)  # 1 if the site's plan-making status is Allocated
+    allocated_homes = Column(Float, nullable=False, default=0)
+    applications = Column(Integer, nullable=False, default=0)
+    approved = Column(Integer, nullable=False, default=0)
+    refused = Column(Integer, nullable=False, default=0)
+    pending = Column(Integer, nullable=False, default=0)
+    approved_homes = Column(Float, nullable=False, default=0)  # yield of sites with an approved application
+    approved_jobs = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+# Sums of site_progress_facts over each goal's contributing sites, kept current incrementally
+class GoalProgress(Base):
+    __tablename__ = "goal_progress"
+
+    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"), primary_key=True)
+    sites = Column(Integer, nullable=False, default=0)
+    homes = Column(Float, nullable=False, default=0)
+    jobs = Column(Float, nullable=False, default=0)
+    allocated = Column(Integer, nullable=False, default=0)
+    allocated_homes = Column(Float, nullable=False, default=0)
+    applications = Column(Integer, nullable=False, default=0)
+    approved = Column(Integer, nullable=False, default=0)
+    refused = Column(Integer, nullable=False, default=0)
+    pending = Column(Integer, nullable=False, default=0)
+    approved_homes = Column(Float, nullable=False, default=0)
+    approved_jobs = Column(Float, nullable=False, default=0)
+    value = Column(Float, nullable=True)  # the goal's tracked value; see goal_progress_service
+    progress = Column(Float, nullable=True)  # value / target_value
+    status = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+# Time series: one row whenever a goal's value changes, plus periodic snapshots
+class GoalSnapshot(Base):
+    __tablename__ = "goal_snapshots"
+    __table_args__ = (
+        Index("ix_goal_snapshots_goal_taken_at", "goal_id", "taken_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"), nullable=False)
+    taken_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    value = Column(Float, nullable=True)
+    target_value = Column(Float, nullable=True)
+    progress = Column(Float, nullable=True)
+    status = Column(String, nullable=True)
+    aggregates = Column(JSON, nullable=True)  # the goal_progress sums at the time
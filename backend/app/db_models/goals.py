@@ -1,5 +1,6 @@
 import uuid
-from sqlalchemy import Column, String, Float, Text, Enum
+from datetime import datetime
+from sqlalchemy import Column, String, Float, Text, Enum, DateTime
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
 from app.db_models.base import Base
 from app.models.shared import GoalStatus, GoalType
@@ -23,3 +24,4 @@ class Goal(Base):
     contributing_policy_ids = Column(ARRAY(String), nullable=True)
     contributing_site_ids = Column(ARRAY(String), nullable=True)
     related_goal_ids = Column(ARRAY(String), nullable=True)
+    last_modified = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,71 @@
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.db_models.base import Base
+
+# Normalised copies of the id lists held on goals, policies, scenarios and
+# planning applications. Database triggers rebuild an owner's rows whenever
+# its list column changes (see migration 0011), so ORM writes and bulk COPY
+# loads alike keep them current; they exist for reverse lookups and are never
+# written by the application. Targets carry no foreign key: the lists are
+# loose and may name rows that have since been deleted.
+
+class GoalSite(Base):
+    __tablename__ = "goal_sites"
+    __table_args__ = (
+        Index("ix_goal_sites_site_id", "site_id"),
+    )
+
+    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"), primary_key=True)
+    site_id = Column(UUID(as_uuid=True), primary_key=True)  # from goals.contributing_site_ids
+
+class GoalPolicy(Base):
+    __tablename__ = "goal_policies"
+    __table_args__ = (
+        Index("ix_goal_policies_policy_id", "policy_id"),
+    )
+
+    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"), primary_key=True)
+    policy_id = Column(UUID(as_uuid=True), primary_key=True)  # from goals.contributing_policy_ids
+
+class RelatedGoal(Base):
+    __tablename__ = "goal_related_goals"
+    __table_args__ = (
+        Index("ix_goal_related_goals_related_goal_id", "related_goal_id"),
+    )
+
+    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"), primary_key=True)
+    related_goal_id = Column(UUID(as_uuid=True), primary_key=True)  # from goals.related_goal_ids
+
+class PolicyLink(Base):
+    __tablename__ = "policy_links"
+    __table_args__ = (
+        Index("ix_policy_links_linked_policy_id", "linked_policy_id"),
+    )
+
+    policy_id = Column(UUID(as_uuid=True), ForeignKey("policies.id", ondelete="CASCADE"), primary_key=True)
+    linked_policy_id = Column(UUID(as_uuid=True), primary_key=True)  # from policies.linked_policies[].policyId
+    relationship = Column(String, primary_key=True, server_default="")  # '' when the entry names none
+
+class ScenarioSite(Base):
+    __tablename__ = "scenario_sites"
+    __table_args__ = (
+        Index("ix_scenario_sites_site_id", "site_id"),
+    )
+
+    scenario_id = Column(UUID(as_uuid=True), ForeignKey("scenarios.id", ondelete="CASCADE"), primary_key=True)
+    site_id = Column(UUID(as_uuid=True), primary_key=True)
+    included = Column(Boolean, primary_key=True)  # included_site_ids (true) or excluded_site_ids (false)
+
+class ApplicationPolicy(Base):
+    __tablename__ = "application_policies"
+    __table_args__ = (
+        Index("ix_application_policies_policy_id", "policy_id"),
+        Index("ix_application_policies_policy_reference", "policy_reference"),
+    )
+
+    application_id = Column(
+        UUID(as_uuid=True), ForeignKey("planning_applications.id", ondelete="CASCADE"), primary_key=True
+    )
+    position = Column(Integer, primary_key=True)  # index in planning_applications.relevant_policies
+    policy_id = Column(UUID(as_uuid=True), nullable=True)  # null when the entry has no valid id
+    policy_reference = Column(String, nullable=True)
@@ -1,7 +1,9 @@
 import uuid
-from sqlalchemy import Column, String, Text, ForeignKey, Enum, JSON
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import BigInteger, Column, String, Text, ForeignKey, Enum, JSON, Index, Computed
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import relationship, backref
+from app.config import settings
 from app.db_models.base import Base
 from app.models.shared import DocumentNodeTypeEnum as DocumentNodeType
 
@@ -17,12 +19,25 @@ class PlanDocument(Base):
     linked_entities = Column(JSON, nullable=True)
     last_modified = Column(String, nullable=True)
     author = Column(String, nullable=True)
+    # Bumped by triggers on any write to the document or its nodes (migration 0015); the ETag stamp
+    revision = Column(BigInteger, nullable=False, server_default="0", info={"internal": True})
 
     # relationship to nodes
     root_nodes = relationship("DocumentNode", back_populates="document")
 
 class DocumentNode(Base):
     __tablename__ = "document_nodes"
+    __table_args__ = (
+        Index("ix_document_nodes_document_parent_id", "document_id", "parent_id", "id"),
+        Index("ix_document_nodes_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_document_nodes_embedding",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     document_id = Column(
@@ -41,5 +56,17 @@ class DocumentNode(Base):
     last_modified = Column(String, nullable=True)
     author = Column(String, nullable=True)
 
+    # Weighted full-text document: A = reference/title, B = content
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(reference, '') || ' ' || coalesce(title, '')), 'A')"
+            " || setweight(to_tsvector('english', coalesce(content, '')), 'B')",
+            persisted=True,
+        ),
+        info={"internal": True},
+    )
+    embedding = Column(Vector(settings.vector_dim), nullable=True, info={"internal": True})
+
     document = relationship("PlanDocument", back_populates="root_nodes")
-    children = relationship("DocumentNode", backref="parent", remote_side=[id])
+    children = relationship("DocumentNode", backref=backref("parent", remote_side=[id]))
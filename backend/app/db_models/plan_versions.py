@@ -0,0 +1,45 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, ForeignKeyConstraint, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.db_models.base import Base
+
+# Content-addressed node bodies (sha256 of the canonical JSON), shared by every version that has them
+class DocumentNodeBody(Base):
+    __tablename__ = "document_node_bodies"
+
+    hash = Column(String(64), primary_key=True)
+    body = Column(JSON, nullable=False)  # title, type, reference, content, unresolved_issues, linked_entities, author
+
+# One committed version of a plan document (e.g. Regulation 18, Regulation 19)
+class DocumentVersion(Base):
+    __tablename__ = "document_versions"
+
+    document_id = Column(
+        UUID(as_uuid=True), ForeignKey("plan_documents.id", ondelete="CASCADE"), primary_key=True
+    )
+    number = Column(Integer, primary_key=True)  # 1, 2, ... per document
+    label = Column(String, nullable=True)
+    author = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    meta = Column(JSON, nullable=True)  # the document's name/type/version/status when committed
+    node_count = Column(Integer, nullable=False, default=0)
+    changed_nodes = Column(Integer, nullable=False, default=0)  # delta rows written for this version
+
+# Node-level delta: a node's placement and body as of ``number``; body_hash NULL means removed
+class DocumentVersionNode(Base):
+    __tablename__ = "document_version_nodes"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["document_id", "number"],
+            ["document_versions.document_id", "document_versions.number"],
+            ondelete="CASCADE",
+        ),
+        Index("ix_document_version_nodes_node_number", "document_id", "node_id", "number"),
+    )
+
+    document_id = Column(UUID(as_uuid=True), primary_key=True)
+    number = Column(Integer, primary_key=True)
+    node_id = Column(UUID(as_uuid=True), primary_key=True)
+    parent_id = Column(UUID(as_uuid=True), nullable=True)
+    order = Column(String, nullable=True)
+    body_hash = Column(String(64), ForeignKey("document_node_bodies.hash"), nullable=True)
@@ -1,13 +1,18 @@
 import uuid
+from pgvector.sqlalchemy import Vector
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Enum
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from app.config import settings
 from app.db_models.base import Base
 from app.models.shared import ApplicationType, ApplicationStatus
 
 class PlanningApplication(Base):
     __tablename__ = "planning_applications"
+    __table_args__ = (
+        Index("uq_planning_applications_reference_number", "reference_number", unique=True),  # ingest upsert key
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     reference_number = Column(String, nullable=False)
@@ -32,6 +37,9 @@ class PlanningApplication(Base):
     trade_off_analysis = Column(JSON, nullable=True)
     linked_precedents = Column(JSON, nullable=True)
 
+    # query vector for precedent similarity (proposal, site description, address)
+    embedding = Column(Vector(settings.vector_dim), nullable=True, info={"internal": True})
+
     # relationships
     officer_report = relationship("OfficerReport", back_populates="application")
     precedents = relationship("PrecedentCase", back_populates="application")
@@ -1,13 +1,26 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, Text, Enum, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSON
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Column, String, Text, Enum, DateTime, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSON, TSVECTOR
+from app.config import settings
 from app.db_models.base import Base
 from app.models.shared import PolicyStatus, PolicyType
 
 class Policy(Base):
     __tablename__ = "policies"
+    __table_args__ = (
+        Index("ix_policies_last_modified_id", "last_modified", "id"),  # keyset sort=lastModified
+        Index("ix_policies_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_policies_embedding",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     reference = Column(String, nullable=False)
@@ -16,7 +29,7 @@ class Policy(Base):
     status = Column(Enum(PolicyStatus), nullable=False)
     type = Column(Enum(PolicyType), nullable=False)
     version = Column(String, nullable=True)
-    last_modified = Column(DateTime, default=datetime.utcnow)
+    last_modified = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     author = Column(String, nullable=True)
     author_notes = Column(Text, nullable=True)
     supporting_text = Column(Text, nullable=True)
@@ -32,3 +45,16 @@ class Policy(Base):
     linked_policies = Column(JSON, nullable=True)  # List of {policyId, policyReference, relationship, summary}
     strategic_goal_alignments = Column(JSON, nullable=True)  # List of {goalId, goalName, alignment, notes}
     ai_guidance = Column(JSON, nullable=True)  # List of {type, message, source}
+
+    # Weighted full-text document: A = reference/title/keywords, B = wording, C = supporting text
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(reference, '') || ' ' || coalesce(title, '') || ' ' || tpa_array_to_text(keywords::text[])), 'A')"
+            " || setweight(to_tsvector('english', coalesce(wording, '')), 'B')"
+            " || setweight(to_tsvector('english', coalesce(supporting_text, '')), 'C')",
+            persisted=True,
+        ),
+        info={"internal": True},
+    )
+    embedding = Column(Vector(settings.vector_dim), nullable=True, info={"internal": True})
@@ -1,13 +1,27 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Text, Enum
+from geoalchemy2 import Geometry
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Boolean, Column, String, DateTime, ForeignKey, JSON, Text, Enum, Index, Integer, SmallInteger
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 from sqlalchemy.orm import relationship
+from app.config import settings
 from app.db_models.base import Base
 from app.models.shared import PrecedentDecisionOutcome
 
 class PrecedentCase(Base):
     __tablename__ = "precedent_cases"
+    __table_args__ = (
+        Index(
+            "ix_precedent_cases_embedding",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+        Index("uq_precedent_cases_case_reference", "case_reference", unique=True),  # ingest upsert key
+        Index("ix_precedent_cases_location", "location", postgresql_using="gist"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     application_id = Column(
@@ -25,7 +39,27 @@ class PrecedentCase(Base):
     decision_extract_link = Column(String, nullable=True)
     relevance_summary = Column(Text, nullable=True)
     similarity_criteria = Column(JSON, nullable=True)  # {site, policyOverlap}
+    embedding = Column(Vector(settings.vector_dim), nullable=True, info={"internal": True})
+    # Where the decision applies; defaults to the linked application's site and
+    # follows it while location_derived (triggers, see migrations 0013 and 0018)
+    location = Column(Geometry("POINT", srid=4326, spatial_index=False), nullable=True, info={"internal": True})
+    location_derived = Column(Boolean, nullable=False, server_default="false", info={"internal": True})
 
     # All relevant fields for frontend parity are present as JSON or appropriate types.
 
     application = relationship("PlanningApplication", back_populates="precedents")
+
+# MinHash-LSH band hashes of each precedent's cited policy set, maintained by a
+# trigger on key_policies_cited (migration 0013). Precedents sharing a bucket
+# in any band are candidates for policy overlap.
+class PrecedentPolicyBand(Base):
+    __tablename__ = "precedent_policy_bands"
+    __table_args__ = (
+        Index("ix_precedent_policy_bands_band_bucket", "band", "bucket"),
+    )
+
+    precedent_id = Column(
+        UUID(as_uuid=True), ForeignKey("precedent_cases.id", ondelete="CASCADE"), primary_key=True
+    )
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(Integer, nullable=False)
@@ -1,11 +1,14 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, JSON
+from sqlalchemy import Column, String, Text, DateTime, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from app.db_models.base import Base
 
 class Scenario(Base):
     __tablename__ = "scenarios"
+    __table_args__ = (
+        Index("ix_scenarios_last_modified_id", "last_modified", "id"),  # keyset sort=lastModified
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
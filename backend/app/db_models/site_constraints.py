@@ -0,0 +1,41 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, DateTime, Boolean, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.db_models.base import Base
+
+# Precomputed site/constraint overlay, maintained by the overlay job
+class SiteConstraint(Base):
+    __tablename__ = "site_constraints"
+    __table_args__ = (
+        Index("ix_site_constraints_constraint_id", "constraint_id"),
+    )
+
+    site_id = Column(UUID(as_uuid=True), ForeignKey("sites.id", ondelete="CASCADE"), primary_key=True)
+    constraint_id = Column(
+        UUID(as_uuid=True), ForeignKey("constraints.id", ondelete="CASCADE"), primary_key=True
+    )
+    overlap_area_ha = Column(Float, nullable=True)
+    overlap_percent = Column(Float, nullable=True)  # of the site's area; 100 for point sites
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+# Sites whose constraint copies are stale without a geometry change (a constraint
+# deleted or re-described), queued by triggers on constraints (migration 0019)
+# and drained by the next overlay run
+class OverlayDirtySite(Base):
+    __tablename__ = "overlay_dirty_sites"
+
+    site_id = Column(UUID(as_uuid=True), primary_key=True)
+    marked_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+# One overlay job run; watermark (the newest geometry_updated_at it read) seeds the next incremental run
+class OverlayRun(Base):
+    __tablename__ = "overlay_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    watermark = Column(DateTime, nullable=True)
+    full = Column(Boolean, nullable=False, default=False)
+    sites_changed = Column(Integer, nullable=True)
+    constraints_changed = Column(Integer, nullable=True)
+    pairs_written = Column(Integer, nullable=True)
@@ -1,19 +1,26 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, Float, DateTime, JSON
+from geoalchemy2 import Geometry
+from sqlalchemy import Column, String, Float, DateTime, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from app.db_models.base import Base
 
 class Site(Base):
     __tablename__ = "sites"
+    __table_args__ = (
+        Index("ix_sites_coordinates", "coordinates", postgresql_using="gist"),
+        Index("ix_sites_geometry_updated_at", "geometry_updated_at"),
+        Index("uq_sites_uprn", "uprn", unique=True, postgresql_where=text("uprn IS NOT NULL")),  # ingest upsert key
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=True)
     address = Column(String, nullable=True)
     uprn = Column(String, nullable=True)
     lpa_code = Column(String, nullable=True)
-    coordinates = Column(JSON, nullable=True)      # store {lat, lon} or GeoJSON
+    coordinates = Column(Geometry(srid=4326, spatial_index=False), nullable=True)  # point or boundary
+    geometry_updated_at = Column(DateTime, nullable=True, info={"internal": True})  # set by trigger
     area_ha = Column(Float, nullable=True)
     parish = Column(String, nullable=True)
     plan_making_status = Column(String, nullable=True)
@@ -0,0 +1,232 @@
+"""
+Per-request database and serialisation instrumentation.
+
+``InstrumentationMiddleware`` opens a ``RequestStats`` for every HTTP request
+and SQLAlchemy cursor events (registered once on the ``Engine`` class, so the
+primary and replica engines are both covered) add each statement's time to
+it. ``InstrumentedRoute`` records the matched route template and how long
+FastAPI spent validating and rendering the endpoint's return value.
+
+Each response carries a ``Server-Timing`` header (db, serialize, app), and the
+same numbers feed Prometheus histograms labelled by method and route. A
+request that runs the same statement shape more than ``n_plus_one_threshold``
+times is counted and logged as a likely N+1.
+"""
+import asyncio
+import functools
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from prometheus_client import Counter as PromCounter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger("app.instrumentation")
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_SECONDS = Histogram("tpa_request_seconds", "Wall time per request", ["method", "route"], buckets=_LATENCY_BUCKETS)
+REQUEST_DB_SECONDS = Histogram(
+    "tpa_request_db_seconds", "Database time per request", ["method", "route"], buckets=_LATENCY_BUCKETS
+)
+REQUEST_SERIALIZE_SECONDS = Histogram(
+    "tpa_request_serialize_seconds", "Response validation and rendering time", ["method", "route"], buckets=_LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    "tpa_request_queries", "Statements executed per request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+SLOWEST_QUERY_SECONDS = Histogram(
+    "tpa_request_slowest_query_seconds", "Slowest statement per request", ["method", "route"], buckets=_LATENCY_BUCKETS
+)
+N_PLUS_ONE = PromCounter("tpa_n_plus_one_total", "Requests that repeated one statement shape too often", ["method", "route"])
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|%\(\w+\)s|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement with literals, placeholders and IN-lists collapsed, so repeats with new ids compare equal."""
+    shape = _LITERALS.sub("?", statement)
+    shape = _LISTS.sub("(?)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+@dataclass
+class RequestStats:
+    started: float = field(default_factory=time.perf_counter)
+    route: Optional[str] = None
+    queries: int = 0
+    db_seconds: float = 0.0
+    slowest: Tuple[float, str] = (0.0, "")
+    serialize_started: Optional[float] = None  # set when the endpoint returns
+    serialize_seconds: Optional[float] = None  # None unless serialisation finished
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest[0]:
+            self.slowest = (seconds, statement)
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes run more than ``threshold`` times, most repeated first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def server_timing(self, total: float) -> str:
+        parts = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"']
+        if self.serialize_seconds is not None:
+            parts.append(f"serialize;dur={self.serialize_seconds * 1000:.1f}")
+        parts.append(f"app;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+    if context is not None:
+        context.tpa_timed = True
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.tpa_timed = False
+    started = conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    """
+    A statement that fails (a timeout, a constraint violation) never reaches
+    after_cursor_execute; pop its start time here, or the connection carries it
+    back to the pool. Errors raised while fetching rows come through here too,
+    after the statement was already popped, hence the flag on the execution context.
+    """
+    context = exception_context.execution_context
+    if context is None or not getattr(context, "tpa_timed", False):
+        return
+    context.tpa_timed = False
+    started = exception_context.connection.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(exception_context.statement, time.perf_counter() - started)
+
+
+def instrument_engines() -> None:
+    """Time every statement on every engine; safe to call more than once."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+def _mark_serialize_start() -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.serialize_started = time.perf_counter()
+
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute that notes its path template and times response serialisation."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # The endpoint returning marks the start of serialisation; keep sync endpoints sync
+        # so FastAPI still runs them in its threadpool.
+        if asyncio.iscoroutinefunction(endpoint):
+
+            @functools.wraps(endpoint)
+            async def timed(*args, **kw):
+                result = await endpoint(*args, **kw)
+                _mark_serialize_start()
+                return result
+
+        else:
+
+            @functools.wraps(endpoint)
+            def timed(*args, **kw):
+                result = endpoint(*args, **kw)
+                _mark_serialize_start()
+                return result
+
+        super().__init__(path, timed, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        route = self.path_format
+
+        async def instrumented(request):
+            stats = _current.get()
+            if stats is not None:
+                stats.route = route
+            response = await handler(request)
+            # Not reached when validation or rendering raises, so a failed serialisation is never observed
+            if stats is not None and stats.serialize_started is not None:
+                stats.serialize_seconds = time.perf_counter() - stats.serialize_started
+            return response
+
+        return instrumented
+
+
+class InstrumentationMiddleware:
+    def __init__(self, app, n_plus_one_threshold: int = settings.n_plus_one_threshold):
+        self.app = app
+        self.threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.server_timing:
+                timing = stats.server_timing(time.perf_counter() - stats.started)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.observe(scope["method"], stats)
+
+    def observe(self, method: str, stats: RequestStats) -> None:
+        if stats.route is None:
+            return  # unmatched paths, /metrics and friends would only add unbounded label values
+        labels = (method, stats.route)
+        REQUEST_SECONDS.labels(*labels).observe(time.perf_counter() - stats.started)
+        REQUEST_DB_SECONDS.labels(*labels).observe(stats.db_seconds)
+        if stats.serialize_seconds is not None:
+            REQUEST_SERIALIZE_SECONDS.labels(*labels).observe(stats.serialize_seconds)
+        REQUEST_QUERIES.labels(*labels).observe(stats.queries)
+        SLOWEST_QUERY_SECONDS.labels(*labels).observe(stats.slowest[0])
+
+        repeated = stats.repeated(self.threshold)
+        if repeated:
+            N_PLUS_ONE.labels(*labels).inc()
+            shape, count = repeated[0]
+            logger.warning("Possible N+1 on %s %s: %d x %s", method, stats.route, count, shape[:300])
+        if stats.slowest[0] * 1000 >= settings.slow_query_ms:
+            logger.warning(
+                "Slow statement on %s %s (%.0f ms): %s",
+                method, stats.route, stats.slowest[0] * 1000, _SPACE.sub(" ", stats.slowest[1])[:300],
+            )
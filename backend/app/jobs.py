@@ -0,0 +1,321 @@
+"""
+Background jobs for slow work, chiefly the /ai generations.
+
+A POST enqueues a job and returns its id straight away; handlers run outside
+the request, so no uvicorn worker or DB session is held while a model
+generates. Handlers are registered per kind with ``@job_handler("kind")`` and
+receive the job's params plus a ``JobContext`` for emitting partial output.
+
+Two backends, chosen by ``Settings.job_backend``:
+
+* ``local`` (default): an in-memory store and an asyncio worker pool inside
+  the API process, started and stopped with the app's lifespan.
+* ``celery``: job state and events live in Redis, so any API worker can
+  report on or stream any job, and ``celery_app`` runs the handlers
+  (``celery -A app.main.celery_app worker``).
+
+Every job keeps an ordered event log (``status``, ``delta``, ``progress``) that
+the SSE endpoint replays from ``Last-Event-ID`` and then follows live.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.config import settings
+from app.models.ai import JobStatus
+
+logger = logging.getLogger("app.jobs")
+
+TERMINAL = frozenset({JobStatus.Succeeded.value, JobStatus.Failed.value})
+RUN_JOB_TASK = "tpa.run_job"
+
+Event = Tuple[str, str, Any]  # (event id, event name, data)
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+@dataclass
+class JobContext:
+    job_id: str
+    store: "MemoryJobStore | RedisJobStore"
+
+    async def emit(self, event: str, data: Any) -> None:
+        await self.store.emit(self.job_id, event, data)
+
+    async def delta(self, text: str, section: Optional[str] = None) -> None:
+        """Partial output, e.g. the next tokens of a report section."""
+        await self.emit("delta", {"text": text, "section": section})
+
+    async def progress(self, done: int, total: int, message: Optional[str] = None) -> None:
+        await self.emit("progress", {"done": done, "total": total, "message": message})
+
+
+Handler = Callable[[dict, JobContext], Awaitable[Any]]
+HANDLERS: Dict[str, Handler] = {}
+
+
+def job_handler(kind: str) -> Callable[[Handler], Handler]:
+    def register(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _new_job(kind: str) -> dict:
+    return {"id": uuid.uuid4().hex, "kind": kind, "status": JobStatus.Queued.value, "createdAt": _now()}
+
+
+class MemoryJobStore:
+    """Jobs and their event logs in this process; finished jobs are dropped after ``ttl`` seconds."""
+
+    def __init__(self, ttl: int = 3600):
+        self.ttl = ttl
+        self.jobs: Dict[str, dict] = {}
+        self.params: Dict[str, dict] = {}
+        self.events: Dict[str, List[Tuple[str, Any]]] = {}
+        self.signals: Dict[str, asyncio.Event] = {}
+        self.finished: Dict[str, float] = {}
+
+    async def create(self, kind: str, params: dict) -> dict:
+        self._prune()
+        job = _new_job(kind)
+        self.jobs[job["id"]] = job
+        self.params[job["id"]] = params
+        self.events[job["id"]] = []
+        self.signals[job["id"]] = asyncio.Event()
+        await self.emit(job["id"], "status", dict(job))
+        return dict(job)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def get_params(self, job_id: str) -> Optional[dict]:
+        return self.params.get(job_id)
+
+    async def update(self, job_id: str, **fields) -> None:
+        job = self.jobs[job_id]
+        job.update(fields)
+        if job["status"] in TERMINAL:
+            self.finished[job_id] = time.monotonic()
+        await self.emit(job_id, "status", {k: v for k, v in job.items() if k != "result"})
+
+    async def emit(self, job_id: str, event: str, data: Any) -> None:
+        self.events[job_id].append((event, data))
+        # Wake every follower at once, then arm a fresh event for the next emit
+        signal, self.signals[job_id] = self.signals[job_id], asyncio.Event()
+        signal.set()
+
+    async def follow(self, job_id: str, after: str = "0") -> AsyncIterator[Event]:
+        position = int(after) if after.isdigit() else 0
+        while job_id in self.jobs:
+            events, signal = self.events[job_id], self.signals[job_id]
+            while position < len(events):
+                event, data = events[position]
+                position += 1
+                yield str(position), event, data
+            if self.jobs[job_id]["status"] in TERMINAL:
+                return
+            await signal.wait()
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        for job_id in [job_id for job_id, at in self.finished.items() if at < cutoff]:
+            for table in (self.jobs, self.params, self.events, self.signals, self.finished):
+                table.pop(job_id, None)
+
+
+class RedisJobStore:
+    """Job hash plus a Redis stream of events per job, both expiring after ``ttl`` seconds."""
+
+    def __init__(self, url: str, ttl: int = 3600, prefix: str = "tpa:job:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _keys(self, job_id: str) -> Tuple[str, str]:
+        return self.prefix + job_id, self.prefix + job_id + ":events"
+
+    async def create(self, kind: str, params: dict) -> dict:
+        job = _new_job(kind)
+        key, _ = self._keys(job["id"])
+        await self.client.hset(key, mapping={"job": json.dumps(job), "params": json.dumps(params)})
+        await self.client.expire(key, self.ttl)
+        await self.emit(job["id"], "status", job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        raw = await self.client.hget(self._keys(job_id)[0], "job")
+        return json.loads(raw) if raw else None
+
+    async def get_params(self, job_id: str) -> Optional[dict]:
+        raw = await self.client.hget(self._keys(job_id)[0], "params")
+        return json.loads(raw) if raw else None
+
+    async def update(self, job_id: str, **fields) -> None:
+        job = await self.get(job_id) or {}
+        job.update(fields)
+        key, _ = self._keys(job_id)
+        await self.client.hset(key, "job", json.dumps(job))
+        await self.client.expire(key, self.ttl)
+        await self.emit(job_id, "status", {k: v for k, v in job.items() if k != "result"})
+
+    async def emit(self, job_id: str, event: str, data: Any) -> None:
+        _, stream = self._keys(job_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xadd(stream, {"event": event, "data": json.dumps(data)})
+            pipe.expire(stream, self.ttl)
+            await pipe.execute()
+
+    async def follow(self, job_id: str, after: str = "0") -> AsyncIterator[Event]:
+        _, stream = self._keys(job_id)
+        position = after or "0"
+        while True:
+            batches = await self.client.xread({stream: position}, block=15000, count=100)
+            if not batches:
+                job = await self.get(job_id)
+                if job is None or job["status"] in TERMINAL:
+                    return
+                continue
+            for event_id, fields in batches[0][1]:
+                position = event_id.decode()
+                event, data = fields[b"event"].decode(), json.loads(fields[b"data"])
+                yield position, event, data
+                if event == "status" and data.get("status") in TERMINAL:
+                    return
+
+
+async def execute(store, job_id: str) -> None:
+    """Run one queued job to completion, recording its result or error."""
+    job, params = await store.get(job_id), await store.get_params(job_id)
+    if job is None or job["status"] != JobStatus.Queued.value:
+        return  # expired, or already picked up by a redelivery
+    await store.update(job_id, status=JobStatus.Running.value, startedAt=_now())
+    try:
+        handler = HANDLERS[job["kind"]]
+        result = await handler(params or {}, JobContext(job_id, store))
+        if isinstance(result, BaseModel):
+            result = result.model_dump(mode="json")
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job_id, job["kind"])
+        await store.update(job_id, status=JobStatus.Failed.value, error=str(exc) or type(exc).__name__, finishedAt=_now())
+    else:
+        await store.update(job_id, status=JobStatus.Succeeded.value, result=result, finishedAt=_now())
+
+
+class LocalJobRunner:
+    """Fixed pool of asyncio workers draining a bounded in-process queue."""
+
+    def __init__(self, store, workers: int = 4, queue_size: int = 1000):
+        self.store = store
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.queue_size)
+            self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.queue, self.tasks = None, []
+
+    async def submit(self, kind: str, params: dict) -> dict:
+        await self.start()
+        if self.queue.full():
+            raise JobQueueFull(f"{self.queue_size} jobs already queued")
+        job = await self.store.create(kind, params)
+        self.queue.put_nowait(job["id"])
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await execute(self.store, job_id)
+            finally:
+                self.queue.task_done()
+
+
+class CeleryJobRunner:
+    """Records the job in Redis and hands its id to a Celery worker."""
+
+    def __init__(self, store, celery):
+        self.store = store
+        self.celery = celery
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def submit(self, kind: str, params: dict) -> dict:
+        job = await self.store.create(kind, params)
+        await asyncio.to_thread(self.celery.send_task, RUN_JOB_TASK, args=[job["id"]])
+        return job
+
+
+def build_job_store():
+    if settings.job_backend == "celery":
+        if not settings.redis_url:
+            raise RuntimeError("job_backend=celery needs redis_url for job state")
+        return RedisJobStore(settings.redis_url, ttl=settings.job_ttl)
+    return MemoryJobStore(ttl=settings.job_ttl)
+
+
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def build_celery_app(store):
+    """The Celery app for ``job_backend=celery``; None when Celery isn't installed."""
+    try:
+        from celery import Celery
+    except ImportError:
+        return None
+
+    celery = Celery("tpa", broker=settings.celery_broker_url or settings.redis_url or "redis://localhost:6379/0")
+    celery.conf.update(task_acks_late=True, worker_prefetch_multiplier=1)
+
+    @celery.task(name=RUN_JOB_TASK)
+    def run_job(job_id: str) -> None:
+        # One loop per worker process, so pooled DB and Redis connections outlive a task
+        global _worker_loop
+        if _worker_loop is None:
+            _worker_loop = asyncio.new_event_loop()
+        _worker_loop.run_until_complete(execute(store, job_id))
+
+    return celery
+
+
+def build_job_runner(store, celery):
+    if settings.job_backend == "celery":
+        if celery is None:
+            raise RuntimeError("job_backend=celery but celery is not installed")
+        return CeleryJobRunner(store, celery)
+    return LocalJobRunner(store, workers=settings.job_workers, queue_size=settings.job_queue_size)
+
+
+job_store = build_job_store()
+celery_app = build_celery_app(job_store)
+job_runner = build_job_runner(job_store, celery_app)
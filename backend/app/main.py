@@ -1,7 +1,11 @@
 # app/main.py
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from prometheus_client import make_asgi_app
 
 from app.api import (
     policies,
@@ -14,12 +18,31 @@ from app.api import (
     officer_reports,
     precedent_cases,
     ai,
+    ingest,
 )
+from app.cache import orm_groups, register_invalidation, response_cache
+from app.crud.base import InvalidQuery
+from app.jobs import celery_app, job_runner  # noqa: F401  celery_app is the worker entry point
+from app.instrumentation import InstrumentationMiddleware, instrument_engines
+from app.services.goal_progress_service import register_progress_tracking
+from app.services.officer_reports_service import register_report_refresh
+from app.services.policy_applicability import policy_index, register_index_invalidation
+from app.services.policy_graph import policy_graph, register_graph_invalidation
+from app.services.scenarios_service import frame_cache, register_frame_invalidation, scenario_pool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await job_runner.start()
+    yield
+    await job_runner.stop()
+    scenario_pool.shutdown()
+
 
 app = FastAPI(
     title="The Planner's Assistant v2 API",
     version="0.0.1",
     description="API for The Planner's Assistant v2 application, covering both Plan-Making and Development Management workspaces.",
+    lifespan=lifespan,
 )
 
 # CORS middleware for frontend integration (adjust origins in production)
@@ -31,6 +54,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request query count, DB time and serialisation time (Server-Timing + Prometheus)
+instrument_engines()
+app.add_middleware(InstrumentationMiddleware)
+
+# Prometheus scrape endpoint (pool gauges and checkout wait histogram)
+app.mount("/metrics", make_asgi_app())
+
+# Drop cached responses for objects written through the ORM once their transaction commits
+register_invalidation(response_cache, orm_groups)
+register_frame_invalidation(frame_cache)
+register_graph_invalidation(policy_graph)
+register_index_invalidation(policy_index)
+# Queue incremental goal progress updates for committed site, application and goal changes
+register_progress_tracking(job_runner.submit)
+# Queue re-rendering of the report sections affected by committed application and policy changes
+register_report_refresh(job_runner.submit)
+
+@app.exception_handler(InvalidQuery)
+async def invalid_query_handler(request: Request, exc: InvalidQuery):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 # Mount routers for each resource
 app.include_router(policies.router, prefix="/policies", tags=["Policies"])
 app.include_router(sites.router, prefix="/sites", tags=["Sites"])
@@ -42,3 +86,4 @@ app.include_router(planning_applications.router, prefix="/planning-applications"
 app.include_router(officer_reports.router, prefix="/officer-reports", tags=["OfficerReports"])
 app.include_router(precedent_cases.router, prefix="/precedent-cases", tags=["PrecedentCases"])
 app.include_router(ai.router, prefix="/ai", tags=["AI"])
+app.include_router(ingest.router, prefix="/ingest", tags=["Ingest"])
@@ -0,0 +1,55 @@
+from enum import Enum
+from typing import Any, List, Optional
+from pydantic import BaseModel
+
+from app.models.officer_reports import OfficerReport
+from app.models.policies import AIGuidance
+
+class GeneratePolicyGuidanceRequest(BaseModel):
+    policyText: str
+    context: Optional[dict] = None
+
+class GeneratePolicyGuidanceResponse(BaseModel):
+    suggestions: List[AIGuidance]
+
+class GenerateSiteJustificationRequest(BaseModel):
+    applicationId: str
+
+class GenerateSiteJustificationResponse(BaseModel):
+    justification: str
+
+class GenerateScenarioCommentaryRequest(BaseModel):
+    scenarioId: str
+
+class GenerateScenarioCommentaryResponse(BaseModel):
+    commentary: str
+
+class GenerateReportDraftRequest(BaseModel):
+    applicationId: str
+
+class GenerateReportDraftResponse(BaseModel):
+    report: OfficerReport
+
+class JobStatus(str, Enum):
+    Queued = 'Queued'
+    Running = 'Running'
+    Succeeded = 'Succeeded'
+    Failed = 'Failed'
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    createdAt: str
+    startedAt: Optional[str] = None
+    finishedAt: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[Any] = None
+
+class JobAccepted(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    statusUrl: str
+    resultUrl: str
+    eventsUrl: str
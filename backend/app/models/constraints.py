@@ -9,3 +9,16 @@ class Constraint(BaseModel):
     sourceDocument: Optional[str] = None
     geometry: Optional[dict] = None
     description: Optional[str] = None
+    overlapAreaHa: Optional[float] = None  # set when listed against a site by the overlay job
+    overlapPercent: Optional[float] = None
+
+class OverlayRunRequest(BaseModel):
+    full: bool = False  # rebuild every pair instead of only changed geometry
+
+class OverlayRunResult(BaseModel):
+    full: bool
+    since: Optional[str] = None  # watermark of the previous run, None for full rebuilds
+    sitesChanged: Optional[int] = None
+    constraintsChanged: Optional[int] = None
+    sitesRefreshed: int
+    pairsWritten: int
@@ -19,3 +19,43 @@ class Goal(BaseModel):
     relatedGoalIds: Optional[List[str]] = None
     risks: Optional[List[str]] = None
     notes: Optional[str] = None
+    lastModified: Optional[str] = None
+
+class GoalProgress(BaseModel):
+    goalId: str
+    name: str
+    targetMetric: str
+    targetValue: Optional[float] = None
+    value: Optional[float] = None  # approved homes/jobs for housing/employment goals, currentValue otherwise
+    progress: Optional[float] = None  # value / targetValue
+    status: Optional[str] = None
+    sites: int = 0  # contributing sites
+    homes: float = 0  # indicative yield of contributing sites
+    jobs: float = 0
+    allocated: int = 0
+    allocatedHomes: float = 0
+    applications: int = 0
+    approved: int = 0
+    refused: int = 0
+    pending: int = 0
+    approvedHomes: float = 0
+    approvedJobs: float = 0
+    updatedAt: Optional[str] = None
+
+class GoalProgressPoint(BaseModel):
+    takenAt: str
+    value: Optional[float] = None
+    targetValue: Optional[float] = None
+    progress: Optional[float] = None
+    status: Optional[str] = None
+
+class GoalProgressHistory(BaseModel):
+    goalId: str
+    bucket: Optional[str] = None  # 'day' | 'week' | 'month'; last snapshot per bucket
+    points: List[GoalProgressPoint]
+
+class GoalProgressRefresh(BaseModel):
+    full: bool
+    sitesRefreshed: int
+    goalsUpdated: int
+    snapshotsWritten: int
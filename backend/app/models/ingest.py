@@ -0,0 +1,44 @@
+from typing import List, Optional
+from pydantic import BaseModel, field_validator
+
+from app.models.planning_applications import PlanningApplication
+from app.models.precedent_cases import PrecedentCase
+from app.models.sites import Site
+
+def _split_list(value):
+    """CSV cells carry lists as ``a; b; c``."""
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(";") if item.strip()]
+    return value
+
+# Import rows are the API models minus the server-assigned id
+
+class SiteImport(Site):
+    id: Optional[str] = None
+
+    _lists = field_validator("planningHistorySummary", mode="before")(_split_list)
+
+class PlanningApplicationImport(PlanningApplication):
+    id: Optional[str] = None
+
+class PrecedentCaseImport(PrecedentCase):
+    id: Optional[str] = None
+
+    _lists = field_validator("keyPoliciesCited", mode="before")(_split_list)
+
+class IngestReject(BaseModel):
+    line: int
+    errors: List[str]
+
+class IngestReport(BaseModel):
+    entity: str
+    mode: str  # 'upsert' | 'insert'
+    rowsRead: int
+    rowsLoaded: int
+    inserted: int
+    updated: int
+    rejected: int
+    rejects: List[IngestReject]  # first ingest_max_rejects only
+    batches: int
+    elapsedSeconds: float
+    rowsPerSec: float
@@ -6,6 +6,7 @@ class OfficerReportSection(BaseModel):
     title: str
     content: str
     order: int
+    fingerprint: Optional[str] = None  # hash of the section's inputs; the section is reused while they match
 
 class EvidenceLink(BaseModel):
     name: str
@@ -25,3 +26,14 @@ class OfficerReport(BaseModel):
     complianceFlags: Optional[List[ComplianceFlag]] = None
     lastModified: str
     status: str  # 'Draft' | 'Review' | 'Final'
+
+class GenerateOfficerReportRequest(BaseModel):
+    force: bool = False  # re-render every section, even those whose inputs are unchanged
+
+class OfficerReportJobParams(GenerateOfficerReportRequest):
+    applicationId: str
+
+class OfficerReportGeneration(BaseModel):
+    report: OfficerReport
+    rendered: List[str]  # section ids generated this time
+    reused: List[str]  # section ids kept because their input fingerprint matched
@@ -0,0 +1,8 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+class Page(BaseModel):
+    items: List[Dict[str, Any]]
+    nextCursor: Optional[str] = None
+    limit: int
+    fields: Optional[List[str]] = None  # projected fields, None when full rows were returned
@@ -28,3 +28,38 @@ class PlanDocument(BaseModel):
     rootNode: DocumentNode
     version: Optional[str] = None
     documentStatus: Optional[str] = None
+
+class DocumentVersionCreate(BaseModel):
+    label: Optional[str] = None  # e.g. 'Regulation 18'
+    author: Optional[str] = None
+
+class DocumentVersion(BaseModel):
+    documentId: str
+    number: int
+    label: Optional[str] = None
+    author: Optional[str] = None
+    createdAt: str
+    nodeCount: int
+    changedNodes: int  # nodes added, edited, moved or removed since the previous version
+
+class NodeChange(BaseModel):
+    nodeId: str
+    change: str  # 'added' | 'removed' | 'modified' | 'moved'
+    title: Optional[str] = None
+    reference: Optional[str] = None
+    fields: List[str] = []  # body fields that differ, for 'modified'
+    fromParentId: Optional[str] = None
+    toParentId: Optional[str] = None
+    fromOrder: Optional[str] = None
+    toOrder: Optional[str] = None
+    textDiff: Optional[List[str]] = None  # unified diff of the content
+
+class DocumentDiff(BaseModel):
+    documentId: str
+    fromVersion: int
+    toVersion: int
+    added: int
+    removed: int
+    modified: int
+    moved: int
+    changes: List[NodeChange]
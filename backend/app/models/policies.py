@@ -43,3 +43,51 @@ class Policy(BaseModel):
     documentId: str
     keywords: Optional[List[str]] = None
     requirementsSummary: Optional[str] = None
+
+class PolicyGraphNode(BaseModel):
+    id: str
+    reference: Optional[str] = None
+    title: Optional[str] = None
+    status: Optional[PolicyStatus] = None
+    documentId: Optional[str] = None
+    hops: int  # distance from the queried policy
+    missing: bool = False  # named in a link but no such policy exists
+
+class PolicyGraphEdge(BaseModel):
+    source: str
+    target: str
+    relationship: RelationshipType
+
+class PolicyGraphView(BaseModel):
+    policyId: str
+    depth: int
+    nodes: List[PolicyGraphNode]
+    edges: List[PolicyGraphEdge]
+    supersedes: List[str]  # transitively, nearest first
+    supersededBy: List[str]  # transitively, nearest first
+    currentVersions: List[str]  # ends of the supersededBy chains; [policyId] when nothing supersedes it
+    conflictsWith: List[str]  # direct, either direction
+    conflictCycles: List[List[str]]  # CONFLICTS_WITH cycles through this policy
+
+class PolicyConflictPair(BaseModel):
+    policyIds: List[str]  # two ids, sorted
+    references: List[Optional[str]]
+
+class PolicyConflictReport(BaseModel):
+    documentId: Optional[str] = None
+    policies: int
+    pairs: List[PolicyConflictPair]
+    conflictCycles: List[List[str]]  # independent CONFLICTS_WITH cycles (a cycle basis) touching the plan
+    supersessionLoops: List[List[str]]  # SUPERSEDES chains that loop back on themselves
+
+class ApplicablePolicy(BaseModel):
+    policyId: str
+    reference: str
+    title: str
+    status: PolicyStatus
+    matchedOn: List[str]  # site categories that made it apply; [] for policies without categories (plan-wide)
+
+class PolicyApplicability(BaseModel):
+    siteId: str
+    categories: List[str]  # proposed use, parish:<name>, and types/names of overlapping constraints
+    policies: List[ApplicablePolicy]
@@ -18,3 +18,20 @@ class PrecedentCase(BaseModel):
     decisionExtractLink: Optional[str] = None
     relevanceSummary: Optional[str] = None
     similarityCriteria: Optional[SimilarityCriteria] = None
+
+class SimilarPrecedent(BaseModel):
+    precedent: PrecedentCase
+    score: float  # cosine similarity to the application, 1.0 = identical
+
+class PrecedentScoreComponents(BaseModel):
+    policyOverlap: Optional[float] = None  # Jaccard similarity of the cited policy sets
+    sharedPolicies: List[str] = []
+    location: Optional[float] = None  # 1.0 at the application site, 0.5 at precedent_distance_half_life metres
+    distanceMetres: Optional[float] = None
+    text: Optional[float] = None  # cosine similarity of the reasoning embeddings
+
+class RankedPrecedent(BaseModel):
+    precedent: PrecedentCase
+    score: float  # weighted blend of the components that are known
+    components: PrecedentScoreComponents
+    explanation: str  # the components in words, e.g. for relevanceSummary
@@ -1,5 +1,5 @@
 from typing import Any, Dict, List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.models.shared import SoundnessStatus
 
 class SummaryMetrics(BaseModel):
@@ -34,3 +34,41 @@ class Scenario(BaseModel):
     aiCommentary: Optional[str] = None
     createdAt: Optional[str] = None
     lastModified: Optional[str] = None
+
+# The parts of a scenario that determine its metrics, for what-if evaluation without saving
+
+class ScenarioDefinition(BaseModel):
+    baselineScenarioId: Optional[str] = None
+    includedSiteIds: Optional[List[str]] = None
+    excludedSiteIds: Optional[List[str]] = None
+    activePolicyIds: Optional[List[str]] = None
+    modifiedPolicies: Optional[List[ModifiedPolicy]] = None
+
+class ScenarioEvaluation(BaseModel):
+    scenarioId: Optional[str] = None
+    summaryMetrics: SummaryMetrics
+    goalPerformance: List[Dict[str, Any]]  # {goalId, status, value, target, progress}
+    sitesIncluded: int
+    computedBy: Optional[str] = None  # 'cache' | 'incremental' | 'full'
+
+class ScenarioSweep(BaseModel):
+    baseScenarioId: Optional[str] = None  # variants start from this saved scenario; all sites otherwise
+    upliftFrom: float = 0.0  # densityUplift range, as fractions
+    upliftTo: float = 0.3
+    steps: int = Field(11, ge=1, le=10000)
+    parish: Optional[str] = None  # uplift applies to sites in this parish...
+    siteCategories: Optional[List[str]] = None  # ...and/or these categories; every site when neither is set
+
+class ScenarioCompareRequest(BaseModel):
+    scenarioIds: Optional[List[str]] = None
+    sweep: Optional[ScenarioSweep] = None
+    referenceScenarioId: Optional[str] = None  # deltas are against this row; the first row otherwise
+
+class ScenarioComparison(BaseModel):
+    labels: List[str]  # scenario ids, then sweep variants as 'densityUplift=0.15'
+    columns: List[str]  # SummaryMetrics fields, then goal ids
+    values: List[List[float]]
+    deltas: List[List[float]]  # values minus the reference row
+    referenceIndex: int
+    workers: int  # processes used; 1 when evaluated in the API process
+    elapsedSeconds: float
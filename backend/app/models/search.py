@@ -0,0 +1,13 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class SearchHit(BaseModel):
+    id: str
+    reference: Optional[str] = None
+    title: str
+    rank: float
+    snippet: Optional[str] = None  # fragment with matches wrapped in <mark></mark>
+
+class SearchResults(BaseModel):
+    query: str
+    hits: List[SearchHit]
@@ -0,0 +1,65 @@
+"""
+Job handlers for the /ai generations; see ``app.jobs`` for how they are run.
+
+Each handler validates its params with the request model, calls ``AIService``
+and returns the response model the synchronous endpoints used to return.
+"""
+from datetime import datetime
+from uuid import UUID
+
+from app.jobs import JobContext, job_handler
+from app.models.ai import (
+    GeneratePolicyGuidanceRequest,
+    GeneratePolicyGuidanceResponse,
+    GenerateReportDraftRequest,
+    GenerateReportDraftResponse,
+    GenerateScenarioCommentaryRequest,
+    GenerateScenarioCommentaryResponse,
+    GenerateSiteJustificationRequest,
+    GenerateSiteJustificationResponse,
+)
+from app.models.officer_reports import OfficerReport
+from app.services.ai_service import AIService
+from app.services.report_context import ReportContextBuilder
+
+
+@job_handler("policy_guidance")
+async def policy_guidance(params: dict, ctx: JobContext) -> GeneratePolicyGuidanceResponse:
+    request = GeneratePolicyGuidanceRequest.model_validate(params)
+    suggestions = await AIService().generate_policy_guidance(request.policyText, request.context)
+    return GeneratePolicyGuidanceResponse(suggestions=suggestions or [])
+
+
+@job_handler("site_justification")
+async def site_justification(params: dict, ctx: JobContext) -> GenerateSiteJustificationResponse:
+    request = GenerateSiteJustificationRequest.model_validate(params)
+    justification = await AIService().generate_site_justification(request.applicationId)
+    return GenerateSiteJustificationResponse(justification=justification or "")
+
+
+@job_handler("scenario_commentary")
+async def scenario_commentary(params: dict, ctx: JobContext) -> GenerateScenarioCommentaryResponse:
+    request = GenerateScenarioCommentaryRequest.model_validate(params)
+    commentary = await AIService().generate_scenario_commentary(request.scenarioId)
+    return GenerateScenarioCommentaryResponse(commentary=commentary or "")
+
+
+@job_handler("report_draft")
+async def report_draft(params: dict, ctx: JobContext) -> GenerateReportDraftResponse:
+    request = GenerateReportDraftRequest.model_validate(params)
+    context = await ReportContextBuilder().build(UUID(request.applicationId))
+    if context is None:
+        raise LookupError(f"Planning application {request.applicationId} not found")
+    await ctx.emit("context", context.stats())
+    report = await AIService().generate_report_draft(
+        request.applicationId, context=context.render(), on_delta=ctx.delta
+    )
+    if report is None:
+        report = OfficerReport(
+            applicationId=request.applicationId,
+            version="",
+            sections=[],
+            lastModified=datetime.utcnow().isoformat(),
+            status="Draft",
+        )
+    return GenerateReportDraftResponse(report=report)
@@ -1,18 +1,124 @@
+import re
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+
+from app.models.officer_reports import OfficerReport, OfficerReportSection
+from app.models.policies import AIGuidance
+from app.services.llm import ModelClient, get_model_client
+from app.services.llm_cache import LLMCache, cache_key, llm_cache
+
+# Bump whenever a prompt template below changes, so cached answers to the old one miss
+PROMPT_VERSION = "1"
+
+SYSTEM_PROMPT = (
+    "You are an experienced UK local planning authority officer. "
+    "Answer concisely and cite policy references where relevant."
+)
+
+_HEADING = re.compile(r"^#{1,3}\s+(.+)$", re.MULTILINE)
+
+
+def parse_guidance(text: str) -> List[AIGuidance]:
+    """``Type: message`` lines into AIGuidance items; anything else becomes a general note."""
+    guidance = []
+    for line in filter(None, (line.strip(" -*\t") for line in text.splitlines())):
+        kind, sep, message = line.partition(":")
+        if sep and message.strip() and len(kind) <= 40:
+            guidance.append(AIGuidance(type=kind.strip(), message=message.strip()))
+        else:
+            guidance.append(AIGuidance(type="Note", message=line))
+    return guidance
+
+
+def parse_sections(text: str) -> List[OfficerReportSection]:
+    """Split a markdown draft at its headings; text before the first heading becomes a "Summary" section."""
+    sections, matches = [], list(_HEADING.finditer(text))
+    preamble = text[: matches[0].start()] if matches else text
+    if preamble.strip():
+        sections.append(("Summary", preamble.strip()))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections.append((match.group(1).strip(), text[match.end() : end].strip()))
+    return [
+        OfficerReportSection(id=f"section-{order}", title=title, content=content, order=order)
+        for order, (title, content) in enumerate(sections, start=1)
+    ]
+
+
 class AIService:
+    def __init__(self, client: Optional[ModelClient] = None, cache: Optional[LLMCache] = None):
+        self.client = client or get_model_client()
+        self.cache = cache if cache is not None else llm_cache
+
+    async def complete(self, task: str, inputs: dict, prompt: str, refresh: bool = False) -> str:
+        """
+        Cached, coalesced completion; the key is ``inputs`` (normalised), not the
+        rendered prompt. ``refresh`` asks the model again and replaces the cached answer.
+        """
+        key = cache_key(task, inputs, self.client.name, PROMPT_VERSION)
+        return await self.cache.get_or_compute(
+            key, lambda: self.client.complete(prompt, system=SYSTEM_PROMPT), refresh=refresh
+        )
+
     async def generate_policy_guidance(self, policy_text: str, context: dict | None = None):
         if context is None:
             context = {}
-        # Stub: Replace with actual AI logic
-        return []
+        prompt = (
+            f"Review this draft planning policy wording:\n\n{policy_text}\n\n"
+            f"Context: {context}\n\n"
+            "Give up to five suggestions, one per line, as `Type: message` "
+            "where Type is e.g. Clarity, Evidence, Consistency or Soundness."
+        )
+        text = await self.complete("policy_guidance", {"policyText": policy_text, "context": context}, prompt)
+        return parse_guidance(text)
+
+    async def generate_site_justification(self, application_id: str, context: dict | None = None):
+        context = context or {}
+        prompt = (
+            f"Application {application_id}\n\nFacts: {context}\n\n"
+            "Write a short justification of the site's suitability for the proposed development."
+        )
+        return await self.complete("site_justification", {"applicationId": application_id, "context": context}, prompt)
 
-    async def generate_site_justification(self, application_id: str):
-        # Stub: Replace with actual AI logic
-        return f"Stub justification for application_id: {application_id}"
+    async def generate_scenario_commentary(self, scenario_id: str, context: dict | None = None):
+        context = context or {}
+        prompt = (
+            f"Scenario {scenario_id}\n\nSummary metrics: {context}\n\n"
+            "Comment on how the scenario performs against the plan's goals."
+        )
+        return await self.complete("scenario_commentary", {"scenarioId": scenario_id, "context": context}, prompt)
 
-    async def generate_scenario_commentary(self, scenario_id: str):
-        # Stub: Replace with actual AI logic
-        return f"Stub commentary for scenario_id: {scenario_id}"
+    async def generate_report_draft(
+        self,
+        application_id: str,
+        context: Optional[str] = None,
+        on_delta: Optional[Callable[[str, Optional[str]], Awaitable[None]]] = None,
+    ):
+        """
+        Draft an officer report from retrieved ``context`` (see ``ReportContextBuilder``).
 
-    async def generate_report_draft(self, application_id: str):
-        # Stub: Replace with actual AI logic
-        return None
+        The draft is a single cached completion, not a token stream: nothing
+        reaches ``on_delta(text, section_id)`` until the whole draft is back,
+        and then its sections are passed on one by one so event followers can
+        render them in order.
+        """
+        if context is None:
+            return None
+        prompt = (
+            f"Draft a delegated officer report for application {application_id} using only the material below, "
+            "citing it by the bracketed references. Use markdown headings for: Site and proposal, "
+            "Planning history and precedents, Constraints, Policy assessment, Planning balance, Recommendation.\n\n"
+            f"{context}"
+        )
+        text = await self.complete("report_draft", {"applicationId": application_id, "context": context}, prompt)
+        sections = parse_sections(text)
+        if on_delta is not None:
+            for section in sections:
+                await on_delta(f"## {section.title}\n\n{section.content}\n\n", section.id)
+        return OfficerReport(
+            applicationId=application_id,
+            version="draft",
+            sections=sections,
+            lastModified=datetime.utcnow().isoformat(),
+            status="Draft",
+        )
@@ -0,0 +1,257 @@
+"""
+Site/constraint overlay job.
+
+Intersects sites against every constraint layer with a PostGIS spatial join
+and stores the result in ``site_constraints`` (overlap area and percentage).
+Incremental runs only revisit sites and constraints whose geometry changed
+since the previous run's watermark (``geometry_updated_at`` is maintained by
+a trigger), then refresh the ``constraints`` JSON copies on the affected
+sites and their planning applications. Deleting a constraint, or editing
+what the copies show of it (name, type, severity, source, description),
+leaves its sites' copies stale without moving any geometry, so triggers
+queue those sites in ``overlay_dirty_sites`` and every run, full or
+incremental, drains the queue and refreshes them too.
+
+The watermark is the newest ``geometry_updated_at`` the run could see, not
+the time it started. The trigger stamps a row when it is written, not when
+its transaction commits, so a transaction still open during a run can later
+commit rows stamped behind that watermark; each run therefore rescans
+``overlay_watermark_overlap`` seconds behind it. Redoing a pair is harmless
+(it is deleted and recomputed), so only a writer open for longer than the
+overlap can be missed, and ``--full`` catches that.
+
+    python -m app.services.constraints_service [--full]
+"""
+import argparse
+import asyncio
+import math
+from datetime import datetime, timedelta
+from typing import Hashable, Iterable, List, Optional, Tuple
+
+from geoalchemy2 import Geography
+from sqlalchemy import DateTime, bindparam, cast, delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db_models.constraints import Constraint
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.site_constraints import OverlayDirtySite, OverlayRun, SiteConstraint
+from app.db_models.sites import Site
+from app.jobs import JobContext, job_handler
+from app.models.constraints import OverlayRunRequest, OverlayRunResult
+from app.spatial import SRID, SpatialIndex, to_shape
+
+# JSON copy refreshes are chunked to keep each UPDATE's id array bounded
+REFRESH_CHUNK = 2000
+
+
+def _overlap_columns():
+    """(site_id, constraint_id, overlap_area_ha, overlap_percent, computed_at) for a site x constraint join."""
+    overlap = func.ST_Intersection(Site.coordinates, Constraint.geometry)
+    site_area = func.nullif(func.ST_Area(Site.coordinates), 0)
+    return (
+        Site.id,
+        Constraint.id,
+        func.ST_Area(cast(overlap, Geography(srid=SRID))) / 10000.0,
+        func.coalesce(100.0 * func.ST_Area(overlap) / site_area, 100.0),
+        func.now(),
+    )
+
+
+def _pair_select(*where):
+    return (
+        select(*_overlap_columns())
+        .join(Constraint, func.ST_Intersects(Site.coordinates, Constraint.geometry))
+        .where(*where)
+    )
+
+
+class OverlayService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def last_watermark(self) -> Optional[datetime]:
+        """Where the next incremental run starts: the last run's watermark, less the overlap."""
+        stmt = (
+            select(func.coalesce(OverlayRun.watermark, OverlayRun.started_at))
+            .where(OverlayRun.finished_at.isnot(None))
+            .order_by(OverlayRun.id.desc())
+            .limit(1)
+        )
+        watermark = (await self.db.execute(stmt)).scalar_one_or_none()
+        return None if watermark is None else watermark - timedelta(seconds=settings.overlay_watermark_overlap)
+
+    async def current_watermark(self) -> Optional[datetime]:
+        """The newest geometry change visible now (both columns are indexed, so this is two index probes)."""
+        stmt = select(
+            func.greatest(
+                select(func.max(Site.geometry_updated_at)).scalar_subquery(),
+                select(func.max(Constraint.geometry_updated_at)).scalar_subquery(),
+            )
+        )
+        return (await self.db.execute(stmt)).scalar_one_or_none()
+
+    async def run(self, full: bool = False) -> dict:
+        """Bring ``site_constraints`` up to date; one transaction per run."""
+        started = (await self.db.execute(select(cast(func.clock_timestamp(), DateTime)))).scalar_one()
+        # Read before the changes are, so anything stamped later is still ahead of it next time
+        watermark = await self.current_watermark()
+        since = None if full else await self.last_watermark()
+        full = since is None
+        columns = ["site_id", "constraint_id", "overlap_area_ha", "overlap_percent", "computed_at"]
+        # Rows queued by transactions still open stay behind for the next run
+        marked = set((await self.db.execute(delete(OverlayDirtySite).returning(OverlayDirtySite.site_id))).scalars())
+
+        if full:
+            touched_sites = set((await self.db.execute(delete(SiteConstraint).returning(SiteConstraint.site_id))).scalars())
+            result = await self.db.execute(
+                insert(SiteConstraint).from_select(columns, _pair_select()).returning(SiteConstraint.site_id)
+            )
+            written = list(result.scalars())
+            touched_sites.update(written)
+            sites_changed = constraints_changed = None
+        else:
+            dirty_sites = select(Site.id).where(Site.geometry_updated_at > since)
+            dirty_constraints = select(Constraint.id).where(Constraint.geometry_updated_at > since)
+
+            # Pairs whose either side moved are stale, including ones that no longer intersect
+            stale = delete(SiteConstraint).where(
+                SiteConstraint.site_id.in_(dirty_sites) | SiteConstraint.constraint_id.in_(dirty_constraints)
+            )
+            touched_sites = set((await self.db.execute(stale.returning(SiteConstraint.site_id))).scalars())
+
+            # Two joins rather than one OR so both sides can drive off their GiST index
+            written = []
+            for pairs in (
+                _pair_select(Site.geometry_updated_at > since),
+                _pair_select(
+                    Constraint.geometry_updated_at > since,
+                    (Site.geometry_updated_at <= since) | Site.geometry_updated_at.is_(None),
+                ),
+            ):
+                result = await self.db.execute(
+                    insert(SiteConstraint).from_select(columns, pairs).returning(SiteConstraint.site_id)
+                )
+                written.extend(result.scalars())
+            touched_sites.update(written)
+            touched_sites.update((await self.db.execute(dirty_sites)).scalars())
+            sites_changed = (await self.db.execute(select(func.count()).select_from(dirty_sites.subquery()))).scalar_one()
+            constraints_changed = (
+                await self.db.execute(select(func.count()).select_from(dirty_constraints.subquery()))
+            ).scalar_one()
+
+        touched_sites.update(marked)
+        await self.refresh_copies(touched_sites)
+        self.db.add(
+            OverlayRun(
+                started_at=started,
+                finished_at=func.clock_timestamp(),
+                watermark=watermark,
+                full=full,
+                sites_changed=sites_changed,
+                constraints_changed=constraints_changed,
+                pairs_written=len(written),
+            )
+        )
+        await self.db.commit()
+        return {
+            "full": full,
+            "since": since.isoformat() if since else None,
+            "sitesChanged": sites_changed,
+            "constraintsChanged": constraints_changed,
+            "sitesRefreshed": len(touched_sites),
+            "pairsWritten": len(written),
+        }
+
+    async def refresh_copies(self, site_ids: Iterable) -> None:
+        """Rewrite the ``constraints`` JSON on the given sites and their applications from ``site_constraints``."""
+        summary = (
+            select(
+                func.coalesce(
+                    func.json_agg(
+                        func.json_build_object(
+                            "id", Constraint.id,
+                            "name", Constraint.name,
+                            "type", Constraint.type,
+                            "severity", Constraint.severity,
+                            "sourceDocument", Constraint.source_document,
+                            "description", Constraint.description,
+                            "overlapAreaHa", SiteConstraint.overlap_area_ha,
+                            "overlapPercent", SiteConstraint.overlap_percent,
+                        )
+                    ),
+                    func.json_build_array(),
+                )
+            )
+            .select_from(SiteConstraint)
+            .join(Constraint, Constraint.id == SiteConstraint.constraint_id)
+        )
+        ids = list(site_ids)
+        for start in range(0, len(ids), REFRESH_CHUNK):
+            chunk = bindparam("ids", ids[start : start + REFRESH_CHUNK], type_=ARRAY(UUID(as_uuid=True)))
+            await self.db.execute(
+                update(Site)
+                .where(Site.id == func.any(chunk))
+                .values(constraints=summary.where(SiteConstraint.site_id == Site.id).scalar_subquery())
+            )
+            await self.db.execute(
+                update(PlanningApplication)
+                .where(PlanningApplication.site_id == func.any(chunk))
+                .values(
+                    constraints=summary.where(SiteConstraint.site_id == PlanningApplication.site_id).scalar_subquery()
+                )
+            )
+
+
+def overlay_in_memory(
+    sites: Iterable[Tuple[Hashable, dict]], constraints: Iterable[Tuple[Hashable, dict]]
+) -> List[dict]:
+    """
+    Offline equivalent of ``OverlayService.run(full=True)`` over GeoJSON inputs,
+    using an STRtree over the constraints. Areas use a local equirectangular
+    scale, which is close enough at site scale but not survey-grade.
+    """
+    index = SpatialIndex(constraints)
+    shapes = dict(zip(index.keys, index.geometries))
+    pairs = []
+    for site_id, geojson in sites:
+        site = to_shape(geojson)
+        if site is None or site.is_empty:
+            continue
+        scale = (111_320.0 ** 2) * math.cos(math.radians(site.centroid.y))
+        for constraint_id in index.intersecting(site):
+            overlap = site.intersection(shapes[constraint_id])
+            pairs.append(
+                {
+                    "site_id": site_id,
+                    "constraint_id": constraint_id,
+                    "overlap_area_ha": overlap.area * scale / 10000.0,
+                    "overlap_percent": 100.0 * overlap.area / site.area if site.area else 100.0,
+                }
+            )
+    return pairs
+
+
+@job_handler("constraint_overlay")
+async def constraint_overlay_job(params: dict, ctx: JobContext) -> OverlayRunResult:
+    from app.db import JobSessionLocal
+
+    request = OverlayRunRequest.model_validate(params)
+    async with JobSessionLocal() as db:
+        return OverlayRunResult(**await OverlayService(db).run(full=request.full))
+
+
+async def main() -> None:
+    from app.db import JobSessionLocal, job_engine
+
+    parser = argparse.ArgumentParser(description="Recompute site/constraint overlays")
+    parser.add_argument("--full", action="store_true", help="ignore the watermark and rebuild everything")
+    args = parser.parse_args()
+    async with JobSessionLocal() as db:
+        print(await OverlayService(db).run(full=args.full))
+    await job_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
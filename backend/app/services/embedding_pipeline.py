@@ -0,0 +1,381 @@
+"""
+Incremental embedding pipeline.
+
+Policies, document nodes, precedents and applications are chunked, each
+chunk is hashed, and only chunks whose hash (or encoder) changed since the
+last run are sent to the encoder. Stored chunks are matched on their hash,
+not just their position, so a paragraph inserted near the top of a policy
+only encodes the new text; the chunks it pushes down keep their vectors.
+Batches are bounded by count and characters and are encoded by a fixed pool
+of workers; the batch queue is bounded too, so the reader waits for the
+encoder rather than buffering a whole plan in memory. Entity-level
+``embedding`` columns are refreshed as the mean of their chunks.
+
+    python -m app.services.embedding_pipeline [--source policy --source document_node]
+"""
+import argparse
+import asyncio
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db_models.embedding_chunks import EmbeddingChunk
+from app.db_models.plan_documents import DocumentNode
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.policies import Policy
+from app.db_models.precedent_cases import PrecedentCase
+from app.services.embeddings import Encoder, get_encoder
+from app.services.precedent_cases_service import application_text, precedent_text
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_SENTENCE = re.compile(r"(?<=[.!?;])\s+")
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    model: Any
+    columns: Tuple[str, ...]
+    header: Callable[[Any], str]  # repeated at the top of every chunk for context
+    body: Callable[[Any], str]
+
+
+SOURCES: Dict[str, Source] = {
+    source.name: source
+    for source in (
+        Source(
+            "policy",
+            Policy,
+            ("reference", "title", "wording", "supporting_text"),
+            header=lambda r: f"{r.reference} {r.title}",
+            body=lambda r: "\n\n".join(filter(None, (r.wording, r.supporting_text))),
+        ),
+        Source(
+            "document_node",
+            DocumentNode,
+            ("reference", "title", "content"),
+            header=lambda r: " ".join(filter(None, (r.reference, r.title))),
+            body=lambda r: r.content or "",
+        ),
+        Source(
+            "precedent_case",
+            PrecedentCase,
+            ("case_reference", "address", "inspector_reasoning_summary", "relevance_summary", "key_policies_cited"),
+            header=lambda r: r.case_reference,
+            body=lambda r: precedent_text(
+                r.address, r.inspector_reasoning_summary, r.relevance_summary, r.key_policies_cited
+            ),
+        ),
+        Source(
+            "planning_application",
+            PlanningApplication,
+            ("reference_number", "address", "site_description", "proposal_details"),
+            header=lambda r: r.reference_number,
+            body=lambda r: application_text(r.address, r.site_description, r.proposal_details),
+        ),
+    )
+}
+
+
+def chunk_text(text: str, max_chars: int = 1200) -> List[str]:
+    """Pack paragraphs into chunks of at most ``max_chars``, splitting long paragraphs at sentences."""
+    pieces = []
+    for paragraph in (p.strip() for p in _PARAGRAPH.split(text or "")):
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE.split(paragraph):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + 2 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PendingChunk:
+    source: str
+    source_id: UUID
+    chunk_index: int
+    text: str
+    content_hash: str
+
+
+@dataclass
+class PipelineStats:
+    chunks_seen: int = 0
+    chunks_skipped: int = 0
+    chunks_embedded: int = 0
+    chunks_reused: int = 0
+    chunks_removed: int = 0
+    batches: int = 0
+    entities_refreshed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks_embedded / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "chunksSeen": self.chunks_seen,
+            "chunksSkipped": self.chunks_skipped,
+            "chunksEmbedded": self.chunks_embedded,
+            "chunksReused": self.chunks_reused,
+            "chunksRemoved": self.chunks_removed,
+            "batches": self.batches,
+            "entitiesRefreshed": self.entities_refreshed,
+            "elapsedSeconds": round(self.elapsed, 3),
+            "chunksPerSec": round(self.chunks_per_sec, 1),
+        }
+
+
+class EmbeddingPipeline:
+    def __init__(
+        self,
+        db: AsyncSession,
+        encoder: Optional[Encoder] = None,
+        batch_size: int = 64,
+        max_batch_chars: int = 32_000,
+        workers: int = 4,
+        max_pending_batches: int = 8,
+        page_size: int = 500,
+        max_chunk_chars: int = 1200,
+    ):
+        self.db = db
+        self.encoder = encoder or get_encoder()
+        self.batch_size = batch_size
+        self.max_batch_chars = max_batch_chars
+        self.workers = workers
+        self.max_pending_batches = max_pending_batches
+        self.page_size = page_size
+        self.max_chunk_chars = max_chunk_chars
+        # AsyncSession isn't safe for concurrent use; reader and writer take turns
+        self._db_lock = asyncio.Lock()
+
+    async def run(self, sources: Optional[Iterable[str]] = None, ids: Optional[Sequence[UUID]] = None) -> PipelineStats:
+        """Embed whatever changed in ``sources`` (default: all), optionally limited to entity ``ids``."""
+        stats = PipelineStats()
+        touched: Dict[str, Set[UUID]] = {}
+        batches: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending_batches)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending_batches)
+        started = time.perf_counter()
+
+        async with asyncio.TaskGroup() as tasks:
+            for _ in range(self.workers):
+                tasks.create_task(self._encode(batches, results))
+            tasks.create_task(self._write(results, stats))
+            for name in sources or SOURCES:
+                await self._produce(SOURCES[name], ids, batches, results, stats, touched.setdefault(name, set()))
+            for _ in range(self.workers):
+                await batches.put(None)
+
+        async with self._db_lock:
+            for name, entity_ids in touched.items():
+                await self._refresh_entities(SOURCES[name], entity_ids)
+                stats.entities_refreshed += len(entity_ids)
+            await self.db.commit()
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    async def _produce(
+        self,
+        source: Source,
+        ids: Optional[Sequence[UUID]],
+        batches: asyncio.Queue,
+        results: asyncio.Queue,
+        stats: PipelineStats,
+        touched: Set[UUID],
+    ) -> None:
+        model = source.model
+        columns = [model.id] + [getattr(model, name) for name in source.columns]
+        batch: List[PendingChunk] = []
+        batch_chars = 0
+        last_id = None
+        while True:
+            stmt = select(*columns).order_by(model.id).limit(self.page_size)
+            if ids is not None:
+                stmt = stmt.where(model.id.in_(ids))
+            if last_id is not None:
+                stmt = stmt.where(model.id > last_id)
+            async with self._db_lock:
+                rows = (await self.db.execute(stmt)).all()
+                if not rows:
+                    break
+                existing = await self._existing(source.name, [row.id for row in rows])
+            last_id = rows[-1].id
+
+            # Plan the whole page first: moved chunks copy vectors that queued batches may overwrite
+            stale_ids = []
+            encode: List[PendingChunk] = []
+            moved: Dict[int, PendingChunk] = {}  # stored chunk id -> its text's new position
+            for row in rows:
+                header = source.header(row)
+                chunks = chunk_text(source.body(row), self.max_chunk_chars)
+                known_chunks = existing.get(row.id, {})
+                by_hash = {
+                    digest: chunk_id
+                    for chunk_id, digest, encoder in known_chunks.values()
+                    if encoder == self.encoder.name
+                }
+                for index, chunk in enumerate(chunks):
+                    text = f"{header}\n{chunk}" if header else chunk
+                    digest = content_hash(text)
+                    stats.chunks_seen += 1
+                    known = known_chunks.pop(index, None)
+                    if known and known[1:] == (digest, self.encoder.name):
+                        stats.chunks_skipped += 1
+                        continue
+                    touched.add(row.id)
+                    pending = PendingChunk(source.name, row.id, index, text, digest)
+                    if digest in by_hash and by_hash[digest] not in moved:
+                        moved[by_hash[digest]] = pending
+                    else:
+                        encode.append(pending)
+                # Stored chunks not popped above are beyond the row's new chunk count
+                if known_chunks:
+                    stale_ids.extend(chunk_id for chunk_id, _, _ in known_chunks.values())
+                    touched.add(row.id)
+
+            if moved:
+                async with self._db_lock:
+                    stmt = select(EmbeddingChunk.id, EmbeddingChunk.embedding).where(
+                        EmbeddingChunk.id.in_(moved), EmbeddingChunk.embedding.isnot(None)
+                    )
+                    vectors = {r.id: r.embedding for r in (await self.db.execute(stmt)).all()}
+                if vectors:
+                    await results.put(([moved[chunk_id] for chunk_id in vectors], list(vectors.values()), False))
+                    stats.chunks_reused += len(vectors)
+                encode.extend(pending for chunk_id, pending in moved.items() if chunk_id not in vectors)
+            for pending in encode:
+                batch.append(pending)
+                batch_chars += len(pending.text)
+                if len(batch) >= self.batch_size or batch_chars >= self.max_batch_chars:
+                    await batches.put(batch)  # blocks while encoders are behind
+                    stats.batches += 1
+                    batch, batch_chars = [], 0
+
+            if stale_ids:
+                async with self._db_lock:
+                    await self.db.execute(delete(EmbeddingChunk).where(EmbeddingChunk.id.in_(stale_ids)))
+                    await self.db.commit()
+                stats.chunks_removed += len(stale_ids)
+
+        if batch:
+            await batches.put(batch)
+            stats.batches += 1
+
+    async def _existing(self, source: str, source_ids: List[UUID]) -> Dict[UUID, Dict[int, Tuple[int, str, str]]]:
+        """source_id -> chunk_index -> (chunk row id, content hash, encoder) for what's already stored."""
+        stmt = select(
+            EmbeddingChunk.id,
+            EmbeddingChunk.source_id,
+            EmbeddingChunk.chunk_index,
+            EmbeddingChunk.content_hash,
+            EmbeddingChunk.encoder,
+        ).where(EmbeddingChunk.source == source, EmbeddingChunk.source_id.in_(source_ids))
+        existing: Dict[UUID, Dict[int, Tuple[int, str, str]]] = {}
+        for r in (await self.db.execute(stmt)).all():
+            existing.setdefault(r.source_id, {})[r.chunk_index] = (r.id, r.content_hash, r.encoder)
+        return existing
+
+    async def _encode(self, batches: asyncio.Queue, results: asyncio.Queue) -> None:
+        while True:
+            batch = await batches.get()
+            if batch is None:
+                await results.put(None)
+                return
+            vectors = await self.encoder.encode([chunk.text for chunk in batch])
+            await results.put((batch, vectors, True))
+
+    async def _write(self, results: asyncio.Queue, stats: PipelineStats) -> None:
+        finished_workers = 0
+        while finished_workers < self.workers:
+            item = await results.get()
+            if item is None:
+                finished_workers += 1
+                continue
+            batch, vectors, encoded = item
+            rows = [
+                {
+                    "source": chunk.source,
+                    "source_id": chunk.source_id,
+                    "chunk_index": chunk.chunk_index,
+                    "content_hash": chunk.content_hash,
+                    "encoder": self.encoder.name,
+                    "text": chunk.text,
+                    "embedding": vector,
+                    "updated_at": func.now(),
+                }
+                # strict: an encoder returning one vector short would shift every vector after it
+                for chunk, vector in zip(batch, vectors, strict=True)
+            ]
+            stmt = insert(EmbeddingChunk).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_embedding_chunks_source_chunk",
+                set_={
+                    name: stmt.excluded[name]
+                    for name in ("content_hash", "encoder", "text", "embedding", "updated_at")
+                },
+            )
+            async with self._db_lock:
+                await self.db.execute(stmt)
+                await self.db.commit()
+            if encoded:
+                stats.chunks_embedded += len(batch)
+
+    async def _refresh_entities(self, source: Source, entity_ids: Set[UUID], chunk: int = 1000) -> None:
+        """Entity embedding = mean of its chunk vectors (NULL once it has no chunks)."""
+        model = source.model
+        mean = (
+            select(func.avg(EmbeddingChunk.embedding))
+            .where(EmbeddingChunk.source == source.name, EmbeddingChunk.source_id == model.id)
+            .scalar_subquery()
+        )
+        ids = list(entity_ids)
+        for start in range(0, len(ids), chunk):
+            batch = bindparam("ids", ids[start : start + chunk], type_=ARRAY(PG_UUID(as_uuid=True)))
+            await self.db.execute(update(model).where(model.id == func.any(batch)).values(embedding=mean))
+
+
+async def main() -> None:
+    from app.db import JobSessionLocal, job_engine
+
+    parser = argparse.ArgumentParser(description="Embed changed policies, document nodes and precedents")
+    parser.add_argument("--source", action="append", choices=sorted(SOURCES), help="repeatable; default all")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    async with JobSessionLocal() as db:
+        pipeline = EmbeddingPipeline(db, workers=args.workers, batch_size=args.batch_size)
+        stats = await pipeline.run(args.source)
+    print(stats.as_dict())
+    await job_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
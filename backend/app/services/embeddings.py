@@ -0,0 +1,94 @@
+"""
+Text encoders and a brute-force vector index.
+
+``get_encoder()`` returns the encoder selected by ``Settings.embedding_backend``.
+``HashingEncoder`` is deterministic and dependency-free, so local runs and
+tests produce stable vectors without a model; ``VectorIndex`` is the NumPy
+stand-in for the pgvector HNSW indexes.
+"""
+import hashlib
+from typing import Hashable, Iterable, List, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.search_service import terms
+
+
+class Encoder(Protocol):
+    name: str
+    dim: int
+
+    async def encode(self, texts: Sequence[str]) -> List[List[float]]:
+        ...
+
+
+class HashingEncoder:
+    """Signed feature hashing of stemmed unigrams and bigrams, L2-normalised."""
+
+    def __init__(self, dim: int = settings.vector_dim):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        words = terms(text)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vec[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    async def encode(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self._vector(text).tolist() for text in texts]
+
+
+class OpenAIEncoder:
+    def __init__(self, model: str = settings.embedding_model, dim: int = settings.vector_dim):
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.model = model
+        self.dim = dim
+        self.name = f"openai-{model}-{dim}"
+
+    async def encode(self, texts: Sequence[str]) -> List[List[float]]:
+        response = await self.client.embeddings.create(model=self.model, input=list(texts), dimensions=self.dim)
+        return [item.embedding for item in response.data]
+
+
+def get_encoder() -> Encoder:
+    if settings.embedding_backend == "openai":
+        return OpenAIEncoder()
+    return HashingEncoder()
+
+
+class VectorIndex:
+    """Exact cosine top-k over an in-memory matrix; one BLAS matvec per query."""
+
+    def __init__(self, items: Iterable[Tuple[Hashable, Sequence[float]]], dim: int = settings.vector_dim):
+        keys, rows = [], []
+        for key, vector in items:
+            if vector is not None:
+                keys.append(key)
+                rows.append(vector)
+        self.keys = keys
+        matrix = np.asarray(rows, dtype=np.float32).reshape(len(rows), dim)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms == 0, 1, norms)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, query: Sequence[float], k: int = 10) -> List[Tuple[Hashable, float]]:
+        """``(key, cosine similarity)`` pairs, best first."""
+        if not self.keys:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        scores = self.matrix @ (q / norm if norm else q)
+        k = min(k, len(self.keys))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.keys[i], float(scores[i])) for i in top]
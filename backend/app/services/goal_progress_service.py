@@ -0,0 +1,518 @@
+"""
+Goal monitoring: precomputed progress aggregates and a snapshot time series.
+
+``site_progress_facts`` holds each site's inputs to goal progress (indicative
+yield, allocation, application outcomes); ``goal_progress`` holds their sums
+over each goal's contributing sites, plus the goal's tracked value, progress
+and status. Dashboards read these two tables, never the ``ARRAY(String)`` id
+columns.
+
+Updates are incremental. When a site or one of its applications changes, the
+site's facts are recomputed, the difference from the stored facts is added
+to every goal that lists the site, and a ``goal_snapshots`` row is written
+for each goal whose value or status moved. A goal whose own definition
+changes (contributing sites, target) is re-summed from the stored facts.
+Which goals list which sites comes from the ``goal_sites`` link table. Facts
+carry no foreign key to ``sites``: a deleted site's row has to outlive it
+until its refresh has subtracted it from the goals' sums. ORM writes queue
+this as a ``goal_progress`` job after commit; bulk loads and the CLI run a
+full rebuild.
+
+    python -m app.services.goal_progress_service [--full] [--snapshot]
+"""
+import argparse
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import bindparam, delete, event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db_models.goal_progress import GoalProgress, GoalSnapshot, SiteProgressFacts
+from app.db_models.goals import Goal
+from app.db_models.links import GoalSite
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.sites import Site
+from app.jobs import JobContext, job_handler
+from app.models.goals import GoalProgress as GoalProgressModel, GoalProgressHistory, GoalProgressPoint, GoalProgressRefresh
+from app.models.shared import ApplicationStatus, GoalStatus
+from app.services.scenarios_service import goal_kind, indicative_yield
+from app.utils import row_to_api
+
+logger = logging.getLogger(__name__)
+
+FACTS = (
+    "homes",
+    "jobs",
+    "allocated",
+    "allocated_homes",
+    "applications",
+    "approved",
+    "refused",
+    "pending",
+    "approved_homes",
+    "approved_jobs",
+)
+AGGREGATES = ("sites", *FACTS)  # goal_progress sums; ``sites`` counts contributing sites that exist
+PENDING = (
+    ApplicationStatus.Received,
+    ApplicationStatus.Validated,
+    ApplicationStatus.UnderAssessment,
+    ApplicationStatus.PendingDecision,
+    ApplicationStatus.Appealed,
+)
+REFRESH_CHUNK = 2000
+BUCKETS = ("day", "week", "month")
+LOCK_KEY = 0x7470615F676F616C  # pg advisory lock serialising refreshes, so deltas never interleave
+
+# Attributes whose changes move goal progress
+SITE_FIELDS = ("area_ha", "proposed_use_plan_making", "plan_making_status")
+APPLICATION_FIELDS = ("status", "site_id")
+GOAL_FIELDS = ("contributing_site_ids", "target_metric", "target_value", "current_value", "status")
+
+
+def _uuids(values: Iterable[Any]) -> List[uuid.UUID]:
+    """Valid UUIDs among ``values``; id lists are loose strings and may hold anything."""
+    found = []
+    for value in values or ():
+        try:
+            found.append(value if isinstance(value, uuid.UUID) else uuid.UUID(str(value)))
+        except ValueError:
+            continue
+    return found
+
+
+def goal_value(goal: dict, sums: dict) -> Optional[float]:
+    """What a goal tracks: approved homes or jobs for housing/employment goals, its own currentValue otherwise."""
+    kind = goal_kind(goal["target_metric"])
+    if kind == "homes":
+        return sums["approved_homes"]
+    if kind == "jobs":
+        return sums["approved_jobs"]
+    return goal["current_value"]
+
+
+def goal_status(goal: dict, value: Optional[float], progress: Optional[float]) -> Optional[str]:
+    """Same thresholds as scenario goal performance; goals without a numeric target keep their own status."""
+    if progress is None:
+        status = goal["status"]
+        return status.value if status is not None else None
+    if progress >= 1.0:
+        return GoalStatus.OnTrack.value
+    if progress >= 0.5:
+        return GoalStatus.Partial.value
+    return GoalStatus.Failing.value
+
+
+def site_inputs():
+    """The site columns that facts are computed from (``facts_for``)."""
+    return select(Site.id, Site.area_ha, Site.proposed_use_plan_making, Site.plan_making_status)
+
+
+def application_outcomes():
+    """Application counts by outcome, grouped per site (``facts_for``)."""
+    status = PlanningApplication.status
+    return select(
+        PlanningApplication.site_id,
+        func.count().label("applications"),
+        func.count().filter(status == ApplicationStatus.Approved).label("approved"),
+        func.count().filter(status == ApplicationStatus.Refused).label("refused"),
+        func.count().filter(status.in_(PENDING)).label("pending"),
+    ).group_by(PlanningApplication.site_id)
+
+
+def facts_for(sites: Sequence[Any], outcomes: Iterable[Any]) -> Dict[uuid.UUID, dict]:
+    """site id -> facts, from ``site_inputs`` rows and the matching ``application_outcomes`` rows."""
+    by_site = {row.site_id: row for row in outcomes}
+    homes, jobs = indicative_yield([s.area_ha for s in sites], [s.proposed_use_plan_making for s in sites])
+    facts = {}
+    for i, site in enumerate(sites):
+        apps = by_site.get(site.id)
+        allocated = int((site.plan_making_status or "").strip().lower() == "allocated")
+        approved = apps.approved if apps else 0
+        facts[site.id] = {
+            "homes": float(homes[i]),
+            "jobs": float(jobs[i]),
+            "allocated": allocated,
+            "allocated_homes": float(homes[i]) * allocated,
+            "applications": apps.applications if apps else 0,
+            "approved": approved,
+            "refused": apps.refused if apps else 0,
+            "pending": apps.pending if apps else 0,
+            "approved_homes": float(homes[i]) if approved else 0.0,
+            "approved_jobs": float(jobs[i]) if approved else 0.0,
+        }
+    return facts
+
+
+def goal_inputs():
+    """Goals joined to their sums and last settled value/status (``settled``)."""
+    return select(
+        Goal.id,
+        Goal.target_metric,
+        Goal.target_value,
+        Goal.current_value,
+        Goal.status,
+        *[GoalProgress.__table__.c[name] for name in AGGREGATES],
+        GoalProgress.value.label("previous_value"),
+        GoalProgress.status.label("previous_status"),
+    ).join(GoalProgress, GoalProgress.goal_id == Goal.id)
+
+
+def settled(row: Any) -> tuple:
+    """(value, progress, status) of a goal from its ``goal_progress`` sums and own target/value/status."""
+    value = goal_value(row, row)
+    target = row["target_value"]
+    progress = round(value / target, 4) if value is not None and target else None
+    return value, progress, goal_status(row, value, progress)
+
+
+class GoalProgressService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _lock(self) -> None:
+        await self.db.execute(select(func.pg_advisory_xact_lock(LOCK_KEY)))
+
+    # dashboard reads
+
+    async def progress(self, goal_ids: Optional[Sequence[uuid.UUID]] = None) -> List[GoalProgressModel]:
+        """Progress rows for ``goal_ids`` (every tracked goal when None); a primary-key join, no id arrays."""
+        stmt = (
+            select(
+                Goal.id.label("goal_id"),
+                Goal.name,
+                Goal.target_metric,
+                Goal.target_value,
+                *[c for c in GoalProgress.__table__.c if c.key != "goal_id"],
+            )
+            .join(GoalProgress, GoalProgress.goal_id == Goal.id)
+            .order_by(Goal.name, Goal.id)
+        )
+        if goal_ids is not None:
+            stmt = stmt.where(Goal.id.in_(goal_ids))
+        rows = (await self.db.execute(stmt)).mappings()
+        return [GoalProgressModel(**row_to_api(row)) for row in rows]
+
+    async def history(
+        self,
+        goal_id: uuid.UUID,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        bucket: Optional[str] = None,
+    ) -> GoalProgressHistory:
+        """Snapshots oldest first; with ``bucket`` only the last one in each day/week/month."""
+        if bucket is not None and bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+        columns = [
+            GoalSnapshot.taken_at,
+            GoalSnapshot.value,
+            GoalSnapshot.target_value,
+            GoalSnapshot.progress,
+            GoalSnapshot.status,
+        ]
+        conditions = [GoalSnapshot.goal_id == goal_id]
+        if since is not None:
+            conditions.append(GoalSnapshot.taken_at >= since)
+        if until is not None:
+            conditions.append(GoalSnapshot.taken_at < until)
+        if bucket is None:
+            stmt = select(*columns).where(*conditions).order_by(GoalSnapshot.taken_at)
+        else:
+            latest = (
+                select(
+                    *columns,
+                    func.row_number()
+                    .over(
+                        partition_by=func.date_trunc(bucket, GoalSnapshot.taken_at),
+                        order_by=(GoalSnapshot.taken_at.desc(), GoalSnapshot.id.desc()),
+                    )
+                    .label("rank"),
+                )
+                .where(*conditions)
+                .subquery()
+            )
+            stmt = (
+                select(*[latest.c[c.key] for c in columns]).where(latest.c.rank == 1).order_by(latest.c.taken_at)
+            )
+        rows = (await self.db.execute(stmt)).mappings()
+        return GoalProgressHistory(
+            goalId=str(goal_id), bucket=bucket, points=[GoalProgressPoint(**row_to_api(row)) for row in rows]
+        )
+
+    # site facts
+
+    async def site_facts(self, site_ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, dict]:
+        """Current facts for the sites that exist among ``site_ids``."""
+        sites = (await self.db.execute(site_inputs().where(Site.id.in_(site_ids)))).all()
+        if not sites:
+            return {}
+        outcomes = (
+            await self.db.execute(application_outcomes().where(PlanningApplication.site_id.in_([s.id for s in sites])))
+        ).all()
+        return facts_for(sites, outcomes)
+
+    async def _write_facts(self, facts: Dict[uuid.UUID, dict], gone: Iterable[uuid.UUID] = ()) -> None:
+        if facts:
+            now = datetime.utcnow()
+            stmt = pg_insert(SiteProgressFacts).values(
+                [{"site_id": site_id, **values, "updated_at": now} for site_id, values in facts.items()]
+            )
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["site_id"], set_={c: stmt.excluded[c] for c in (*FACTS, "updated_at")}
+                )
+            )
+        gone = list(gone)
+        if gone:
+            await self.db.execute(delete(SiteProgressFacts).where(SiteProgressFacts.site_id.in_(gone)))
+
+    async def refresh_sites(self, site_ids: Iterable[Any]) -> Set[uuid.UUID]:
+        """Recompute the sites' facts and add the change to every goal listing them; returns the goals touched."""
+        ids = list(dict.fromkeys(_uuids(site_ids)))
+        if not ids:
+            return set()
+        new = await self.site_facts(ids)
+        old = {
+            row["site_id"]: row
+            for row in (
+                await self.db.execute(select(SiteProgressFacts.__table__).where(SiteProgressFacts.site_id.in_(ids)))
+            ).mappings()
+        }
+        deltas: Dict[uuid.UUID, dict] = {}
+        for site_id in ids:
+            before, after = old.get(site_id), new.get(site_id)
+            delta = {"sites": (after is not None) - (before is not None)}
+            for name in FACTS:
+                delta[name] = (after[name] if after else 0) - (before[name] if before else 0)
+            if any(delta.values()):
+                deltas[site_id] = delta
+        await self._write_facts(new, gone=[site_id for site_id in old if site_id not in new])
+        if not deltas:
+            return set()
+
+        members: Dict[uuid.UUID, List[uuid.UUID]] = {}
+        for link in (
+            await self.db.execute(select(GoalSite.goal_id, GoalSite.site_id).where(GoalSite.site_id.in_(list(deltas))))
+        ).all():
+            members.setdefault(link.goal_id, []).append(link.site_id)
+        tracked = set(
+            (await self.db.execute(select(GoalProgress.goal_id).where(GoalProgress.goal_id.in_(list(members))))).scalars()
+        )
+        changes = []
+        for goal_id, site_ids in members.items():
+            if goal_id not in tracked:
+                continue
+            sums = dict.fromkeys(AGGREGATES, 0)
+            for site_id in site_ids:
+                for name in AGGREGATES:
+                    sums[name] += deltas[site_id][name]
+            changes.append({"goal": goal_id, **{f"d_{name}": value for name, value in sums.items()}})
+        if changes:
+            # Core executemany: the ORM would take a list of parameter sets as a bulk update by primary key
+            table = GoalProgress.__table__
+            await self.db.execute(
+                table.update()
+                .where(table.c.goal_id == bindparam("goal"))
+                .values({name: table.c[name] + bindparam(f"d_{name}") for name in AGGREGATES}),
+                changes,
+            )
+        untracked = [goal_id for goal_id in members if goal_id not in tracked]
+        if untracked:
+            await self.refresh_goals(untracked)
+        return set(members)
+
+    # goal sums
+
+    async def refresh_goals(self, goal_ids: Iterable[Any]) -> Set[uuid.UUID]:
+        """Re-sum goals from stored facts (computing facts for any contributing site that has none yet)."""
+        ids = _uuids(goal_ids)
+        if not ids:
+            return set()
+        members: Dict[uuid.UUID, Set[uuid.UUID]] = {
+            goal_id: set() for goal_id in (await self.db.execute(select(Goal.id).where(Goal.id.in_(ids)))).scalars()
+        }
+        for link in (
+            await self.db.execute(select(GoalSite.goal_id, GoalSite.site_id).where(GoalSite.goal_id.in_(list(members))))
+        ).all():
+            members[link.goal_id].add(link.site_id)
+        wanted = set().union(*members.values()) if members else set()
+        stored = {
+            row["site_id"]: row
+            for row in (
+                await self.db.execute(select(SiteProgressFacts.__table__).where(SiteProgressFacts.site_id.in_(wanted)))
+            ).mappings()
+        }
+        missing = [site_id for site_id in wanted if site_id not in stored]
+        if missing:
+            fresh = await self.site_facts(missing)
+            await self._write_facts(fresh)
+            stored.update(fresh)
+
+        now = datetime.utcnow()
+        rows = []
+        for goal_id, site_ids in members.items():
+            present = [stored[site_id] for site_id in site_ids if site_id in stored]
+            sums = {name: sum(facts[name] for facts in present) for name in FACTS}
+            rows.append({"goal_id": goal_id, "sites": len(present), **sums, "updated_at": now})
+        if rows:
+            stmt = pg_insert(GoalProgress).values(rows)
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["goal_id"], set_={c: stmt.excluded[c] for c in (*AGGREGATES, "updated_at")}
+                )
+            )
+        return set(members)
+
+    # values, statuses and the time series
+
+    async def settle(self, goal_ids: Iterable[uuid.UUID], force: bool = False) -> int:
+        """
+        Recompute value/progress/status for ``goal_ids`` from their sums and
+        snapshot those that changed (every one with ``force``). Returns snapshots written.
+        """
+        ids = list(goal_ids)
+        if not ids:
+            return 0
+        rows = (await self.db.execute(goal_inputs().where(Goal.id.in_(ids)))).mappings().all()
+        now = datetime.utcnow()
+        updates, snapshots = [], []
+        for row in rows:
+            value, progress, status = settled(row)
+            target = row["target_value"]
+            updates.append({"goal": row["id"], "value": value, "progress": progress, "status": status, "now": now})
+            if force or value != row["previous_value"] or status != row["previous_status"]:
+                snapshots.append(
+                    {
+                        "goal_id": row["id"],
+                        "taken_at": now,
+                        "value": value,
+                        "target_value": target,
+                        "progress": progress,
+                        "status": status,
+                        "aggregates": {name: row[name] for name in AGGREGATES},
+                    }
+                )
+        if updates:
+            table = GoalProgress.__table__
+            await self.db.execute(
+                table.update()
+                .where(table.c.goal_id == bindparam("goal"))
+                .values(
+                    value=bindparam("value"),
+                    progress=bindparam("progress"),
+                    status=bindparam("status"),
+                    updated_at=bindparam("now"),
+                ),
+                updates,
+            )
+        if snapshots:
+            await self.db.execute(GoalSnapshot.__table__.insert(), snapshots)
+        return len(snapshots)
+
+    async def refresh(self, site_ids: Iterable[Any] = (), goal_ids: Iterable[Any] = ()) -> GoalProgressRefresh:
+        site_ids, goal_ids = list(site_ids), list(goal_ids)
+        await self._lock()
+        touched = await self.refresh_sites(site_ids)
+        touched |= await self.refresh_goals(goal_ids)
+        written = await self.settle(touched)
+        await self.db.commit()
+        return GoalProgressRefresh(
+            full=False, sitesRefreshed=len(site_ids), goalsUpdated=len(touched), snapshotsWritten=written
+        )
+
+    async def rebuild(self, snapshot: bool = False) -> GoalProgressRefresh:
+        """Recompute every site's facts and every goal's sums; with ``snapshot`` record a point for every goal."""
+        await self._lock()
+        site_ids = list((await self.db.execute(select(Site.id))).scalars())
+        for start in range(0, len(site_ids), REFRESH_CHUNK):
+            await self._write_facts(await self.site_facts(site_ids[start : start + REFRESH_CHUNK]))
+        await self.db.execute(delete(SiteProgressFacts).where(SiteProgressFacts.site_id.not_in(select(Site.id))))
+        goal_ids = list((await self.db.execute(select(Goal.id))).scalars())
+        touched = await self.refresh_goals(goal_ids)
+        written = await self.settle(touched, force=snapshot)
+        await self.db.commit()
+        return GoalProgressRefresh(
+            full=True, sitesRefreshed=len(site_ids), goalsUpdated=len(touched), snapshotsWritten=written
+        )
+
+
+@job_handler("goal_progress")
+async def goal_progress_job(params: dict, ctx: JobContext) -> GoalProgressRefresh:
+    from app.db import JobSessionLocal
+
+    async with JobSessionLocal() as db:
+        service = GoalProgressService(db)
+        if params.get("full"):
+            return await service.rebuild(snapshot=bool(params.get("snapshot")))
+        return await service.refresh(site_ids=params.get("siteIds") or (), goal_ids=params.get("goalIds") or ())
+
+
+def _changed(obj: Any, fields: Sequence[str]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in fields)
+
+
+def _log_unqueued(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Goal progress refresh not queued: %s", task.exception())
+
+
+def register_progress_tracking(submit) -> None:
+    """
+    Queue a ``goal_progress`` job (via ``submit(kind, params)``) after a
+    session commits changes that move goal progress.
+    """
+
+    @event.listens_for(Session, "after_flush")
+    def collect(session, flush_context):
+        sites: Set[str] = session.info.setdefault("goal_progress_sites", set())
+        goals: Set[str] = session.info.setdefault("goal_progress_goals", set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            created_or_deleted = obj in session.new or obj in session.deleted
+            if isinstance(obj, Site) and (created_or_deleted or _changed(obj, SITE_FIELDS)):
+                sites.add(str(obj.id))
+            elif isinstance(obj, PlanningApplication) and (created_or_deleted or _changed(obj, APPLICATION_FIELDS)):
+                history = inspect(obj).attrs.site_id.history
+                sites.update(str(s) for s in (*history.deleted, obj.site_id) if s is not None)
+            elif isinstance(obj, Goal) and (created_or_deleted or _changed(obj, GOAL_FIELDS)):
+                goals.add(str(obj.id))
+
+    @event.listens_for(Session, "after_commit")
+    def queue(session):
+        sites = session.info.pop("goal_progress_sites", None)
+        goals = session.info.pop("goal_progress_goals", None)
+        if not sites and not goals:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop to run it on (sync scripts); the next full rebuild picks the change up
+        task = loop.create_task(submit("goal_progress", {"siteIds": sorted(sites or ()), "goalIds": sorted(goals or ())}))
+        task.add_done_callback(_log_unqueued)
+
+    @event.listens_for(Session, "after_rollback")
+    def discard(session):
+        session.info.pop("goal_progress_sites", None)
+        session.info.pop("goal_progress_goals", None)
+
+
+async def main() -> None:
+    from app.db import JobSessionLocal, job_engine
+
+    parser = argparse.ArgumentParser(description="Rebuild goal progress aggregates")
+    parser.add_argument("--full", action="store_true", help="recompute every site and goal (the default)")
+    parser.add_argument("--snapshot", action="store_true", help="record a time-series point for every goal")
+    args = parser.parse_args()
+    async with JobSessionLocal() as db:
+        result = await GoalProgressService(db).rebuild(snapshot=args.snapshot)
+    print(result.model_dump_json(indent=2))
+    await job_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,490 @@
+"""
+Bulk ingestion of sites, planning applications and precedent cases.
+
+Input (CSV, NDJSON or a GeoJSON FeatureCollection) is read as a byte stream
+and parsed incrementally; each row is validated against the entity's import
+model, and valid rows are buffered into batches. A batch is copied into a
+temporary staging table created in the batch's own transaction and dropped
+when it commits (``COPY`` via asyncpg, batched ``executemany`` on other
+drivers) and merged into the target with one
+``INSERT ... SELECT ... ON CONFLICT (natural key) DO UPDATE``, so a batch
+costs a handful of round trips whatever its size. Duplicate keys within a
+batch resolve to the last row.
+
+An update only sets the columns the input supplies: a CSV header or a
+feature's properties that leave a field out keep the stored value, and rows
+supplying different fields go in separate batches. Copies that other tables
+maintain (a site's constraints and applicable policies, an application's
+constraints) are never overwritten by an update.
+
+A batch the database refuses (a bad cast, a duplicate in insert mode) is
+bisected under savepoints until the offending rows are isolated and
+reported as rejects; everything else still loads.
+
+    python -m app.services.ingest_service sites call_for_sites.geojson
+    python -m app.services.ingest_service planning-applications backlog.csv --mode insert
+"""
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from enum import Enum as PyEnum
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Sequence, Tuple, Type, Union
+
+from asyncpg import PostgresError
+from geoalchemy2 import Geometry
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import BigInteger, Column, MetaData, Table, Text, cast, delete, func, insert, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.types import Enum, NullType
+
+from app.config import settings
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.precedent_cases import PrecedentCase
+from app.db_models.sites import Site
+from app.models.ingest import (
+    IngestReject,
+    IngestReport,
+    PlanningApplicationImport,
+    PrecedentCaseImport,
+    SiteImport,
+)
+from app.spatial import SRID
+from app.utils import to_camel
+
+FORMATS = ("csv", "ndjson", "geojson")
+READ_CHUNK = 64 * 1024
+
+Row = Tuple[int, Union[dict, Exception]]  # (line or feature number, parsed row or parse error)
+
+
+@dataclass(frozen=True)
+class Entity:
+    name: str
+    model: Any
+    schema: Type[BaseModel]
+    natural_key: str
+    geometry_field: Optional[str] = None  # import field that takes a GeoJSON feature's geometry
+    derived: Tuple[str, ...] = ()  # columns maintained from other tables (constraint overlay, policy links)
+
+
+ENTITIES: Dict[str, Entity] = {
+    entity.name: entity
+    for entity in (
+        Entity(
+            "sites",
+            Site,
+            SiteImport,
+            "uprn",
+            geometry_field="coordinates",
+            derived=("constraints", "applicable_policies"),
+        ),
+        Entity(
+            "planning-applications",
+            PlanningApplication,
+            PlanningApplicationImport,
+            "reference_number",
+            derived=("constraints",),
+        ),
+        Entity("precedent-cases", PrecedentCase, PrecedentCaseImport, "case_reference"),
+    )
+}
+
+
+# --- streaming parsers ---------------------------------------------------------------------------
+
+
+async def iter_text(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = ""
+    async for text in iter_text(chunks):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    number = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        line = line.strip().lstrip("\x1e")  # RS-prefixed GeoJSON text sequences parse too
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as exc:
+            yield number, exc
+
+
+def _csv_value(value: Optional[str]) -> Any:
+    if value is None or value.strip() == "":
+        return None
+    value = value.strip()
+    if value[0] in "[{":
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+async def iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    header: Optional[List[str]] = None
+    record, start, number = "", 0, 0
+    async for line in iter_lines(chunks):
+        number += 1
+        if not record:
+            start = number
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue  # inside a quoted field that spans lines
+        if not record.strip():
+            record = ""
+            continue
+        values = next(csv.reader([record]))
+        record, line_number = "", start
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, ValueError(f"expected {len(header)} fields, found {len(values)}")
+            continue
+        yield line_number, {name: _csv_value(value) for name, value in zip(header, values)}
+
+
+async def iter_geojson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    """Features of a FeatureCollection, decoded one at a time without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer, position, number, in_features, done = "", 0, 0, False, False
+    text_chunks = iter_text(chunks)
+    exhausted = False
+    while not done:
+        if not in_features:
+            index = buffer.find('"features"')
+            bracket = buffer.find("[", index) if index >= 0 else -1
+            if bracket >= 0:
+                in_features, position = True, bracket + 1
+                continue
+        else:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            if position < len(buffer):
+                try:
+                    feature, end = decoder.raw_decode(buffer, position)
+                except ValueError:
+                    if exhausted:
+                        number += 1
+                        yield number, ValueError("truncated or malformed feature")
+                        return
+                else:
+                    number += 1
+                    yield number, feature
+                    buffer, position = buffer[end:], 0
+                    continue
+        if exhausted:
+            done = True
+            if not in_features:
+                yield 0, ValueError("no FeatureCollection 'features' array found")
+            continue
+        try:
+            buffer += await text_chunks.__anext__()
+        except StopAsyncIteration:
+            exhausted = True
+
+
+PARSERS = {"csv": iter_csv, "ndjson": iter_ndjson, "geojson": iter_geojson}
+
+
+def detect_format(filename_or_type: Optional[str]) -> Optional[str]:
+    name = (filename_or_type or "").lower()
+    if "geo+json" in name or name.endswith(".geojson"):
+        return "geojson"
+    if "ndjson" in name or "jsonl" in name or name.endswith(".geojsonl") or name.endswith(".geojsons"):
+        return "ndjson"
+    if "csv" in name:
+        return "csv"
+    return None
+
+
+# --- loading ---------------------------------------------------------------------------------------
+
+
+def _pg_array_literal(values: Sequence[Any]) -> str:
+    items = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'"{item}"' for item in items) + "}"
+
+
+def _load_expression(column: Column, staged):
+    """Turn a staged text value back into the target column's type."""
+    if isinstance(column.type, Geometry):
+        # NullType: keep geoalchemy from wrapping the expression in ST_AsEWKB inside INSERT ... SELECT
+        return func.ST_SetSRID(func.ST_GeomFromGeoJSON(staged), SRID, type_=NullType())
+    if column.primary_key:
+        return func.coalesce(cast(staged, column.type), func.gen_random_uuid())
+    return cast(staged, column.type)
+
+
+@dataclass
+class IngestStats:
+    rows_read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    batches: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+
+class BulkLoader:
+    def __init__(
+        self,
+        db: AsyncSession,
+        entity: Entity,
+        mode: str = "upsert",
+        batch_size: int = settings.ingest_batch_size,
+        max_rejects: int = settings.ingest_max_rejects,
+    ):
+        if mode not in ("upsert", "insert"):
+            raise ValueError("mode must be 'upsert' or 'insert'")
+        self.db = db
+        self.entity = entity
+        self.mode = mode
+        self.batch_size = batch_size
+        self.max_rejects = max_rejects
+        self.table = entity.model.__table__
+        self.columns = [
+            column
+            for column in self.table.columns
+            if not column.info.get("internal") and column.computed is None and to_camel(column.name) in entity.schema.model_fields
+        ]
+        self.stage = Table(
+            f"ingest_{self.table.name}",
+            MetaData(),
+            Column("_line", BigInteger),
+            *(Column(column.name, Text) for column in self.columns),
+            prefixes=["TEMPORARY"],
+            # Per batch: each commit can hand the session a different pooled connection
+            postgresql_on_commit="DROP",
+        )
+        self.rejects: List[IngestReject] = []
+        self.rejected = 0
+        self.stats = IngestStats()
+
+    # rows -> staging records
+
+    def prepare(self, raw: dict) -> Tuple[Optional[tuple], FrozenSet[str], List[str]]:
+        """
+        Validate one parsed row; returns the staging record and the names of
+        the columns the row supplies, or the validation errors.
+        """
+        if raw.get("type") == "Feature":
+            row = dict(raw.get("properties") or {})
+            if self.entity.geometry_field and raw.get("geometry"):
+                row[self.entity.geometry_field] = raw["geometry"]
+        else:
+            row = dict(raw)
+        row = {to_camel(key): value for key, value in row.items()}  # snake_case or camelCase headers
+        if self.entity.geometry_field and "lat" in row and "lon" in row and not row.get(self.entity.geometry_field):
+            row[self.entity.geometry_field] = {"lat": row.pop("lat"), "lon": row.pop("lon")}
+        try:
+            model = self.entity.schema.model_validate(row)
+        except ValidationError as exc:
+            return None, frozenset(), [f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in exc.errors()]
+        data = model.model_dump(mode="json")
+        record = tuple(self._stage_value(column, data.get(to_camel(column.name))) for column in self.columns)
+        present = frozenset(column.name for column in self.columns if to_camel(column.name) in model.model_fields_set)
+        return record, present, []
+
+    @staticmethod
+    def _stage_value(column: Column, value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(column.type, Geometry):
+            if isinstance(value, dict) and "lat" in value and "lon" in value:
+                value = {"type": "Point", "coordinates": [value["lon"], value["lat"]]}
+            return json.dumps(value)
+        if isinstance(column.type, Enum) and column.type.enum_class is not None:
+            return column.type.enum_class(value).name  # SQLAlchemy stores enum member names
+        if isinstance(column.type, ARRAY):
+            return _pg_array_literal(value)
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if isinstance(value, PyEnum):
+            return value.value
+        return str(value)
+
+    def reject(self, line: int, errors: List[str]) -> None:
+        self.rejected += 1
+        if len(self.rejects) < self.max_rejects:
+            self.rejects.append(IngestReject(line=line, errors=errors))
+
+    # batches -> target table
+
+    async def run(self, rows: AsyncIterator[Row]) -> IngestReport:
+        batch: List[Tuple[int, tuple]] = []
+        present: FrozenSet[str] = frozenset()
+        async for line, raw in rows:
+            self.stats.rows_read += 1
+            if isinstance(raw, Exception):
+                self.reject(line, [f"row: {raw}"])
+                continue
+            if not isinstance(raw, dict):
+                self.reject(line, ["row: expected an object"])
+                continue
+            record, fields, errors = self.prepare(raw)
+            if errors:
+                self.reject(line, errors)
+                continue
+            if batch and fields != present:
+                await self.flush(batch, present)
+                batch = []
+            batch.append((line, record))
+            present = fields
+            if len(batch) >= self.batch_size:
+                await self.flush(batch, present)
+                batch = []
+        if batch:
+            await self.flush(batch, present)
+        return self.report()
+
+    async def flush(self, batch: List[Tuple[int, tuple]], present: FrozenSet[str]) -> None:
+        """Load one batch of rows that all supply the columns in ``present``."""
+        self.stats.batches += 1
+        await self.db.execute(CreateTable(self.stage))
+        await self._load(batch, present)
+        await self.db.commit()
+
+    async def _load(self, batch: List[Tuple[int, tuple]], present: FrozenSet[str]) -> None:
+        try:
+            async with self.db.begin_nested():
+                await self._copy(batch)
+                inserted, updated = await self._merge(present)
+                await self.db.execute(delete(self.stage))
+        except (DBAPIError, PostgresError) as exc:  # COPY goes to asyncpg directly, so its errors arrive unwrapped
+            if len(batch) == 1:
+                self.reject(batch[0][0], [f"database: {str(getattr(exc, 'orig', exc)).splitlines()[0]}"])
+                return
+            middle = len(batch) // 2
+            await self._load(batch[:middle], present)
+            await self._load(batch[middle:], present)
+            return
+        self.stats.inserted += inserted
+        self.stats.updated += updated
+
+    async def _copy(self, batch: List[Tuple[int, tuple]]) -> None:
+        names = ["_line", *(column.name for column in self.columns)]
+        connection = await self.db.connection()
+        if connection.dialect.driver == "asyncpg":
+            raw = (await connection.get_raw_connection()).driver_connection
+            await raw.copy_records_to_table(self.stage.name, records=[(line, *record) for line, record in batch], columns=names)
+        else:
+            await self.db.execute(insert(self.stage), [dict(zip(names, (line, *record))) for line, record in batch])
+
+    async def _merge(self, present: FrozenSet[str]) -> Tuple[int, int]:
+        names = [column.name for column in self.columns]
+        loaded = [_load_expression(column, self.stage.c[column.name]) for column in self.columns]
+        key = self.stage.c[self.entity.natural_key]
+
+        if self.mode == "insert":
+            result = await self.db.execute(insert(self.table).from_select(names, select(*loaded)))
+            return result.rowcount, 0
+
+        # Rows without a natural key can't be matched, so they are always new
+        unkeyed = await self.db.execute(insert(self.table).from_select(names, select(*loaded).where(key.is_(None))))
+        latest = (
+            select(self.stage, func.row_number().over(partition_by=key, order_by=self.stage.c._line.desc()).label("_rank"))
+            .where(key.isnot(None))
+            .subquery()
+        )
+        keyed = select(*(_load_expression(column, latest.c[column.name]) for column in self.columns)).where(latest.c._rank == 1)
+        stmt = pg_insert(self.table).from_select(names, keyed)
+        kept = ("id", self.entity.natural_key, *self.entity.derived)
+        updates = {name: stmt.excluded[name] for name in names if name in present and name not in kept}
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.entity.natural_key],
+            index_where=self.table.c[self.entity.natural_key].isnot(None),
+            # a no-op assignment when nothing else is supplied, so matched rows still come back as updated
+            set_=updates or {self.entity.natural_key: stmt.excluded[self.entity.natural_key]},
+        ).returning(literal_column("xmax = 0"))
+        fresh = list((await self.db.execute(stmt)).scalars())
+        inserted = sum(1 for is_new in fresh if is_new)
+        return unkeyed.rowcount + inserted, len(fresh) - inserted
+
+    def report(self) -> IngestReport:
+        elapsed = time.perf_counter() - self.stats.started
+        loaded = self.stats.inserted + self.stats.updated
+        return IngestReport(
+            entity=self.entity.name,
+            mode=self.mode,
+            rowsRead=self.stats.rows_read,
+            rowsLoaded=loaded,
+            inserted=self.stats.inserted,
+            updated=self.stats.updated,
+            rejected=self.rejected,
+            rejects=self.rejects,
+            batches=self.stats.batches,
+            elapsedSeconds=round(elapsed, 3),
+            rowsPerSec=round(loaded / elapsed, 1) if elapsed else 0.0,
+        )
+
+
+async def ingest(
+    db: AsyncSession, entity: str, fmt: str, chunks: AsyncIterator[bytes], mode: str = "upsert", **options
+) -> IngestReport:
+    if entity not in ENTITIES:
+        raise ValueError(f"unknown entity {entity!r}; expected one of {', '.join(ENTITIES)}")
+    if fmt not in PARSERS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    return await BulkLoader(db, ENTITIES[entity], mode=mode, **options).run(PARSERS[fmt](chunks))
+
+
+async def read_file(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as fh:
+        while True:
+            chunk = await asyncio.to_thread(fh.read, READ_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def main() -> None:
+    from app.db import JobSessionLocal, job_engine
+
+    parser = argparse.ArgumentParser(description="Bulk-load sites, planning applications or precedent cases")
+    parser.add_argument("entity", choices=sorted(ENTITIES))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--mode", choices=("upsert", "insert"), default="upsert")
+    parser.add_argument("--batch-size", type=int, default=settings.ingest_batch_size)
+    args = parser.parse_args()
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("can't tell the format from the file name; pass --format")
+    async with JobSessionLocal() as db:
+        report = await ingest(db, args.entity, fmt, read_file(args.path), mode=args.mode, batch_size=args.batch_size)
+    print(report.model_dump_json(indent=2))
+    await job_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""
+Chat model clients behind one small interface.
+
+``get_model_client()`` returns the client selected by ``Settings.llm_backend``.
+``FakeModelClient`` answers deterministically from a digest of the prompt
+after a configurable delay, so local runs, the job subsystem and the cache
+benchmark work offline with realistic latency and no cost.
+"""
+import asyncio
+import hashlib
+from functools import lru_cache
+from typing import Optional, Protocol
+
+from app.config import settings
+
+FAKE_TOPICS = ("Clarity", "Evidence", "Consistency", "Deliverability", "Soundness", "Monitoring")
+
+
+class ModelClient(Protocol):
+    name: str  # model and version; part of every cache key
+
+    async def complete(self, prompt: str, system: Optional[str] = None, max_tokens: int = 1024) -> str:
+        ...
+
+
+class FakeModelClient:
+    def __init__(self, latency: float = 0.0, name: str = "fake-1"):
+        self.latency = latency
+        self.name = name
+        self.calls = 0
+
+    async def complete(self, prompt: str, system: Optional[str] = None, max_tokens: int = 1024) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        digest = hashlib.blake2b(f"{system}\n{prompt}".encode(), digest_size=16).digest()
+        lines = []
+        for i in range(3):
+            topic = FAKE_TOPICS[digest[i] % len(FAKE_TOPICS)]
+            lines.append(f"{topic}: generated note {digest[3 + i]:02x} on {prompt.splitlines()[0][:60]}")
+        return "\n".join(lines)
+
+
+class OpenAIModelClient:
+    def __init__(self, model: str = settings.llm_model):
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.model = model
+        self.name = f"openai-{model}"
+
+    async def complete(self, prompt: str, system: Optional[str] = None, max_tokens: int = 1024) -> str:
+        messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+        response = await self.client.chat.completions.create(
+            model=self.model, messages=messages, max_tokens=max_tokens, temperature=0
+        )
+        return response.choices[0].message.content or ""
+
+
+@lru_cache()
+def get_model_client() -> ModelClient:
+    if settings.llm_backend == "openai":
+        return OpenAIModelClient()
+    return FakeModelClient(latency=settings.llm_fake_latency)
@@ -0,0 +1,205 @@
+"""
+Response cache and request coalescing for model calls.
+
+Keys hash the task name, its *normalised* inputs (NFC, collapsed whitespace,
+sorted mappings), the model name and the prompt version, so the same policy
+wording re-opened by several officers is one upstream call, while a new
+model or prompt template misses cleanly.
+
+Lookups go memory (TTL + LRU) → optional shared tier (disk or Redis) →
+upstream. Concurrent misses on one key share a single in-flight call
+(single-flight); a waiter that disconnects doesn't cancel it for the others.
+Failures are never cached.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+
+_SPACE = re.compile(r"\s+")
+
+
+def normalise(value: Any) -> Any:
+    if isinstance(value, str):
+        return _SPACE.sub(" ", unicodedata.normalize("NFC", value)).strip()
+    if isinstance(value, dict):
+        return {str(k): normalise(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [normalise(v) for v in value]
+    return value
+
+
+def cache_key(task: str, inputs: dict, model: str, prompt_version: str) -> str:
+    payload = json.dumps(
+        {"task": task, "inputs": normalise(inputs), "model": model, "prompt": prompt_version},
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    tier_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.tier_hits + self.misses + self.coalesced
+        return (self.hits + self.tier_hits + self.coalesced) / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "tierHits": self.tier_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hitRate": round(self.hit_rate, 4),
+        }
+
+
+class TTLLRU:
+    def __init__(self, maxsize: int = 2048, ttl: float = 86400):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+class DiskTier:
+    """One JSON file per key under ``directory``, sharded by key prefix; survives restarts."""
+
+    def __init__(self, directory: str, ttl: float = 86400):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _read(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        return entry["value"] if entry["expires"] > time.time() else None
+
+    def _write(self, key: str, value: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"expires": time.time() + self.ttl, "value": value}, fh)
+        os.replace(tmp, path)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self._write, key, value)
+
+
+class RedisTier:
+    def __init__(self, url: str, ttl: int = 86400, prefix: str = "tpa:llm:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        raw = await self.client.get(self.prefix + key)
+        return raw.decode() if raw is not None else None
+
+    async def set(self, key: str, value: str) -> None:
+        await self.client.set(self.prefix + key, value, ex=self.ttl)
+
+
+class LLMCache:
+    def __init__(self, memory: Optional[TTLLRU] = None, tier=None):
+        self.memory = memory or TTLLRU()
+        self.tier = tier
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.stats = CacheStats()
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]], refresh: bool = False) -> str:
+        """
+        The cached value for ``key``, or ``compute()`` stored under it. With
+        ``refresh`` the cached value is ignored and replaced by a new one.
+        """
+        if refresh:
+            future = asyncio.ensure_future(self._fill(key, compute, refresh=True))
+            self.inflight[key] = future
+            future.add_done_callback(lambda done: self.inflight.pop(key, None) if self.inflight.get(key) is done else None)
+            return await asyncio.shield(future)
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats.hits += 1
+            return value
+        future = self.inflight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(self._fill(key, compute))
+        self.inflight[key] = future
+        future.add_done_callback(lambda done: self.inflight.pop(key, None) if self.inflight.get(key) is done else None)
+        return await asyncio.shield(future)
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[str]], refresh: bool = False) -> str:
+        if self.tier is not None and not refresh:
+            value = await self.tier.get(key)
+            if value is not None:
+                self.stats.tier_hits += 1
+                self.memory.set(key, value)
+                return value
+        self.stats.misses += 1
+        try:
+            value = await compute()
+        except Exception:
+            self.stats.errors += 1
+            raise
+        self.memory.set(key, value)
+        if self.tier is not None:
+            await self.tier.set(key, value)
+        return value
+
+
+def build_llm_cache() -> LLMCache:
+    memory = TTLLRU(settings.llm_cache_size, settings.llm_cache_ttl)
+    tier = None
+    if settings.llm_cache_tier == "redis" and settings.redis_url:
+        tier = RedisTier(settings.redis_url, ttl=settings.llm_cache_ttl)
+    elif settings.llm_cache_tier == "disk":
+        tier = DiskTier(settings.llm_cache_dir, ttl=settings.llm_cache_ttl)
+    return LLMCache(memory, tier)
+
+
+llm_cache = build_llm_cache()
@@ -0,0 +1,349 @@
+"""
+Officer report engine: independent sections, each cached by its input fingerprint.
+
+A report is the sections in ``SECTIONS``. Each one reads only the context
+kinds it needs: ``ReportContextBuilder.candidates`` gathers and ranks the
+material once, then every section packs its own ``report_section_tokens``
+budget. The recommendation also reads the finished constraints, policy and
+precedent sections. A section's fingerprint hashes everything its output
+depends on (prompt version, model, rendered prompt) and is stored with it in
+``officer_reports.sections``.
+
+Regenerating re-renders only the sections whose fingerprint moved and keeps
+the rest, so an edit to one cited policy re-renders the policy assessment and
+compliance flags, then the recommendation, but not the site, constraints or
+precedent sections. ``force`` re-renders every section, bypassing the LLM
+cache too. Sections run concurrently (``report_section_concurrency``
+at a time), a dependent section starting as soon as its inputs are done.
+
+ORM commits that change an application's facts, or the text of a policy it
+cites, queue an ``officer_report_refresh`` job for the affected reports that
+aren't Final (``report_auto_refresh``).
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import Integer, String, case, cast, event, inspect, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.crud.officer_reports import OfficerReportCRUD
+from app.db import AsyncSessionLocal
+from app.db_models.links import ApplicationPolicy
+from app.db_models.officer_reports import OfficerReport
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.policies import Policy
+from app.jobs import JobContext, job_handler
+from app.models.officer_reports import OfficerReportGeneration
+from app.services.ai_service import PROMPT_VERSION, AIService
+from app.services.embedding_pipeline import content_hash
+from app.services.report_context import BuiltContext, ContextChunk, ReportContextBuilder, pack
+
+logger = logging.getLogger(__name__)
+
+FINAL = "Final"  # reports in this status are never regenerated automatically
+APPLICATION_FIELDS = (
+    "reference_number",
+    "address",
+    "site_id",
+    "site_description",
+    "proposal_details",
+    "application_type",
+    "constraints",
+    "relevant_policies",
+    "linked_precedents",
+)
+POLICY_FIELDS = ("reference", "title", "wording", "supporting_text")
+
+
+@dataclass(frozen=True)
+class SectionSpec:
+    id: str
+    title: str
+    kinds: Tuple[str, ...]  # context chunk kinds the section reads
+    instruction: str
+    depends_on: Tuple[str, ...] = ()  # sections whose finished text is part of the input
+
+
+# In report order; a section may only depend on sections listed before it
+SECTIONS = (
+    SectionSpec(
+        "site_description",
+        "Site and proposal",
+        ("application",),
+        "Describe the site, its surroundings and the proposed development.",
+    ),
+    SectionSpec(
+        "constraints",
+        "Constraints",
+        ("application", "constraint"),
+        "Assess the proposal against each constraint affecting the site.",
+    ),
+    SectionSpec(
+        "policy_assessment",
+        "Policy assessment",
+        ("application", "policy", "plan_section"),
+        "Assess the proposal against each development plan policy in turn, citing it.",
+    ),
+    SectionSpec(
+        "precedents",
+        "Planning history and precedents",
+        ("application", "precedent"),
+        "Summarise the relevant precedent decisions and what they imply for this proposal.",
+    ),
+    SectionSpec(
+        "compliance_flags",
+        "Policy compliance",
+        ("application", "policy"),
+        "For each policy, write one line `Policy reference: met` or `Policy reference: not met`.",
+    ),
+    SectionSpec(
+        "recommendation",
+        "Recommendation",
+        ("application",),
+        "Weigh the assessments above in the planning balance and recommend approval or refusal, with reasons.",
+        depends_on=("constraints", "policy_assessment", "precedents"),
+    ),
+)
+
+
+def parse_flags(text: str) -> List[dict]:
+    """``reference: met`` / ``reference: not met`` lines into ``{flag, met}``; other lines are ignored."""
+    flags = []
+    for line in filter(None, (line.strip(" -*\t") for line in text.splitlines())):
+        flag, sep, verdict = line.rpartition(":")
+        if sep and flag.strip():
+            verdict = verdict.strip().lower()
+            flags.append({"flag": flag.strip(), "met": verdict.startswith(("met", "yes", "compliant"))})
+    return flags
+
+
+class OfficerReportEngine:
+    def __init__(
+        self,
+        sessions=AsyncSessionLocal,
+        builder: Optional[ReportContextBuilder] = None,
+        ai: Optional[AIService] = None,
+        budget: int = settings.report_section_tokens,
+        concurrency: int = settings.report_section_concurrency,
+        sections: Sequence[SectionSpec] = SECTIONS,
+    ):
+        self.sessions = sessions
+        self.builder = builder or ReportContextBuilder()
+        self.ai = ai or AIService()
+        self.budget = budget
+        self.concurrency = concurrency
+        self.sections = sections
+
+    def prompt(self, spec: SectionSpec, application_id: UUID, context: str, inputs: Sequence[dict]) -> str:
+        parts = [
+            f"Write the '{spec.title}' section of the delegated officer report for application {application_id}, "
+            "using only the material below and citing it by the bracketed references. "
+            f"{spec.instruction}",
+            context,
+        ]
+        parts.extend(f"## {section['title']}\n{section['content']}" for section in inputs)
+        return "\n\n".join(filter(None, parts))
+
+    def fingerprint(self, prompt: str) -> str:
+        return content_hash(f"{PROMPT_VERSION}\n{self.ai.client.name}\n{prompt}")
+
+    async def generate(
+        self,
+        application_id: UUID,
+        on_section: Optional[Callable[[dict], Awaitable[None]]] = None,
+        force: bool = False,
+    ) -> Optional[OfficerReportGeneration]:
+        """
+        Render the sections whose inputs changed since the stored report (all of
+        them with ``force``) and save it; None if the application doesn't exist.
+        Each newly rendered section is passed to ``on_section`` as soon as it is ready.
+        """
+        ranked = await self.builder.candidates(application_id)
+        if ranked is None:
+            return None
+        async with self.sessions() as db:
+            existing = (
+                await db.execute(select(OfficerReport.__table__).where(OfficerReport.application_id == application_id))
+            ).mappings().first()
+        stored = {s.get("id"): s for s in (existing["sections"] if existing else None) or [] if isinstance(s, dict)}
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        rendered: List[str] = []
+        tasks: Dict[str, asyncio.Future] = {}
+
+        async def run(spec: SectionSpec, order: int) -> dict:
+            inputs = [await tasks[name] for name in spec.depends_on]
+            context = self._context(application_id, ranked, spec.kinds).render()
+            prompt = self.prompt(spec, application_id, context, inputs)
+            fingerprint = self.fingerprint(prompt)
+            old = stored.get(spec.id)
+            if not force and old is not None and old.get("fingerprint") == fingerprint:
+                return {**old, "title": spec.title, "order": order}
+            async with semaphore:
+                content = await self.ai.complete(
+                    "report_section", {"section": spec.id, "fingerprint": fingerprint}, prompt, refresh=force
+                )
+            section = {
+                "id": spec.id,
+                "title": spec.title,
+                "content": content,
+                "order": order,
+                "fingerprint": fingerprint,
+            }
+            rendered.append(spec.id)
+            if on_section is not None:
+                await on_section(section)
+            return section
+
+        # Every task exists before any of them runs, so dependents can await their inputs
+        for order, spec in enumerate(self.sections, start=1):
+            tasks[spec.id] = asyncio.ensure_future(run(spec, order))
+        try:
+            sections = list(await asyncio.gather(*tasks.values()))
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        async with self.sessions() as db:
+            if existing is not None and not rendered and existing["sections"] == sections:
+                report = OfficerReportCRUD(db).to_api(existing)
+            else:
+                report = await self._save(db, application_id, sections)
+        reused = [section["id"] for section in sections if section["id"] not in rendered]
+        return OfficerReportGeneration(report=report, rendered=rendered, reused=reused)
+
+    def _context(self, application_id: UUID, ranked: Sequence[ContextChunk], kinds: Iterable[str]) -> BuiltContext:
+        kinds = set(kinds)
+        return pack(BuiltContext(application_id, self.budget), [chunk for chunk in ranked if chunk.kind in kinds])
+
+    @staticmethod
+    async def _save(db, application_id: UUID, sections: List[dict]) -> dict:
+        """Upsert the report; the version is bumped in the same statement, so concurrent saves never share one."""
+        by_id = {section["id"]: section for section in sections}
+        values = {
+            "application_id": application_id,
+            "version": "1",
+            "sections": sections,
+            "last_modified": datetime.utcnow(),
+            "status": "Draft",
+        }
+        if "recommendation" in by_id:
+            values["recommendation"] = by_id["recommendation"]["content"]
+        if "compliance_flags" in by_id:
+            values["compliance_flags"] = parse_flags(by_id["compliance_flags"]["content"])
+        stmt = pg_insert(OfficerReport).values(**values)
+        version = OfficerReport.__table__.c.version
+        bumped = case(
+            (version.regexp_match("^[0-9]+$"), cast(cast(version, Integer) + 1, String)), else_=literal("1")
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["application_id"],
+            set_={
+                **{name: stmt.excluded[name] for name in values if name not in ("application_id", "status")},
+                "version": bumped,
+            },
+        ).returning(*OfficerReport.__table__.c)
+        row = (await db.execute(stmt)).mappings().one()
+        await db.commit()
+        return OfficerReportCRUD(db).to_api(row)
+
+    async def affected(self, application_ids: Iterable[Any] = (), policy_ids: Iterable[Any] = ()) -> List[UUID]:
+        """Applications with a report that isn't Final among ``application_ids`` or citing ``policy_ids``."""
+        application_ids, policy_ids = list(application_ids), list(policy_ids)
+        if not application_ids and not policy_ids:
+            return []
+        async with self.sessions() as db:
+            matches = [OfficerReport.application_id.in_(application_ids)]
+            if policy_ids:
+                references = select(Policy.reference).where(Policy.id.in_(policy_ids))
+                citing = select(ApplicationPolicy.application_id).where(
+                    or_(ApplicationPolicy.policy_id.in_(policy_ids), ApplicationPolicy.policy_reference.in_(references))
+                )
+                matches.append(OfficerReport.application_id.in_(citing))
+            stmt = select(OfficerReport.application_id).where(or_(*matches), OfficerReport.status != FINAL)
+            return list((await db.execute(stmt)).scalars())
+
+
+async def _emit_section(ctx: JobContext, section: dict) -> None:
+    await ctx.delta(f"## {section['title']}\n\n{section['content']}\n\n", section["id"])
+
+
+@job_handler("officer_report")
+async def officer_report_job(params: dict, ctx: JobContext) -> OfficerReportGeneration:
+    application_id = params["applicationId"]
+    result = await OfficerReportEngine().generate(
+        UUID(application_id),
+        on_section=lambda section: _emit_section(ctx, section),
+        force=bool(params.get("force")),
+    )
+    if result is None:
+        raise LookupError(f"Planning application {application_id} not found")
+    return result
+
+
+@job_handler("officer_report_refresh")
+async def officer_report_refresh_job(params: dict, ctx: JobContext) -> dict:
+    engine = OfficerReportEngine()
+    application_ids = await engine.affected(params.get("applicationIds") or (), params.get("policyIds") or ())
+    rendered = 0
+    for done, application_id in enumerate(application_ids, start=1):
+        result = await engine.generate(application_id)
+        rendered += len(result.rendered) if result else 0
+        await ctx.progress(done, len(application_ids), str(application_id))
+    return {"reports": len(application_ids), "renderedSections": rendered}
+
+
+def _changed(obj: Any, fields: Sequence[str]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in fields)
+
+
+def _log_unqueued(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Officer report refresh not queued: %s", task.exception())
+
+
+def register_report_refresh(submit) -> None:
+    """
+    Queue an ``officer_report_refresh`` job (via ``submit(kind, params)``)
+    after a session commits changes to an application's facts or a policy's text.
+    """
+    if not settings.report_auto_refresh:
+        return
+
+    @event.listens_for(Session, "after_flush")
+    def collect(session, flush_context):
+        applications: Set[str] = session.info.setdefault("officer_report_applications", set())
+        policies: Set[str] = session.info.setdefault("officer_report_policies", set())
+        for obj in (*session.dirty, *session.deleted):
+            deleted = obj in session.deleted
+            if isinstance(obj, PlanningApplication) and not deleted and _changed(obj, APPLICATION_FIELDS):
+                applications.add(str(obj.id))
+            elif isinstance(obj, Policy) and (deleted or _changed(obj, POLICY_FIELDS)):
+                policies.add(str(obj.id))
+
+    @event.listens_for(Session, "after_commit")
+    def queue(session):
+        applications = session.info.pop("officer_report_applications", None)
+        policies = session.info.pop("officer_report_policies", None)
+        if not applications and not policies:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop to run it on (sync scripts); the next generation picks the change up
+        params = {"applicationIds": sorted(applications or ()), "policyIds": sorted(policies or ())}
+        task = loop.create_task(submit("officer_report_refresh", params))
+        task.add_done_callback(_log_unqueued)
+
+    @event.listens_for(Session, "after_rollback")
+    def discard(session):
+        session.info.pop("officer_report_applications", None)
+        session.info.pop("officer_report_policies", None)
@@ -0,0 +1,97 @@
+import re
+from typing import Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.plan_documents import DocumentNodeCRUD, PlanDocumentCRUD
+from app.models.shared import DocumentNodeTypeEnum
+from app.utils import row_to_api
+
+_ORDER_PART = re.compile(r"(\d+)")
+
+
+def order_key(order: Optional[str]) -> tuple:
+    """Natural sort key for the free-text ``order`` column ("2" < "10", "3.2" < "3.10")."""
+    if order is None:
+        return (1,)
+    return (0,) + tuple(int(p) if p.isdigit() else p for p in _ORDER_PART.split(order) if p)
+
+
+def build_tree(rows: Iterable[dict], max_depth: Optional[int] = None) -> List[dict]:
+    """
+    Assemble flat CTE rows into nested ``DocumentNode`` dicts in a single pass.
+
+    Nodes at ``max_depth`` get ``children=None`` (not loaded, expand via the
+    subtree endpoint); every other node gets a list, empty for leaves.
+    Returns the nodes whose parent isn't in ``rows``, i.e. the starting level.
+    """
+    by_id = {}
+    parents = []
+    for row in rows:
+        row = dict(row)
+        parent_id = row.pop("parent_id")
+        order = row.pop("order")
+        depth = row.pop("depth")
+        node = row_to_api(row)
+        node["children"] = None if max_depth is not None and depth >= max_depth else []
+        by_id[row["id"]] = (node, order)
+        parents.append((row["id"], parent_id))
+
+    roots = []
+    for node_id, parent_id in parents:
+        entry = by_id[node_id]
+        parent = by_id.get(parent_id)
+        if parent is None:
+            roots.append(entry)
+        elif parent[0]["children"] is not None:
+            parent[0]["children"].append(entry)
+
+    for node, _ in by_id.values():
+        if node["children"]:
+            node["children"] = [child for child, _ in sorted(node["children"], key=lambda e: order_key(e[1]))]
+    return [node for node, _ in sorted(roots, key=lambda e: order_key(e[1]))]
+
+
+def document_root(document: dict, top: List[dict]) -> dict:
+    """The tree's own DocumentRoot node, or a synthetic one over the top-level nodes."""
+    if len(top) == 1 and top[0]["type"] == DocumentNodeTypeEnum.DocumentRoot.value:
+        return top[0]
+    return {
+        "id": document["id"],
+        "title": document["name"],
+        "type": DocumentNodeTypeEnum.DocumentRoot.value,
+        "children": top,
+    }
+
+
+class PlanDocumentService:
+    def __init__(self, db: AsyncSession):
+        self.documents = PlanDocumentCRUD(db)
+        self.nodes = DocumentNodeCRUD(db)
+
+    async def get_document(
+        self, document_id: UUID, depth: Optional[int] = None, include_content: bool = True
+    ) -> Optional[dict]:
+        """A ``PlanDocument`` with its node tree loaded in one query."""
+        document = await self.documents.get(document_id)
+        if document is None:
+            return None
+        rows = await self.nodes.fetch_tree_rows(
+            document_id, max_depth=depth, include_content=include_content
+        )
+        return {**document, "rootNode": document_root(document, build_tree(rows, depth))}
+
+    async def get_subtree(
+        self,
+        document_id: UUID,
+        node_id: UUID,
+        depth: Optional[int] = None,
+        include_content: bool = True,
+    ) -> Optional[dict]:
+        """The node ``node_id`` with descendants down to ``depth`` levels below it."""
+        rows = await self.nodes.fetch_tree_rows(
+            document_id, root_id=node_id, max_depth=depth, include_content=include_content
+        )
+        top = build_tree(rows, depth)
+        return top[0] if top else None
@@ -0,0 +1,263 @@
+"""
+Plan document versions: node-level deltas over content-addressed bodies.
+
+Committing a version (Regulation 18, Regulation 19, ...) snapshots the live
+``document_nodes`` of a document. A node's body (its fields other than
+placement and ``last_modified``) is stored once in ``document_node_bodies``
+under the sha256 of its canonical JSON, so an unchanged paragraph costs
+nothing however many versions carry it. ``document_version_nodes`` gets one
+row per node that was added, edited or moved since the previous version, and
+a tombstone (``body_hash`` NULL) per node that was removed.
+
+A node's state at version ``n`` is its latest delta row at or before ``n``,
+so any version can be rebuilt with one windowed read. Diffing ``a`` against
+``b`` only looks at the nodes with delta rows in between; everything else is
+identical by construction, so the work is linear in the changed nodes, not
+in the size of the document.
+"""
+import difflib
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db_models.plan_documents import DocumentNode, PlanDocument
+from app.db_models.plan_versions import DocumentNodeBody, DocumentVersion, DocumentVersionNode
+from app.models.plan_documents import DocumentDiff, NodeChange
+from app.services.plan_documents_service import build_tree, document_root, order_key
+from app.utils import jsonable, row_to_api, to_camel
+
+# Node columns that make up a body; placement (parent_id, order) is kept per delta row
+BODY_FIELDS = ("title", "type", "reference", "content", "unresolved_issues", "linked_entities", "author")
+
+
+def body_of(row: Any) -> dict:
+    return {name: jsonable(row[name]) for name in BODY_FIELDS}
+
+
+def body_hash(body: dict) -> str:
+    """sha256 of the body's canonical JSON (sorted keys, no whitespace)."""
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def text_diff(before: Optional[str], after: Optional[str]) -> List[str]:
+    return list(
+        difflib.unified_diff(
+            (before or "").splitlines(), (after or "").splitlines(), "before", "after", lineterm=""
+        )
+    )
+
+
+class PlanVersionService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def list_versions(self, document_id: Any) -> List[dict]:
+        stmt = (
+            select(DocumentVersion.__table__)
+            .where(DocumentVersion.document_id == document_id)
+            .order_by(DocumentVersion.number)
+        )
+        return [self._version(row) for row in (await self.db.execute(stmt)).mappings()]
+
+    async def get_version(self, document_id: Any, number: int) -> Optional[dict]:
+        stmt = select(DocumentVersion.__table__).where(
+            DocumentVersion.document_id == document_id, DocumentVersion.number == number
+        )
+        row = (await self.db.execute(stmt)).mappings().first()
+        return None if row is None else dict(row)
+
+    async def latest_number(self, document_id: Any) -> int:
+        stmt = select(func.max(DocumentVersion.number)).where(DocumentVersion.document_id == document_id)
+        return (await self.db.execute(stmt)).scalar() or 0
+
+    async def state(
+        self, document_id: Any, number: int, node_ids: Optional[Sequence[Any]] = None
+    ) -> Dict[Any, dict]:
+        """node id -> {parent_id, order, body_hash} as of version ``number``, live nodes only."""
+        if number <= 0 or node_ids is not None and not node_ids:
+            return {}
+        nodes = DocumentVersionNode.__table__
+        rank = func.row_number().over(partition_by=nodes.c.node_id, order_by=nodes.c.number.desc())
+        latest = select(
+            nodes.c.node_id, nodes.c.parent_id, nodes.c.order, nodes.c.body_hash, rank.label("rank")
+        ).where(nodes.c.document_id == document_id, nodes.c.number <= number)
+        if node_ids is not None:
+            latest = latest.where(nodes.c.node_id.in_(node_ids))
+        latest = latest.subquery()
+        stmt = select(latest.c.node_id, latest.c.parent_id, latest.c.order, latest.c.body_hash).where(
+            latest.c.rank == 1, latest.c.body_hash.is_not(None)
+        )
+        return {row["node_id"]: dict(row) for row in (await self.db.execute(stmt)).mappings()}
+
+    async def bodies(self, hashes: Iterable[str]) -> Dict[str, dict]:
+        hashes = list(set(hashes))
+        if not hashes:
+            return {}
+        stmt = select(DocumentNodeBody.hash, DocumentNodeBody.body).where(DocumentNodeBody.hash.in_(hashes))
+        return {row.hash: row.body for row in await self.db.execute(stmt)}
+
+    async def commit(
+        self, document_id: Any, label: Optional[str] = None, author: Optional[str] = None
+    ) -> Optional[dict]:
+        """Snapshot the live document as the next version; None if the document doesn't exist."""
+        document = (
+            await self.db.execute(
+                select(PlanDocument.name, PlanDocument.type, PlanDocument.version, PlanDocument.document_status)
+                .where(PlanDocument.id == document_id)
+                .with_for_update()  # serialises commits of the same document
+            )
+        ).first()
+        if document is None:
+            return None
+        previous = await self.latest_number(document_id)
+        number = previous + 1
+        before = await self.state(document_id, previous)
+
+        columns = [DocumentNode.__table__.c[name] for name in ("id", "parent_id", "order", *BODY_FIELDS)]
+        live = (
+            await self.db.execute(select(*columns).where(DocumentNode.document_id == document_id))
+        ).mappings().all()
+
+        bodies: Dict[str, dict] = {}
+        deltas: List[dict] = []
+        for row in live:
+            body = body_of(row)
+            digest = body_hash(body)
+            old = before.pop(row["id"], None)
+            if old is not None and (old["body_hash"], old["parent_id"], old["order"]) == (
+                digest, row["parent_id"], row["order"]
+            ):
+                continue
+            if old is None or old["body_hash"] != digest:
+                bodies[digest] = body
+            deltas.append(
+                {"node_id": row["id"], "parent_id": row["parent_id"], "order": row["order"], "body_hash": digest}
+            )
+        # Whatever is left of the previous state has been deleted since
+        deltas.extend({"node_id": node_id, "parent_id": None, "order": None, "body_hash": None} for node_id in before)
+
+        if bodies:
+            await self.db.execute(
+                pg_insert(DocumentNodeBody).on_conflict_do_nothing(index_elements=["hash"]),
+                [{"hash": digest, "body": body} for digest, body in bodies.items()],
+            )
+        await self.db.execute(
+            insert(DocumentVersion).values(
+                document_id=document_id,
+                number=number,
+                label=label,
+                author=author,
+                meta={
+                    "name": document.name,
+                    "type": document.type,
+                    "version": document.version,
+                    "documentStatus": document.document_status,
+                },
+                node_count=len(live),
+                changed_nodes=len(deltas),
+            )
+        )
+        if deltas:
+            await self.db.execute(
+                insert(DocumentVersionNode),
+                [{"document_id": document_id, "number": number, **delta} for delta in deltas],
+            )
+        await self.db.commit()
+        return self._version(await self.get_version(document_id, number))
+
+    async def reconstruct(self, document_id: Any, number: int) -> Optional[dict]:
+        """The document as committed in version ``number``, shaped like ``PlanDocument``."""
+        version = await self.get_version(document_id, number)
+        if version is None:
+            return None
+        nodes = await self.state(document_id, number)
+        bodies = await self.bodies(node["body_hash"] for node in nodes.values())
+        rows = [
+            {
+                "id": node_id,
+                "parent_id": node["parent_id"],
+                "order": node["order"],
+                "depth": 0,
+                **bodies[node["body_hash"]],
+                "last_modified": None,
+            }
+            for node_id, node in nodes.items()
+        ]
+        meta = version["meta"] or {}
+        document = {
+            "id": str(document_id),
+            "name": meta.get("name"),
+            "type": meta.get("type"),
+            "version": meta.get("version"),
+            "documentStatus": meta.get("documentStatus"),
+        }
+        return {**document, "rootNode": document_root(document, build_tree(rows))}
+
+    async def diff(self, document_id: Any, from_version: int, to_version: int) -> Optional[DocumentDiff]:
+        """Structural and text changes from ``from_version`` to ``to_version`` (either order)."""
+        for number in {from_version, to_version}:
+            if await self.get_version(document_id, number) is None:
+                return None
+        low, high = sorted((from_version, to_version))
+        nodes = DocumentVersionNode.__table__
+        changed = (
+            await self.db.execute(
+                select(nodes.c.node_id)
+                .where(nodes.c.document_id == document_id, nodes.c.number > low, nodes.c.number <= high)
+                .distinct()
+            )
+        ).scalars().all()
+        before = await self.state(document_id, from_version, changed)
+        after = await self.state(document_id, to_version, changed)
+        bodies = await self.bodies(node["body_hash"] for node in (*before.values(), *after.values()))
+
+        changes: List[NodeChange] = []
+        for node_id in changed:
+            old, new = before.get(node_id), after.get(node_id)
+            if old is None and new is None:
+                continue  # added and removed again in between
+            old_body = bodies[old["body_hash"]] if old else None
+            new_body = bodies[new["body_hash"]] if new else None
+            label = new_body or old_body
+            change = {"nodeId": str(node_id), "title": label["title"], "reference": label["reference"]}
+            if old is None:
+                changes.append(
+                    NodeChange(change="added", toParentId=jsonable(new["parent_id"]), toOrder=new["order"], **change)
+                )
+                continue
+            if new is None:
+                changes.append(
+                    NodeChange(
+                        change="removed", fromParentId=jsonable(old["parent_id"]), fromOrder=old["order"], **change
+                    )
+                )
+                continue
+            placement = {
+                "fromParentId": jsonable(old["parent_id"]),
+                "toParentId": jsonable(new["parent_id"]),
+                "fromOrder": old["order"],
+                "toOrder": new["order"],
+            }
+            if old["body_hash"] != new["body_hash"]:
+                fields = [to_camel(name) for name in BODY_FIELDS if old_body.get(name) != new_body.get(name)]
+                diff = text_diff(old_body.get("content"), new_body.get("content")) if "content" in fields else None
+                changes.append(NodeChange(change="modified", fields=fields, textDiff=diff, **placement, **change))
+            elif (old["parent_id"], old["order"]) != (new["parent_id"], new["order"]):
+                changes.append(NodeChange(change="moved", **placement, **change))
+
+        changes.sort(key=lambda c: (order_key(c.reference), c.title or "", c.nodeId))
+        kinds = ("added", "removed", "modified", "moved")
+        counts = {kind: sum(1 for c in changes if c.change == kind) for kind in kinds}
+        return DocumentDiff(
+            documentId=str(document_id), fromVersion=from_version, toVersion=to_version, changes=changes, **counts
+        )
+
+    @staticmethod
+    def _version(row: dict) -> dict:
+        row = {key: value for key, value in row.items() if key != "meta"}
+        return row_to_api(row)
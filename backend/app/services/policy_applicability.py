@@ -0,0 +1,207 @@
+"""
+Policy applicability: which policies apply to a site.
+
+A policy applies to a site when one of its ``affected_site_categories``
+matches one of the site's categories: its proposed use, ``parish:<name>``, or
+the type or name of a constraint its geometry overlaps (from the
+``site_constraints`` overlay, so spatial policy areas count as soon as the
+overlay job has run). A policy without categories applies plan-wide. Only
+policies in ``policy_applicable_statuses`` (Adopted by default) apply.
+
+The resolver keeps an inverted index from casefolded category to the ids of
+the applicable policies listing it. Resolving a site is then two indexed
+reads for its categories plus one dictionary lookup per category. Results
+carry each policy's reference, not a copy of it, so nothing goes stale.
+
+Committed ORM writes that change a policy's status, categories or labels
+mark it dirty. The next read removes its old postings and re-adds it if it
+still applies, so a policy being adopted or archived costs one row read.
+A full rebuild happens every ``policy_index_ttl`` seconds.
+"""
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db_models.constraints import Constraint
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.policies import Policy
+from app.db_models.site_constraints import SiteConstraint
+from app.db_models.sites import Site
+from app.models.policies import ApplicablePolicy, PolicyApplicability
+from app.models.shared import PolicyStatus
+from app.services.scenarios_service import site_categories
+
+# Policy attributes the index holds; writes to anything else leave it alone
+INDEX_FIELDS = ("status", "affected_site_categories", "reference", "title")
+
+
+class PolicyIndex:
+    """Inverted index: casefolded category -> ids of applicable policies listing it."""
+
+    def __init__(self, statuses: Iterable[str] = settings.policy_applicable_statuses):
+        self.statuses = {PolicyStatus(status) for status in statuses}
+        self.postings: Dict[str, Set[str]] = {}
+        self.general: Set[str] = set()  # applicable policies without categories
+        self.keys: Dict[str, Tuple[str, ...]] = {}  # policy id -> the categories it is posted under
+        self.labels: Dict[str, dict] = {}  # policy id -> reference, title, status
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, policies: Sequence[dict]) -> "PolicyIndex":
+        index = cls()
+        index.apply([], policies)
+        return index
+
+    def remove(self, policy_id: str) -> None:
+        for category in self.keys.pop(policy_id, ()):
+            posting = self.postings.get(category)
+            if posting is not None:
+                posting.discard(policy_id)
+                if not posting:
+                    del self.postings[category]
+        self.general.discard(policy_id)
+        self.labels.pop(policy_id, None)
+
+    def add(self, row: dict) -> None:
+        policy_id = str(row["id"])
+        self.remove(policy_id)
+        if PolicyStatus(row["status"]) not in self.statuses:
+            return
+        categories = tuple({c.casefold() for c in row["affected_site_categories"] or () if c})
+        self.keys[policy_id] = categories
+        for category in categories:
+            self.postings.setdefault(category, set()).add(policy_id)
+        if not categories:
+            self.general.add(policy_id)
+        self.labels[policy_id] = {"reference": row["reference"], "title": row["title"], "status": row["status"]}
+
+    def apply(self, changed: Iterable[Any], policies: Sequence[dict]) -> None:
+        """Re-index ``policies`` and drop ``changed`` ids that have no row (deleted)."""
+        for policy_id in changed:
+            self.remove(str(policy_id))
+        for row in policies:
+            self.add(row)
+
+    def lookup(self, categories: Iterable[str]) -> Dict[str, List[str]]:
+        """Applicable policy id -> the given categories it matched ([] for plan-wide policies)."""
+        matched: Dict[str, List[str]] = {policy_id: [] for policy_id in self.general}
+        for category in sorted(categories):
+            for policy_id in self.postings.get(category, ()):
+                matched.setdefault(policy_id, []).append(category)
+        return matched
+
+
+def _policy_rows(policy_ids: Optional[Sequence[Any]] = None):
+    stmt = select(Policy.id, Policy.reference, Policy.title, Policy.status, Policy.affected_site_categories)
+    return stmt.where(Policy.id.in_(policy_ids)) if policy_ids is not None else stmt
+
+
+async def load_index(db: AsyncSession) -> PolicyIndex:
+    return PolicyIndex.build((await db.execute(_policy_rows())).mappings().all())
+
+
+class PolicyIndexCache:
+    """This process's ``PolicyIndex``: patched for dirty policies on read, rebuilt after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = settings.policy_index_ttl):
+        self.ttl = ttl
+        self.index: Optional[PolicyIndex] = None
+        self.dirty: Set[str] = set()
+        self.lock = asyncio.Lock()
+
+    def invalidate(self, policy_ids: Optional[Iterable[Any]] = None) -> None:
+        """Mark policies for re-indexing, or drop the whole index when ``policy_ids`` is None."""
+        if policy_ids is None:
+            self.index = None
+        else:
+            self.dirty.update(str(policy_id) for policy_id in policy_ids)
+
+    def fresh(self) -> bool:
+        return self.index is not None and time.monotonic() - self.index.built_at < self.ttl
+
+    async def get(self, db: AsyncSession) -> PolicyIndex:
+        if self.fresh() and not self.dirty:
+            return self.index
+        async with self.lock:
+            if not self.fresh():
+                self.dirty.clear()
+                self.index = await load_index(db)
+            elif self.dirty:
+                changed, self.dirty = list(self.dirty), set()
+                self.index.apply(changed, (await db.execute(_policy_rows(changed))).mappings().all())
+            return self.index
+
+
+def register_index_invalidation(indexes: PolicyIndexCache) -> None:
+    """Mark policies dirty in ``indexes`` once a session commits changes to their status, categories or labels."""
+
+    @event.listens_for(Session, "after_flush")
+    def collect(session, flush_context):
+        pending = session.info.setdefault("policy_index_dirty", set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if not isinstance(obj, Policy):
+                continue
+            state = inspect(obj)
+            if obj in session.dirty and not any(state.attrs[name].history.has_changes() for name in INDEX_FIELDS):
+                continue
+            pending.add(str(obj.id))
+
+    @event.listens_for(Session, "after_commit")
+    def invalidate(session):
+        pending = session.info.pop("policy_index_dirty", None)
+        if pending:
+            indexes.invalidate(pending)
+
+    @event.listens_for(Session, "after_rollback")
+    def discard(session):
+        session.info.pop("policy_index_dirty", None)
+
+
+policy_index = PolicyIndexCache()
+
+
+class ApplicabilityService:
+    def __init__(self, db: AsyncSession, indexes: PolicyIndexCache = policy_index):
+        self.db = db
+        self.indexes = indexes
+
+    async def categories(self, site_id: Any) -> Optional[set]:
+        """The site's categories from its own columns and its overlay rows; None if it doesn't exist."""
+        site = (
+            await self.db.execute(select(Site.proposed_use_plan_making, Site.parish).where(Site.id == site_id))
+        ).first()
+        if site is None:
+            return None
+        constraints = (
+            await self.db.execute(
+                select(Constraint.type, Constraint.name)
+                .join(SiteConstraint, SiteConstraint.constraint_id == Constraint.id)
+                .where(SiteConstraint.site_id == site_id)
+            )
+        ).mappings().all()
+        return site_categories(site.proposed_use_plan_making, site.parish, constraints)
+
+    async def for_site(self, site_id: Any) -> Optional[PolicyApplicability]:
+        categories = await self.categories(site_id)
+        if categories is None:
+            return None
+        index = await self.indexes.get(self.db)
+        matched = index.lookup(categories)
+        policies = [
+            ApplicablePolicy(policyId=policy_id, matchedOn=on, **index.labels[policy_id])
+            for policy_id, on in matched.items()
+        ]
+        policies.sort(key=lambda policy: (policy.reference, policy.policyId))
+        return PolicyApplicability(siteId=str(site_id), categories=sorted(categories), policies=policies)
+
+    async def for_application(self, application_id: Any) -> Optional[PolicyApplicability]:
+        """Applicability for the application's site; None if the application doesn't exist or has no site."""
+        site_id = (
+            await self.db.execute(select(PlanningApplication.site_id).where(PlanningApplication.id == application_id))
+        ).scalar()
+        return await self.for_site(site_id) if site_id is not None else None
@@ -0,0 +1,88 @@
+from typing import List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud.precedent_cases import PrecedentCaseCRUD
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.precedent_cases import PrecedentCase
+from app.services.embeddings import Encoder, VectorIndex, get_encoder
+
+
+def application_text(address: Optional[str], site_description: Optional[str], proposal_details: Optional[str]) -> str:
+    """What an application is embedded as when matching it against precedents."""
+    return "\n".join(filter(None, (address, site_description, proposal_details)))
+
+
+def precedent_text(
+    address: Optional[str],
+    inspector_reasoning_summary: Optional[str],
+    relevance_summary: Optional[str],
+    key_policies_cited: Optional[Sequence[str]],
+) -> str:
+    """What a precedent is embedded as."""
+    policies = "Policies: " + ", ".join(key_policies_cited) if key_policies_cited else None
+    return "\n".join(filter(None, (address, inspector_reasoning_summary, relevance_summary, policies)))
+
+
+class PrecedentSimilarityService:
+    def __init__(self, db: AsyncSession, encoder: Optional[Encoder] = None):
+        self.db = db
+        self.encoder = encoder or get_encoder()
+        self.crud = PrecedentCaseCRUD(db)
+
+    @property
+    def uses_postgres(self) -> bool:
+        return self.db.bind is not None and self.db.bind.dialect.name == "postgresql"
+
+    async def application_vector(self, application_id: UUID) -> Optional[List[float]]:
+        """The stored application embedding, or one encoded on the spot if it hasn't been computed yet."""
+        stmt = select(
+            PlanningApplication.embedding,
+            PlanningApplication.address,
+            PlanningApplication.site_description,
+            PlanningApplication.proposal_details,
+        ).where(PlanningApplication.id == application_id)
+        row = (await self.db.execute(stmt)).first()
+        if row is None:
+            return None
+        if row.embedding is not None:
+            return list(row.embedding)
+        text = application_text(row.address, row.site_description, row.proposal_details)
+        return (await self.encoder.encode([text]))[0]
+
+    async def similar_to_application(self, application_id: UUID, k: int = 10) -> Optional[List[dict]]:
+        """Top-``k`` precedents by cosine similarity, or None if the application doesn't exist."""
+        vector = await self.application_vector(application_id)
+        if vector is None:
+            return None
+        if not self.uses_postgres:
+            return await self._similar_in_memory(vector, k)
+
+        await self.db.execute(select(func.set_config("hnsw.ef_search", str(max(settings.hnsw_ef_search, k)), True)))
+        distance = PrecedentCase.embedding.cosine_distance(vector).label("distance")
+        stmt = (
+            select(*self.crud.project(None), distance)
+            .where(PrecedentCase.embedding.isnot(None))
+            .order_by(distance)
+            .limit(k)
+        )
+        rows = (await self.db.execute(stmt)).mappings()
+        return [
+            {
+                "precedent": self.crud.to_api({key: value for key, value in row.items() if key != "distance"}),
+                "score": 1.0 - row["distance"],
+            }
+            for row in rows
+        ]
+
+    async def _similar_in_memory(self, vector: List[float], k: int) -> List[dict]:
+        rows = (await self.db.execute(select(PrecedentCase.id, PrecedentCase.embedding))).all()
+        index = VectorIndex(((row.id, row.embedding) for row in rows), dim=len(vector))
+        hits = index.search(vector, k)
+        results = []
+        for precedent_id, score in hits:
+            results.append({"precedent": await self.crud.get(precedent_id), "score": score})
+        return results
@@ -0,0 +1,212 @@
+"""
+Precedent ranking: cited-policy overlap, distance and reasoning similarity, blended.
+
+Scoring every precedent against an application doesn't scale to a national
+appeal corpus, so candidates come from three indexed routes, each capped at
+``precedent_candidates``:
+
+* policy overlap, by MinHash-LSH. Each precedent's cited policy set
+  (references normalised, so "Policy H1" is "H1") has a 64-slot MinHash
+  signature cut into ``LSH_BANDS`` bands of ``LSH_ROWS`` rows, and the band
+  hashes live in ``precedent_policy_bands`` (trigger-maintained, migration
+  0013). The application's cited policies go through the same SQL function,
+  and precedents sharing a bucket in any band are candidates, most shared
+  bands first. With 16 x 4 a precedent with Jaccard 0.7 is found 99% of the
+  time, 0.5 64% and 0.3 12%.
+* location, by KNN over the GiST index on ``precedent_cases.location`` from
+  the application site.
+* text, by the HNSW index over precedent embeddings (address, inspector
+  reasoning, relevance summary and cited policies).
+
+Only the union is scored: exact Jaccard of the cited sets, a distance decay
+of ``0.5 ** (metres / precedent_distance_half_life)``, and cosine similarity.
+The score is the weighted mean of the components that are known, so a
+national appeal without a location is ranked on policy and text alone.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+from uuid import UUID
+
+from sqlalchemy import Text, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud.precedent_cases import PrecedentCaseCRUD
+from app.db_models.links import ApplicationPolicy
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.policies import Policy
+from app.db_models.precedent_cases import PrecedentCase, PrecedentPolicyBand
+from app.db_models.sites import Site
+from app.models.precedent_cases import PrecedentScoreComponents, RankedPrecedent
+from app.services.precedent_cases_service import PrecedentSimilarityService
+
+# Keep in step with BANDS / ROWS in migration 0013
+LSH_BANDS = 16
+LSH_ROWS = 4
+
+_POLICY_PREFIX = re.compile(r"^\s*policy\s+", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+def policy_key(reference: str) -> str:
+    """Normalised policy reference, as ``tpa_policy_keys`` computes it."""
+    return _SPACE.sub("", _POLICY_PREFIX.sub("", reference)).upper()
+
+
+def policy_keys(references: Optional[Iterable[Any]]) -> Set[str]:
+    keys = {policy_key(ref) for ref in references or () if isinstance(ref, str)}
+    keys.discard("")
+    return keys
+
+
+def jaccard(a: Set[str], b: Set[str]) -> Optional[float]:
+    """|a & b| / |a | b|; None when neither side cites anything."""
+    union = len(a | b)
+    return len(a & b) / union if union else None
+
+
+def location_score(
+    metres: Optional[float], half_life: float = settings.precedent_distance_half_life
+) -> Optional[float]:
+    return None if metres is None else 0.5 ** (metres / half_life)
+
+
+def explain(components: PrecedentScoreComponents) -> str:
+    parts = []
+    if components.sharedPolicies:
+        shared = components.sharedPolicies
+        noun = "policy" if len(shared) == 1 else "policies"
+        parts.append(f"cites {len(shared)} of the same {noun} ({', '.join(shared)})")
+    elif components.policyOverlap is not None:
+        parts.append("no cited policies in common")
+    if components.distanceMetres is not None:
+        metres = components.distanceMetres
+        parts.append(f"{metres / 1000:.1f} km from the site" if metres >= 1000 else f"{metres:.0f} m from the site")
+    if components.text is not None:
+        parts.append(f"reasoning similarity {components.text:.2f}")
+    if not parts:
+        return "No comparable information."
+    text = "; ".join(parts)
+    return text[0].upper() + text[1:] + "."
+
+
+class PrecedentRankingService:
+    def __init__(
+        self,
+        db: AsyncSession,
+        similarity: Optional[PrecedentSimilarityService] = None,
+        candidates: int = settings.precedent_candidates,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        self.db = db
+        self.similarity = similarity or PrecedentSimilarityService(db)
+        self.crud = PrecedentCaseCRUD(db)
+        self.candidates = candidates
+        self.weights = weights or {
+            "policyOverlap": settings.precedent_weight_policy,
+            "location": settings.precedent_weight_location,
+            "text": settings.precedent_weight_text,
+        }
+
+    async def cited_policies(self, application_id: UUID) -> Set[str]:
+        """The application's cited policy references, normalised (via ``application_policies``)."""
+        reference = func.coalesce(ApplicationPolicy.policy_reference, Policy.reference)
+        stmt = (
+            select(reference)
+            .select_from(ApplicationPolicy)
+            .outerjoin(Policy, Policy.id == ApplicationPolicy.policy_id)
+            .where(ApplicationPolicy.application_id == application_id)
+        )
+        return policy_keys((await self.db.execute(stmt)).scalars())
+
+    async def site_point(self, application_id: UUID) -> Optional[str]:
+        """EWKT of a point on the application's site, None if it has no mapped site."""
+        stmt = (
+            select(func.ST_AsEWKT(func.ST_PointOnSurface(Site.coordinates)))
+            .join(PlanningApplication, PlanningApplication.site_id == Site.id)
+            .where(PlanningApplication.id == application_id, Site.coordinates.isnot(None))
+        )
+        return (await self.db.execute(stmt)).scalar()
+
+    async def rank(self, application_id: UUID, k: int = 10) -> Optional[List[RankedPrecedent]]:
+        """Top-``k`` precedents for an application with their component scores; None if it doesn't exist."""
+        vector = await self.similarity.application_vector(application_id)
+        if vector is None:
+            return None
+        keys = await self.cited_policies(application_id)
+        point = await self.site_point(application_id)
+        ids = await self._candidates(keys, point, vector)
+        if not ids:
+            return []
+        columns = [*self.crud.project(None), (1.0 - PrecedentCase.embedding.cosine_distance(vector)).label("_text")]
+        if point is not None:
+            site = func.ST_GeomFromEWKT(point)
+            metres = func.ST_Distance(func.geography(PrecedentCase.location), func.geography(site))
+            columns.append(metres.label("_metres"))
+        rows = (await self.db.execute(select(*columns).where(PrecedentCase.id.in_(ids)))).mappings()
+        ranked = [
+            self._score(
+                {key: value for key, value in row.items() if not key.startswith("_")},
+                keys,
+                text=row["_text"],
+                metres=row.get("_metres"),
+            )
+            for row in rows
+        ]
+        ranked.sort(key=lambda hit: (-hit.score, hit.precedent.caseReference))
+        return ranked[:k]
+
+    async def _candidates(self, keys: Set[str], point: Optional[str], vector: Sequence[float]) -> Set[UUID]:
+        ids: Set[UUID] = set()
+        if keys:
+            query = func.tpa_minhash_bands(
+                func.tpa_policy_keys(bindparam("refs", sorted(keys), type_=ARRAY(Text)))
+            ).table_valued("band", "bucket")
+            stmt = (
+                select(PrecedentPolicyBand.precedent_id)
+                .join(
+                    query,
+                    (PrecedentPolicyBand.band == query.c.band) & (PrecedentPolicyBand.bucket == query.c.bucket),
+                )
+                .group_by(PrecedentPolicyBand.precedent_id)
+                .order_by(func.count().desc())
+                .limit(self.candidates)
+            )
+            ids.update((await self.db.execute(stmt)).scalars())
+        if point is not None:
+            stmt = (
+                select(PrecedentCase.id)
+                .where(PrecedentCase.location.isnot(None))
+                .order_by(PrecedentCase.location.op("<->")(func.ST_GeomFromEWKT(point)))
+                .limit(self.candidates)
+            )
+            ids.update((await self.db.execute(stmt)).scalars())
+        ef_search = max(settings.hnsw_ef_search, self.candidates)
+        await self.db.execute(select(func.set_config("hnsw.ef_search", str(ef_search), True)))
+        stmt = (
+            select(PrecedentCase.id)
+            .where(PrecedentCase.embedding.isnot(None))
+            .order_by(PrecedentCase.embedding.cosine_distance(vector))
+            .limit(self.candidates)
+        )
+        ids.update((await self.db.execute(stmt)).scalars())
+        return ids
+
+    def _score(
+        self, row: dict, keys: Set[str], text: Optional[float] = None, metres: Optional[float] = None
+    ) -> RankedPrecedent:
+        cited = policy_keys(row.get("key_policies_cited"))
+        components = PrecedentScoreComponents(
+            policyOverlap=jaccard(keys, cited),
+            sharedPolicies=sorted(keys & cited),
+            location=location_score(metres),
+            distanceMetres=metres,
+            text=None if text is None else float(text),
+        )
+        known = {name: getattr(components, name) for name in self.weights if getattr(components, name) is not None}
+        total = sum(self.weights[name] for name in known)
+        score = sum(self.weights[name] * value for name, value in known.items()) / total if total else 0.0
+        return RankedPrecedent(
+            precedent=self.crud.to_api(row), score=score, components=components, explanation=explain(components)
+        )
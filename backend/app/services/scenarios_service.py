@@ -0,0 +1,739 @@
+"""
+Scenario evaluation engine.
+
+Site attributes are loaded once into a ``SiteFrame`` of NumPy columns and a
+scenario becomes a boolean site mask plus a per-site density multiplier.
+``SummaryMetrics`` and per-goal values are then masked reductions; for a
+batch of scenarios the masks stack into a matrix and everything is two
+matrix products, so hundreds of what-if variants evaluate per second.
+
+Yields are indicative, SHLAA-style: net developable area (gross-to-net by
+site size) times a density for the proposed use. They rank and compare
+scenarios; they are not a capacity study.
+
+Policy levers: a ``modifiedPolicies`` entry whose ``changes`` carry
+``densityUplift`` (a fraction, e.g. 0.2) scales the homes yield of sites in
+that policy's ``affectedSiteCategories`` (``changes.affectedSiteCategories``
+overrides; every site when neither is set), provided the policy is active in
+the scenario. Site categories are the proposed use, ``parish:<name>`` and
+the type and name of each constraint on the site.
+
+Evaluations are linear in the (mask x multiplier) weights, so a scenario
+that names a ``baselineScenarioId`` is derived from its baseline's cached
+column totals plus the rows of the sites whose weight differs, rather than
+re-reduced over every site. Cached states hang off the frame they were
+computed against, so rebuilding the frame (any committed Site, Policy or
+Goal change, or ``scenario_frame_ttl``) drops them all at once.
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.crud.scenarios import ScenarioCRUD
+from app.db_models.goals import Goal
+from app.db_models.policies import Policy
+from app.db_models.scenarios import Scenario
+from app.db_models.sites import Site
+from app.models.scenarios import (
+    ScenarioCompareRequest,
+    ScenarioComparison,
+    ScenarioEvaluation,
+    ScenarioSweep,
+    SummaryMetrics,
+)
+from app.models.shared import GoalStatus
+
+DWELLINGS_PER_HA = 35.0  # net density for residential use
+JOBS_PER_HA = 60.0  # net employment density for business/industrial use
+HOMES_PER_INFRASTRUCTURE_UNIT = 100.0
+JOBS_PER_INFRASTRUCTURE_UNIT = 500.0
+LOW_DELIVERABILITY = 0.5  # mean deliverability score below this flags the site as a risk
+UNKNOWN_DELIVERABILITY = 0.5
+HIGH_SEVERITY = {"high", "severe", "critical", "major"}
+ALIGNMENT_SCORES = {"supports": 1.0, "partially aligns": 0.5, "undermines": -1.0}
+MAX_BASELINE_DEPTH = 16  # baseline chains longer than this (or cyclic) are evaluated in full
+
+# Summary columns of the basis matrices; goal columns follow
+HOMES, DELIVERABLE_HOMES, RISK_HOMES = 0, 1, 2  # scaled by the density multiplier
+JOBS, RISK_SITES, SITES = 0, 1, 2  # not scaled
+SUMMARY_COLUMNS = 3
+
+SUMMARY_FIELDS = ["totalHomes", "jobsEnabled", "infrastructureNeed", "riskFlags", "tradeOffIndex"]
+STATUS_LABELS = [GoalStatus.OnTrack.value, GoalStatus.Partial.value, GoalStatus.Failing.value, GoalStatus.NotStarted.value]
+
+
+def use_split(proposed_use: Optional[str]) -> tuple:
+    """(residential share, employment share) of a site's net area from its proposed use."""
+    use = (proposed_use or "").lower()
+    if "mixed" in use:
+        return 0.5, 0.5
+    if any(word in use for word in ("employ", "business", "industr", "office", "commercial", "warehous")):
+        return 0.0, 1.0
+    if any(word in use for word in ("resid", "hous", "dwelling", "home")):
+        return 1.0, 0.0
+    return 0.0, 0.0
+
+
+def net_ratio(area_ha: np.ndarray) -> np.ndarray:
+    """Gross-to-net developable ratio; larger sites lose more to roads and open space."""
+    return np.select([area_ha < 0.4, area_ha < 2.0], [0.9, 0.75], default=0.6)
+
+
+def indicative_yield(area_ha: Sequence[Optional[float]], proposed_uses: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(homes, jobs) per site from gross area and proposed use."""
+    area = np.array([a or 0.0 for a in area_ha], dtype=np.float64)
+    split = np.array([use_split(use) for use in proposed_uses], dtype=np.float64).reshape(len(area), 2)
+    net = area * net_ratio(area)
+    return np.floor(net * split[:, 0] * DWELLINGS_PER_HA), np.floor(net * split[:, 1] * JOBS_PER_HA)
+
+
+def goal_kind(target_metric: Optional[str]) -> str:
+    metric = (target_metric or "").lower()
+    if any(word in metric for word in ("home", "dwelling", "housing")):
+        return "homes"
+    if any(word in metric for word in ("job", "employment")):
+        return "jobs"
+    if "infrastructure" in metric:
+        return "infrastructure"
+    return "alignment"
+
+
+def _score(items: Optional[Iterable[Mapping]]) -> float:
+    scores = [float(item["score"]) for item in items or () if item.get("score") is not None]
+    return sum(scores) / len(scores) if scores else UNKNOWN_DELIVERABILITY
+
+
+def fingerprint(scenario: Mapping[str, Any]) -> str:
+    """Hash of the fields that determine a scenario's metrics; order of id lists doesn't matter."""
+    definition = {
+        "baseline": scenario.get("baselineScenarioId"),
+        "included": sorted(scenario.get("includedSiteIds") or ()),
+        "excluded": sorted(scenario.get("excludedSiteIds") or ()),
+        "active": sorted(scenario.get("activePolicyIds") or ()),
+        "modified": scenario.get("modifiedPolicies") or [],
+    }
+    return hashlib.sha256(json.dumps(definition, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def site_categories(proposed_use: Optional[str], parish: Optional[str], constraints: Optional[Iterable[Mapping]]) -> set:
+    """Casefolded categories a site falls under, as matched against ``Policy.affected_site_categories``."""
+    found = {proposed_use} if proposed_use else set()
+    if parish:
+        found.add(f"parish:{parish}")
+    for constraint in constraints or ():
+        found.update(filter(None, (constraint.get("type"), constraint.get("name"))))
+    return {category.casefold() for category in found}
+
+
+@dataclass
+class ScenarioState:
+    """What a scenario evaluated to, kept so variants can be derived from it by difference."""
+
+    fingerprint: str
+    mask: np.ndarray  # bool, per site
+    weights: np.ndarray  # mask x density multiplier, per site
+    scaled: np.ndarray  # column totals, weights @ frame.scaled
+    fixed: np.ndarray  # column totals, mask @ frame.fixed
+
+
+@dataclass
+class SiteFrame:
+    """Columnar site attributes plus the per-goal basis, built once and shared by every evaluation."""
+
+    site_ids: List[str]
+    index: Dict[str, int]
+    categories: Dict[str, np.ndarray]  # casefolded category -> site mask
+    goal_ids: List[str]
+    goal_targets: np.ndarray  # NaN where a goal has no numeric target
+    scaled: np.ndarray  # sites x (summary + goals); multiplied by the density multiplier
+    fixed: np.ndarray  # sites x (summary + goals)
+    policy_categories: Dict[str, List[str]]
+    built_at: float
+    generation: int = field(default_factory=itertools.count(1).__next__)  # tells a pool which frame its workers hold
+    states: "OrderedDict[str, ScenarioState]" = field(default_factory=OrderedDict)  # by scenario id
+
+    @classmethod
+    def build(cls, sites: Sequence[Mapping], goals: Sequence[Mapping], policies: Sequence[Mapping]) -> "SiteFrame":
+        """From DB row mappings (snake_case) of sites, goals and policies."""
+        n = len(sites)
+        site_ids = [str(site["id"]) for site in sites]
+        index = {site_id: i for i, site_id in enumerate(site_ids)}
+
+        homes, jobs = indicative_yield(
+            [site.get("area_ha") for site in sites], [site.get("proposed_use_plan_making") for site in sites]
+        )
+        deliverability = np.array([_score(site.get("deliverability_assessment")) for site in sites], dtype=np.float64)
+        severe = np.array(
+            [
+                any(str(c.get("severity") or "").lower() in HIGH_SEVERITY for c in site.get("constraints") or ())
+                for site in sites
+            ],
+            dtype=bool,
+        )
+        risk = (severe | (deliverability < LOW_DELIVERABILITY)).astype(np.float64)
+
+        categories: Dict[str, np.ndarray] = {}
+        for i, site in enumerate(sites):
+            for category in site_categories(site.get("proposed_use_plan_making"), site.get("parish"), site.get("constraints")):
+                categories.setdefault(category, np.zeros(n, dtype=bool))[i] = True
+
+        goal_ids = [str(goal["id"]) for goal in goals]
+        goal_column = {goal_id: j for j, goal_id in enumerate(goal_ids)}
+        width = SUMMARY_COLUMNS + len(goals)
+        scaled = np.zeros((n, width), dtype=np.float64)
+        fixed = np.zeros((n, width), dtype=np.float64)
+        scaled[:, HOMES] = homes
+        scaled[:, DELIVERABLE_HOMES] = homes * deliverability
+        scaled[:, RISK_HOMES] = homes * risk
+        fixed[:, JOBS] = jobs
+        fixed[:, RISK_SITES] = risk
+        fixed[:, SITES] = 1.0
+
+        alignment = np.zeros((n, len(goals)), dtype=np.float64)
+        for i, site in enumerate(sites):
+            for contribution in site.get("strategic_goal_contributions") or ():
+                j = goal_column.get(str(contribution.get("goalId")))
+                if j is not None:
+                    alignment[i, j] = ALIGNMENT_SCORES.get(str(contribution.get("alignment", "")).lower(), 0.0)
+
+        for j, goal in enumerate(goals):
+            scope = np.ones(n, dtype=np.float64)
+            if goal.get("contributing_site_ids"):
+                scope = np.zeros(n, dtype=np.float64)
+                scope[[index[s] for s in goal["contributing_site_ids"] if s in index]] = 1.0
+            column = SUMMARY_COLUMNS + j
+            kind = goal_kind(goal.get("target_metric"))
+            if kind == "homes":
+                scaled[:, column] = homes * scope
+            elif kind == "jobs":
+                fixed[:, column] = jobs * scope
+            elif kind == "infrastructure":
+                scaled[:, column] = homes * scope / HOMES_PER_INFRASTRUCTURE_UNIT
+                fixed[:, column] = jobs * scope / JOBS_PER_INFRASTRUCTURE_UNIT
+            else:
+                fixed[:, column] = alignment[:, j] * scope
+
+        return cls(
+            site_ids=site_ids,
+            index=index,
+            categories=categories,
+            goal_ids=goal_ids,
+            goal_targets=np.array(
+                [goal["target_value"] if goal.get("target_value") is not None else np.nan for goal in goals],
+                dtype=np.float64,
+            ),
+            scaled=scaled,
+            fixed=fixed,
+            policy_categories={
+                str(policy["id"]): list(policy.get("affected_site_categories") or ()) for policy in policies
+            },
+            built_at=time.monotonic(),
+        )
+
+
+class ScenarioEngine:
+    def __init__(self, frame: SiteFrame):
+        self.frame = frame
+        self._category_masks: Dict[tuple, np.ndarray] = {}
+
+    def _positions(self, site_ids: Iterable[str]) -> np.ndarray:
+        index = self.frame.index
+        return np.fromiter((index[s] for s in site_ids if s in index), dtype=np.intp)
+
+    def category_mask(self, categories: Iterable[str]) -> np.ndarray:
+        key = tuple(categories)
+        mask = self._category_masks.get(key)
+        if mask is None:
+            mask = np.zeros(len(self.frame.site_ids), dtype=bool)
+            for category in key:
+                found = self.frame.categories.get(category.casefold())
+                if found is not None:
+                    mask |= found
+            self._category_masks[key] = mask
+        return mask
+
+    def mask(self, scenario: Mapping[str, Any]) -> np.ndarray:
+        """Sites in the scenario: ``includedSiteIds`` (every site when empty) minus ``excludedSiteIds``."""
+        included = scenario.get("includedSiteIds")
+        if included:
+            mask = np.zeros(len(self.frame.site_ids), dtype=bool)
+            mask[self._positions(included)] = True
+        else:
+            mask = np.ones(len(self.frame.site_ids), dtype=bool)
+        mask[self._positions(scenario.get("excludedSiteIds") or ())] = False
+        return mask
+
+    def multipliers(self, scenario: Mapping[str, Any]) -> np.ndarray:
+        """Per-site density multiplier from the scenario's active modified policies."""
+        multiplier = np.ones(len(self.frame.site_ids), dtype=np.float64)
+        active = set(scenario.get("activePolicyIds") or ())
+        for modified in scenario.get("modifiedPolicies") or ():
+            policy_id = modified.get("policyId")
+            changes = modified.get("changes") or {}
+            if changes.get("densityUplift") is None or (active and policy_id not in active):
+                continue
+            categories = changes.get("affectedSiteCategories") or self.frame.policy_categories.get(policy_id)
+            target = self.category_mask(categories) if categories else slice(None)
+            multiplier[target] *= 1.0 + float(changes["densityUplift"])
+        return multiplier
+
+    def evaluate(self, scenario: Mapping[str, Any]) -> ScenarioEvaluation:
+        return self.evaluate_many([scenario])[0]
+
+    def state(self, scenario: Mapping[str, Any]) -> ScenarioState:
+        mask = self.mask(scenario)
+        weights = mask * self.multipliers(scenario)
+        return ScenarioState(
+            fingerprint(scenario), mask, weights, weights @ self.frame.scaled, mask.astype(np.float64) @ self.frame.fixed
+        )
+
+    def derive(self, scenario: Mapping[str, Any], baseline: ScenarioState) -> ScenarioState:
+        """``scenario``'s state from ``baseline``'s totals plus the rows of sites whose weight changed."""
+        mask = self.mask(scenario)
+        weights = mask * self.multipliers(scenario)
+        changed = np.flatnonzero((mask != baseline.mask) | (weights != baseline.weights))
+        scaled = baseline.scaled + (weights[changed] - baseline.weights[changed]) @ self.frame.scaled[changed]
+        mask_delta = mask[changed].astype(np.float64) - baseline.mask[changed]
+        fixed = baseline.fixed + mask_delta @ self.frame.fixed[changed]
+        return ScenarioState(fingerprint(scenario), mask, weights, scaled, fixed)
+
+    def result(self, state: ScenarioState, scenario_id: Optional[str], computed_by: Optional[str] = None) -> ScenarioEvaluation:
+        evaluation = self.reduce(state.scaled[None, :], state.fixed[None, :], [scenario_id])[0]
+        evaluation.computedBy = computed_by
+        return evaluation
+
+    def evaluate_many(self, scenarios: Sequence[Mapping[str, Any]]) -> List[ScenarioEvaluation]:
+        scaled, fixed = self.totals(scenarios)
+        return self.reduce(scaled, fixed, [s.get("id") for s in scenarios])
+
+    def totals(self, scenarios: Sequence[Mapping[str, Any]], block: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+        """Scenario x column totals, ``block`` scenarios at a time so the stacked masks stay a few tens of MB."""
+        scaled, fixed = [], []
+        for start in range(0, len(scenarios), block):
+            chunk = scenarios[start : start + block]
+            masks = np.stack([self.mask(s) for s in chunk]).astype(np.float64)
+            weights = masks * np.stack([self.multipliers(s) for s in chunk])
+            scaled.append(weights @ self.frame.scaled)
+            fixed.append(masks @ self.frame.fixed)
+        return np.vstack(scaled), np.vstack(fixed)
+
+    def metrics(self, scaled: np.ndarray, fixed: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Scenario x column totals (``mask @ basis``) into a scenario x metric
+        ``summary`` matrix (``SUMMARY_FIELDS`` order), goal ``values``,
+        ``progress`` against targets and ``statuses`` (indexes into ``STATUS_LABELS``).
+        """
+        homes = scaled[:, HOMES]
+        jobs = fixed[:, JOBS]
+        # round before ceil/int: totals derived incrementally carry float noise
+        infrastructure = np.ceil(np.round(homes / HOMES_PER_INFRASTRUCTURE_UNIT + jobs / JOBS_PER_INFRASTRUCTURE_UNIT, 6))
+        safe_homes = np.where(homes > 0, homes, 1.0)
+        # homes-weighted deliverability, discounted by the share of homes on risk-flagged sites
+        trade_off = np.where(
+            homes > 0, (scaled[:, DELIVERABLE_HOMES] / safe_homes) * (1.0 - scaled[:, RISK_HOMES] / safe_homes), 0.0
+        )
+        summary = np.column_stack(
+            [np.round(homes), np.round(jobs), infrastructure, np.round(fixed[:, RISK_SITES]), np.round(trade_off, 4)]
+        )
+
+        values = scaled[:, SUMMARY_COLUMNS:] + fixed[:, SUMMARY_COLUMNS:]
+        targets = self.frame.goal_targets
+        has_target = np.isfinite(targets) & (targets > 0)
+        progress = np.divide(values, np.where(has_target, targets, 1.0))
+        statuses = np.where(
+            has_target,
+            np.select([progress >= 1.0, progress >= 0.5], [0, 1], default=2),
+            np.select([values > 0, values == 0], [0, 3], default=2),
+        )
+        return {"summary": summary, "values": values, "progress": progress, "statuses": statuses, "has_target": has_target}
+
+    def reduce(self, scaled: np.ndarray, fixed: np.ndarray, scenario_ids: Sequence[Optional[str]]) -> List[ScenarioEvaluation]:
+        """Scenario x column totals into evaluations."""
+        m = self.metrics(scaled, fixed)
+        summary, values, progress, statuses, has_target = (
+            m["summary"], m["values"], m["progress"], m["statuses"], m["has_target"]
+        )
+        targets = self.frame.goal_targets
+        labels = STATUS_LABELS
+
+        results = []
+        for k, scenario_id in enumerate(scenario_ids):
+            performance = [
+                {
+                    "goalId": goal_id,
+                    "status": labels[statuses[k, j]],
+                    "value": round(float(values[k, j]), 2),
+                    "target": float(targets[j]) if has_target[j] else None,
+                    "progress": round(float(progress[k, j]), 4) if has_target[j] else None,
+                }
+                for j, goal_id in enumerate(self.frame.goal_ids)
+            ]
+            results.append(
+                ScenarioEvaluation(
+                    scenarioId=str(scenario_id) if scenario_id is not None else None,
+                    summaryMetrics=SummaryMetrics(
+                        totalHomes=int(summary[k, 0]),
+                        jobsEnabled=int(summary[k, 1]),
+                        infrastructureNeed=int(summary[k, 2]),
+                        riskFlags=int(summary[k, 3]),
+                        tradeOffIndex=float(summary[k, 4]),
+                    ),
+                    goalPerformance=performance,
+                    sitesIncluded=int(round(fixed[k, SITES])),
+                )
+            )
+        return results
+
+
+class FrameCache:
+    """The current ``SiteFrame`` for this process, rebuilt after ``ttl`` seconds or ``invalidate()``."""
+
+    def __init__(self, ttl: float = settings.scenario_frame_ttl):
+        self.ttl = ttl
+        self.frame: Optional[SiteFrame] = None
+        self.lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self.frame = None
+
+    def fresh(self) -> bool:
+        return self.frame is not None and time.monotonic() - self.frame.built_at < self.ttl
+
+    async def get(self, db: AsyncSession) -> SiteFrame:
+        if self.fresh():
+            return self.frame
+        async with self.lock:
+            if not self.fresh():
+                self.frame = await load_frame(db)
+            return self.frame
+
+
+def register_frame_invalidation(frames: FrameCache) -> None:
+    """Drop the frame (and every cached scenario state) once a session commits Site, Policy or Goal writes."""
+
+    @event.listens_for(Session, "after_flush")
+    def collect(session, flush_context):
+        if any(isinstance(obj, (Site, Policy, Goal)) for obj in (*session.new, *session.dirty, *session.deleted)):
+            session.info["scenario_frame_stale"] = True
+
+    @event.listens_for(Session, "after_commit")
+    def invalidate(session):
+        if session.info.pop("scenario_frame_stale", False):
+            frames.invalidate()
+
+    @event.listens_for(Session, "after_rollback")
+    def discard(session):
+        session.info.pop("scenario_frame_stale", None)
+
+
+async def load_frame(db: AsyncSession) -> SiteFrame:
+    sites = (
+        await db.execute(
+            select(
+                Site.id,
+                Site.area_ha,
+                Site.proposed_use_plan_making,
+                Site.parish,
+                Site.constraints,
+                Site.deliverability_assessment,
+                Site.strategic_goal_contributions,
+            )
+        )
+    ).mappings().all()
+    goals = (
+        await db.execute(select(Goal.id, Goal.target_metric, Goal.target_value, Goal.contributing_site_ids))
+    ).mappings().all()
+    policies = (await db.execute(select(Policy.id, Policy.affected_site_categories))).mappings().all()
+    return SiteFrame.build(sites, goals, policies)
+
+
+frame_cache = FrameCache()
+
+# Process pool for comparisons and sweeps. Each worker receives the frame once,
+# in its initializer; only scenario definitions go out and column totals come back.
+
+_worker_frame: Optional[SiteFrame] = None
+
+
+def _init_worker(frame: SiteFrame) -> None:
+    global _worker_frame
+    _worker_frame = frame
+
+
+def _worker_totals(scenarios: Sequence[Mapping[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    return ScenarioEngine(_worker_frame).totals(scenarios)
+
+
+class ScenarioPool:
+    """
+    Worker processes bound to one frame generation; replaced when a newer frame arrives.
+
+    A replaced executor is retired, not cancelled: requests still gathering
+    chunks from it hold a reference, and the last one out shuts it down.
+    Workers come from a forkserver so they don't inherit the API process's
+    threads, sockets or event loop.
+    """
+
+    def __init__(self, workers: Optional[int] = settings.scenario_pool_workers):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.generation: Optional[int] = None
+        self.in_flight: Dict[ProcessPoolExecutor, int] = {}
+
+    def _acquire(self, frame: SiteFrame) -> ProcessPoolExecutor:
+        if self.executor is None or self.generation != frame.generation:
+            self._retire()
+            # cached states stay in this process; workers only need the columns
+            snapshot = replace(frame, states=OrderedDict())
+            self.executor = ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_init_worker,
+                initargs=(snapshot,),
+            )
+            self.generation = frame.generation
+        self.in_flight[self.executor] = self.in_flight.get(self.executor, 0) + 1
+        return self.executor
+
+    def _release(self, executor: ProcessPoolExecutor) -> None:
+        self.in_flight[executor] -= 1
+        if not self.in_flight[executor]:
+            del self.in_flight[executor]
+            if executor is not self.executor:
+                executor.shutdown(wait=False)
+
+    def _retire(self) -> None:
+        executor, self.executor, self.generation = self.executor, None, None
+        if executor is not None and executor not in self.in_flight:
+            executor.shutdown(wait=False)
+
+    async def totals(self, frame: SiteFrame, scenarios: Sequence[Mapping[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        if self.generation is not None and frame.generation < self.generation:
+            # A request that started before the rebuild; don't swap the pool back for it
+            return ScenarioEngine(frame).totals(scenarios)
+        executor = self._acquire(frame)
+        loop = asyncio.get_running_loop()
+        size = max(1, -(-len(scenarios) // (self.workers * 4)))  # a few chunks per worker to even out stragglers
+        try:
+            parts = await asyncio.gather(
+                *(
+                    loop.run_in_executor(executor, _worker_totals, scenarios[i : i + size])
+                    for i in range(0, len(scenarios), size)
+                )
+            )
+        finally:
+            self._release(executor)
+        return np.vstack([scaled for scaled, _ in parts]), np.vstack([fixed for _, fixed in parts])
+
+    def shutdown(self) -> None:
+        """Stop every executor, busy or not (application shutdown)."""
+        for executor in {*self.in_flight, *filter(None, [self.executor])}:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.in_flight.clear()
+        self.executor = None
+        self.generation = None
+
+
+scenario_pool = ScenarioPool()
+
+SWEEP_POLICY_ID = "sweep"
+
+
+class ScenarioService:
+    def __init__(self, db: AsyncSession, frames: FrameCache = frame_cache):
+        self.db = db
+        self.frames = frames
+
+    async def engine(self) -> ScenarioEngine:
+        return ScenarioEngine(await self.frames.get(self.db))
+
+    async def _load(self, scenario_id: Any) -> Optional[dict]:
+        try:
+            scenario_id = scenario_id if isinstance(scenario_id, uuid.UUID) else uuid.UUID(str(scenario_id))
+        except ValueError:
+            return None
+        return await ScenarioCRUD(self.db).get(scenario_id)
+
+    async def resolve(self, engine: ScenarioEngine, scenario: Mapping[str, Any], depth: int = 0) -> Tuple[ScenarioState, str]:
+        """
+        ``scenario``'s state and how it was obtained: "cache", "incremental"
+        (derived from its baseline's state, resolved the same way) or "full".
+        """
+        states = engine.frame.states
+        key = scenario.get("id")
+        if key is not None:
+            cached = states.get(key)
+            if cached is not None and cached.fingerprint == fingerprint(scenario):
+                states.move_to_end(key)
+                return cached, "cache"
+
+        baseline = None
+        baseline_id = scenario.get("baselineScenarioId")
+        if baseline_id and baseline_id != key and depth < MAX_BASELINE_DEPTH:
+            row = await self._load(baseline_id)
+            if row is not None:
+                baseline, _ = await self.resolve(engine, row, depth + 1)
+        if baseline is not None:
+            state, computed_by = engine.derive(scenario, baseline), "incremental"
+        else:
+            state, computed_by = engine.state(scenario), "full"
+
+        if key is not None:
+            states[key] = state
+            while len(states) > settings.scenario_state_cache_size:
+                states.popitem(last=False)
+        return state, computed_by
+
+    async def evaluate_definition(self, definition: Mapping[str, Any]) -> ScenarioEvaluation:
+        engine = await self.engine()
+        state, computed_by = await self.resolve(engine, definition)
+        return engine.result(state, None, computed_by)
+
+    async def evaluate(self, scenario_id: Any, persist: bool = True) -> Optional[ScenarioEvaluation]:
+        """Evaluate a saved scenario and, with ``persist``, store its summaryMetrics and goalPerformance."""
+        scenario = await self._load(scenario_id)
+        if scenario is None:
+            return None
+        engine = await self.engine()
+        state, computed_by = await self.resolve(engine, scenario)
+        result = engine.result(state, scenario["id"], computed_by)
+        if persist:
+            await self._store([result])
+        return result
+
+    async def evaluate_variants(self, scenario_id: Any, persist: bool = True) -> Optional[List[ScenarioEvaluation]]:
+        """A baseline and every scenario branched from it (transitively), each derived from its parent."""
+        baseline = await self.evaluate(scenario_id, persist=False)
+        if baseline is None:
+            return None
+        engine = await self.engine()
+        results, frontier, seen = [baseline], [uuid.UUID(baseline.scenarioId)], {baseline.scenarioId}
+        while frontier:
+            rows = (
+                await self.db.execute(select(*ScenarioCRUD(self.db).project(None)).where(Scenario.baseline_scenario_id.in_(frontier)))
+            ).mappings().all()
+            frontier = []
+            for scenario in map(ScenarioCRUD(self.db).to_api, rows):
+                if scenario["id"] in seen:
+                    continue
+                seen.add(scenario["id"])
+                state, computed_by = await self.resolve(engine, scenario)
+                results.append(engine.result(state, scenario["id"], computed_by))
+                frontier.append(uuid.UUID(scenario["id"]))
+        if persist:
+            await self._store(results)
+        return results
+
+    async def compare(self, request: ScenarioCompareRequest, pool: Optional[ScenarioPool] = None) -> ScenarioComparison:
+        """
+        Saved scenarios and/or sweep variants side by side: one row per
+        scenario, columns of SummaryMetrics then goal values, plus deltas
+        against the reference row. Large batches go to the process pool.
+        """
+        started = time.perf_counter()
+        pool = pool or scenario_pool
+        engine = await self.engine()
+        labels: List[str] = []
+        definitions: List[Mapping[str, Any]] = []
+
+        if request.scenarioIds:
+            saved = {s["id"]: s for s in await self._load_many(request.scenarioIds)}
+            missing = [i for i in request.scenarioIds if i not in saved]
+            if missing:
+                raise LookupError(f"Unknown scenario ids: {', '.join(missing)}")
+            labels += request.scenarioIds
+            definitions += [saved[i] for i in request.scenarioIds]
+        if request.sweep is not None:
+            variants = await self.sweep_variants(request.sweep)
+            labels += [label for label, _ in variants]
+            definitions += [definition for _, definition in variants]
+        if not definitions:
+            raise ValueError("Give scenarioIds, a sweep, or both")
+
+        workers = 1
+        if len(definitions) >= settings.scenario_pool_threshold and pool.workers > 1:
+            scaled, fixed = await pool.totals(engine.frame, definitions)
+            workers = pool.workers
+        else:
+            scaled, fixed = engine.totals(definitions)
+        metrics = engine.metrics(scaled, fixed)
+        matrix = np.hstack([metrics["summary"], np.round(metrics["values"], 2)])
+        reference = labels.index(request.referenceScenarioId) if request.referenceScenarioId in labels else 0
+        return ScenarioComparison(
+            labels=labels,
+            columns=SUMMARY_FIELDS + engine.frame.goal_ids,
+            values=matrix.tolist(),
+            deltas=np.round(matrix - matrix[reference], 4).tolist(),
+            referenceIndex=reference,
+            workers=workers,
+            elapsedSeconds=round(time.perf_counter() - started, 3),
+        )
+
+    async def sweep_variants(self, sweep: ScenarioSweep) -> List[Tuple[str, dict]]:
+        """(label, definition) for each densityUplift step applied on top of the base scenario."""
+        base: dict = {}
+        if sweep.baseScenarioId:
+            base = await self._load(sweep.baseScenarioId)
+            if base is None:
+                raise LookupError(f"Unknown scenario ids: {sweep.baseScenarioId}")
+        categories = list(sweep.siteCategories or ())
+        if sweep.parish:
+            categories.append(f"parish:{sweep.parish}")
+        active = base.get("activePolicyIds")
+        variants = []
+        for uplift in np.linspace(sweep.upliftFrom, sweep.upliftTo, sweep.steps):
+            lever = {"policyId": SWEEP_POLICY_ID, "changes": {"densityUplift": float(uplift)}}
+            if categories:
+                lever["changes"]["affectedSiteCategories"] = categories
+            definition = {
+                **base,
+                "id": None,
+                "activePolicyIds": [*active, SWEEP_POLICY_ID] if active else active,
+                "modifiedPolicies": [*(base.get("modifiedPolicies") or ()), lever],
+            }
+            variants.append((f"densityUplift={float(uplift):.4g}", definition))
+        return variants
+
+    async def _load_many(self, scenario_ids: Sequence[str]) -> List[dict]:
+        ids = []
+        for scenario_id in scenario_ids:
+            try:
+                ids.append(uuid.UUID(scenario_id))
+            except ValueError:
+                continue
+        crud = ScenarioCRUD(self.db)
+        rows = (await self.db.execute(select(*crud.project(None)).where(Scenario.id.in_(ids)))).mappings().all()
+        return [crud.to_api(row) for row in rows]
+
+    async def _store(self, results: Sequence[ScenarioEvaluation]) -> None:
+        # Core executemany: an ORM update() with a list of parameter sets is a bulk update by primary key
+        table = Scenario.__table__
+        await self.db.execute(
+            table.update().where(table.c.id == bindparam("scenario_id")).values(
+                summary_metrics=bindparam("metrics"), goal_performance=bindparam("performance")
+            ),
+            [
+                {
+                    "scenario_id": uuid.UUID(result.scenarioId),
+                    "metrics": result.summaryMetrics.model_dump(),
+                    "performance": result.goalPerformance,
+                }
+                for result in results
+            ],
+        )
+        await self.db.commit()
@@ -0,0 +1,218 @@
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import desc, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db_models.plan_documents import DocumentNode
+from app.db_models.policies import Policy
+from app.utils import jsonable
+
+# ts_rank_cd's default label weights, reused by the in-process fallback
+WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter= … "
+_TS_CONFIG = literal_column("'english'::regconfig")
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the to was were will with".split()
+)
+
+
+def stem(word: str) -> str:
+    """Very light English suffix stripping, enough to line up plurals and tenses."""
+    word = word.lower()
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", ""), ("e", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)] + replacement
+    return word
+
+
+def terms(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [stem(w) for w in _WORD.findall(text) if w.lower() not in _STOPWORDS]
+
+
+def highlight(text: Optional[str], query_terms: Iterable[str], max_words: int = 35) -> Optional[str]:
+    """A window of ``text`` around the first match, with matches wrapped in <mark>."""
+    if not text:
+        return None
+    wanted = set(query_terms)
+    words = list(_WORD.finditer(text))
+    hits = [i for i, m in enumerate(words) if stem(m.group()) in wanted]
+    if not hits:
+        return None
+    first = max(0, hits[0] - max_words // 3)
+    last = min(len(words), first + max_words)
+    start, end = words[first].start(), words[last - 1].end()
+
+    out = []
+    cursor = start
+    for m in words[first:last]:
+        if stem(m.group()) in wanted:
+            out.append(text[cursor : m.start()])
+            out.append(f"<mark>{m.group()}</mark>")
+            cursor = m.end()
+    out.append(text[cursor:end])
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if end < len(text) else ""
+    return prefix + "".join(out) + suffix
+
+
+class InvertedIndex:
+    """
+    In-process stand-in for the tsvector/GIN path, used when the session is
+    not bound to Postgres. Matching is AND over query terms; scoring is
+    label-weighted term frequency times IDF, normalised by document length.
+    It is built from every row on each search, so it is meant for tests and
+    small local databases, not production.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[Hashable, float]] = defaultdict(dict)
+        self.lengths: Dict[Hashable, int] = {}
+        self.payloads: Dict[Hashable, dict] = {}
+
+    def add(self, key: Hashable, fields: Iterable[Tuple[Optional[str], str]], payload: dict) -> None:
+        """Index ``fields`` as (text, weight label) pairs under ``key``."""
+        self.remove(key)
+        length = 0
+        for text, label in fields:
+            for term in terms(text):
+                postings = self.postings[term]
+                postings[key] = postings.get(key, 0.0) + WEIGHTS[label]
+                length += 1
+        self.lengths[key] = length
+        self.payloads[key] = payload
+
+    def remove(self, key: Hashable) -> None:
+        if key not in self.lengths:
+            return
+        for term in [t for t, postings in self.postings.items() if key in postings]:
+            del self.postings[term][key]
+            if not self.postings[term]:
+                del self.postings[term]
+        del self.lengths[key]
+        del self.payloads[key]
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[Hashable, float]]:
+        query_terms = list(dict.fromkeys(terms(query)))
+        if not query_terms or any(t not in self.postings for t in query_terms):
+            return []
+        ordered = sorted(query_terms, key=lambda t: len(self.postings[t]))
+        candidates = set(self.postings[ordered[0]])
+        for term in ordered[1:]:
+            candidates &= self.postings[term].keys()
+        total = len(self.lengths)
+        scores = {}
+        for key in candidates:
+            score = sum(
+                self.postings[t][key] * math.log(1 + total / len(self.postings[t])) for t in query_terms
+            )
+            scores[key] = score / (1 + math.log(1 + self.lengths[key]))
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+
+
+class SearchService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @property
+    def uses_postgres(self) -> bool:
+        return self.db.bind is not None and self.db.bind.dialect.name == "postgresql"
+
+    async def search_policies(self, q: str, limit: int = 20) -> List[dict]:
+        if not self.uses_postgres:
+            rows = await self.db.execute(
+                select(Policy.id, Policy.reference, Policy.title, Policy.wording, Policy.supporting_text, Policy.keywords)
+            )
+            index = InvertedIndex()
+            for row in rows:
+                index.add(
+                    row.id,
+                    [(row.reference, "A"), (row.title, "A"), (" ".join(row.keywords or ()), "A"),
+                     (row.wording, "B"), (row.supporting_text, "C")],
+                    {"reference": row.reference, "title": row.title,
+                     "text": " ".join(filter(None, (row.wording, row.supporting_text)))},
+                )
+            return self._fallback_hits(index, q, limit)
+
+        query = func.websearch_to_tsquery(_TS_CONFIG, q)
+        ranked = (
+            select(
+                Policy.id,
+                Policy.reference,
+                Policy.title,
+                func.concat_ws(" ", Policy.wording, Policy.supporting_text).label("body"),
+                func.ts_rank_cd(Policy.search_vector, query).label("rank"),
+            )
+            .where(Policy.search_vector.op("@@")(query))
+            .order_by(desc("rank"))
+            .limit(limit)
+            .subquery()
+        )
+        return await self._headlined(ranked, query)
+
+    async def search_document(self, document_id: UUID, q: str, limit: int = 20) -> List[dict]:
+        if not self.uses_postgres:
+            rows = await self.db.execute(
+                select(DocumentNode.id, DocumentNode.reference, DocumentNode.title, DocumentNode.content)
+                .where(DocumentNode.document_id == document_id)
+            )
+            index = InvertedIndex()
+            for row in rows:
+                index.add(
+                    row.id,
+                    [(row.reference, "A"), (row.title, "A"), (row.content, "B")],
+                    {"reference": row.reference, "title": row.title, "text": row.content},
+                )
+            return self._fallback_hits(index, q, limit)
+
+        query = func.websearch_to_tsquery(_TS_CONFIG, q)
+        ranked = (
+            select(
+                DocumentNode.id,
+                DocumentNode.reference,
+                DocumentNode.title,
+                func.coalesce(DocumentNode.content, "").label("body"),
+                func.ts_rank_cd(DocumentNode.search_vector, query).label("rank"),
+            )
+            .where(DocumentNode.document_id == document_id, DocumentNode.search_vector.op("@@")(query))
+            .order_by(desc("rank"))
+            .limit(limit)
+            .subquery()
+        )
+        return await self._headlined(ranked, query)
+
+    async def _headlined(self, ranked, query) -> List[dict]:
+        # ts_headline re-parses the text, so only run it over the top-ranked rows
+        stmt = select(
+            ranked.c.id,
+            ranked.c.reference,
+            ranked.c.title,
+            ranked.c.rank,
+            func.ts_headline(_TS_CONFIG, ranked.c.body, query, HEADLINE_OPTIONS).label("snippet"),
+        ).order_by(ranked.c.rank.desc())
+        rows = (await self.db.execute(stmt)).mappings()
+        return [{key: jsonable(value) for key, value in row.items()} for row in rows]
+
+    @staticmethod
+    def _fallback_hits(index: InvertedIndex, q: str, limit: int) -> List[dict]:
+        query_terms = terms(q)
+        hits = []
+        for key, score in index.search(q, limit):
+            payload = index.payloads[key]
+            hits.append(
+                {
+                    "id": jsonable(key),
+                    "reference": payload["reference"],
+                    "title": payload["title"],
+                    "rank": score,
+                    "snippet": highlight(payload["text"], query_terms),
+                }
+            )
+        return hits
@@ -0,0 +1,91 @@
+"""
+Geometry helpers shared by the site and constraint layers.
+
+Geometries are stored as PostGIS ``geometry`` in EPSG:4326 and exchanged with
+the API as GeoJSON (site points as ``{lat, lon}`` for the map view).
+``SpatialIndex`` answers the same bbox/intersection questions in-process with
+a shapely STRtree, for offline jobs and sessions without PostGIS.
+"""
+from typing import Any, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from geoalchemy2.shape import from_shape
+from shapely import STRtree, box
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+
+SRID = 4326
+
+BBox = Tuple[float, float, float, float]
+
+
+def to_geojson(value: Optional[dict]) -> Optional[dict]:
+    """Normalise API geometry input: ``{lat, lon}`` becomes a GeoJSON Point."""
+    if not value:
+        return None
+    if "type" in value:
+        return value
+    if "lat" in value and "lon" in value:
+        return {"type": "Point", "coordinates": [float(value["lon"]), float(value["lat"])]}
+    raise ValueError("Geometry must be GeoJSON or {lat, lon}")
+
+
+def to_shape(value: Optional[dict]) -> Optional[BaseGeometry]:
+    geojson = to_geojson(value)
+    return shape(geojson) if geojson else None
+
+
+def to_db(value: Optional[dict]):
+    """API geometry -> value bindable to a ``Geometry(srid=4326)`` column."""
+    geom = to_shape(value)
+    return from_shape(geom, srid=SRID) if geom is not None else None
+
+
+def point_as_latlon(geojson: Optional[dict]) -> Optional[dict]:
+    """Points go back to the frontend as ``{lat, lon}``; other geometries stay GeoJSON."""
+    if geojson and geojson.get("type") == "Point":
+        lon, lat = geojson["coordinates"][:2]
+        return {"lat": lat, "lon": lon}
+    return geojson
+
+
+def parse_bbox(value: str) -> BBox:
+    """``"minLon,minLat,maxLon,maxLat"`` -> tuple, rejecting inverted or malformed boxes."""
+    try:
+        min_x, min_y, max_x, max_y = (float(part) for part in value.split(","))
+    except ValueError as exc:
+        raise ValueError("bbox must be minLon,minLat,maxLon,maxLat") from exc
+    if min_x > max_x or min_y > max_y:
+        raise ValueError("bbox minimum exceeds maximum")
+    return min_x, min_y, max_x, max_y
+
+
+class SpatialIndex:
+    """
+    Static STRtree over keyed geometries. Rebuild (``SpatialIndex(items)``)
+    after changes; STRtree construction is O(n log n) and queries are
+    logarithmic plus the number of envelope hits.
+    """
+
+    def __init__(self, items: Iterable[Tuple[Hashable, Any]]):
+        self.keys: List[Hashable] = []
+        self.geometries: List[BaseGeometry] = []
+        for key, geom in items:
+            geom = geom if isinstance(geom, BaseGeometry) else to_shape(geom)
+            if geom is None or geom.is_empty:
+                continue
+            self.keys.append(key)
+            self.geometries.append(geom)
+        self.tree = STRtree(self.geometries)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def bbox(self, bounds: BBox) -> List[Hashable]:
+        return self._keys(self.tree.query(box(*bounds), predicate="intersects"))
+
+    def intersecting(self, geom: Any) -> List[Hashable]:
+        geom = geom if isinstance(geom, BaseGeometry) else to_shape(geom)
+        return self._keys(self.tree.query(geom, predicate="intersects"))
+
+    def _keys(self, positions: Sequence[int]) -> List[Hashable]:
+        return [self.keys[i] for i in sorted(positions)]
@@ -0,0 +1,35 @@
+import re
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Mapping
+from uuid import UUID
+
+_CAMEL_BOUNDARY = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+def to_camel(name: str) -> str:
+    """snake_case column name -> camelCase API field name."""
+    head, *tail = name.split("_")
+    return head + "".join(part[:1].upper() + part[1:] for part in tail)
+
+
+def to_snake(name: str) -> str:
+    """camelCase API field name -> snake_case column name."""
+    return _CAMEL_BOUNDARY.sub("_", name).lower()
+
+
+def jsonable(value: Any) -> Any:
+    """Coerce DB scalar types (UUID, datetime, Enum) to what the API models expect."""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def row_to_api(row: Mapping[str, Any], aliases: Mapping[str, str] | None = None) -> dict:
+    """Convert a DB row mapping to a camelCase dict matching the Pydantic models."""
+    aliases = aliases or {}
+    return {aliases.get(key, to_camel(key)): jsonable(value) for key, value in row.items()}
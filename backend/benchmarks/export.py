@@ -0,0 +1,114 @@
+"""
+Measure streaming export throughput and memory ceiling.
+
+Seeds synthetic sites (see ``benchmarks.site_pagination``) up to ``--rows``,
+then drains ``Exporter.body()`` into a byte counter for each format while a
+sampler records the process RSS. The ceiling should be the same at 100k and
+1M rows; ``--naive`` also loads the whole table into a list of dicts, as a
+``List[Site]`` response would, for contrast.
+
+    python -m benchmarks.export --rows 1000000 --formats ndjson csv geojson
+"""
+import argparse
+import asyncio
+import os
+import resource
+import time
+
+from sqlalchemy import select
+
+from app.crud.sites import SiteCRUD
+from app.db import AsyncSessionLocal, engine
+from app.services.export_service import FORMATS, Exporter
+from benchmarks.site_pagination import seed
+
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * _PAGE / 2**20
+    except OSError:  # not Linux: high-water mark only
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RSSSampler:
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0.0
+        self.task = None
+
+    async def _run(self) -> None:
+        while True:
+            self.peak = max(self.peak, rss_mb())
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self):
+        self.peak = rss_mb()
+        self.task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self.task.cancel()
+        self.peak = max(self.peak, rss_mb())
+
+
+async def run_export(fmt: str, batch_rows: int) -> None:
+    exporter = Exporter(SiteCRUD, fmt, sessions=AsyncSessionLocal, batch_rows=batch_rows)
+    rows = 0
+    original = exporter.rows
+
+    async def counted():
+        nonlocal rows
+        async for item in original():
+            rows += 1
+            yield item
+
+    exporter.rows = counted
+    before = rss_mb()
+    size = 0
+    async with RSSSampler() as sampler:
+        started = time.perf_counter()
+        async for chunk in exporter.body():
+            size += len(chunk)
+        elapsed = time.perf_counter() - started
+    print(
+        f"{fmt:>8}: {rows} rows, {size / 2**20:8.1f} MiB in {elapsed:6.2f}s "
+        f"= {rows / elapsed:9.0f} rows/s; RSS {before:7.1f} -> peak {sampler.peak:7.1f} MiB"
+    )
+
+
+async def run_naive() -> None:
+    before = rss_mb()
+    async with RSSSampler() as sampler:
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            crud = SiteCRUD(db)
+            rows = (await db.execute(select(*crud.project(None)))).mappings().all()
+            items = [crud.to_api(row) for row in rows]
+        elapsed = time.perf_counter() - started
+    print(
+        f"{'naive':>8}: {len(items)} rows in {elapsed:6.2f}s = {len(items) / elapsed:9.0f} rows/s; "
+        f"RSS {before:7.1f} -> peak {sampler.peak:7.1f} MiB"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--batch-rows", type=int, default=1000)
+    parser.add_argument("--naive", action="store_true", help="also load the table into memory for comparison")
+    args = parser.parse_args()
+
+    await seed(args.rows)
+    for fmt in args.formats:
+        await run_export(fmt, args.batch_rows)
+    if args.naive:
+        await run_naive()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Offline hit-rate and latency benchmark for the AIService response cache.
+
+Replays a Zipf-distributed stream of policy-guidance requests (a few
+wordings re-opened by many officers, a long tail opened once) against
+``FakeModelClient`` with a fixed upstream latency, ``--concurrency`` requests
+at a time, first without the cache and then through it. Variants of the same
+wording differ only in whitespace, which normalisation folds together.
+
+    python -m benchmarks.llm_cache --requests 2000 --policies 300 --latency 0.4
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.services.ai_service import AIService
+from app.services.llm import FakeModelClient
+from app.services.llm_cache import LLMCache, TTLLRU
+
+
+class UncachedCache(LLMCache):
+    async def get_or_compute(self, key, compute):
+        self.stats.misses += 1
+        return await compute()
+
+
+def workload(requests: int, policies: int, skew: float, seed: int) -> list:
+    rng = random.Random(seed)
+    wordings = [
+        f"Policy H{i}: Development of {rng.randint(5, 500)} homes will be supported where "
+        f"{rng.randint(10, 50)}% are affordable and the design responds to local character."
+        for i in range(policies)
+    ]
+    weights = [1 / (rank + 1) ** skew for rank in range(policies)]
+    stream = []
+    for wording in rng.choices(wordings, weights=weights, k=requests):
+        # Same wording, different incidental whitespace, as pasted by different officers
+        stream.append(wording.replace(" ", "  ", rng.randint(0, 2)) + "\n" * rng.randint(0, 1))
+    return stream
+
+
+async def run(service: AIService, stream: list, concurrency: int) -> list:
+    limiter = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(text: str) -> None:
+        async with limiter:
+            start = time.perf_counter()
+            await service.generate_policy_guidance(text)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(text) for text in stream))
+    return latencies
+
+
+def report(label: str, latencies: list, wall: float, client: FakeModelClient, cache: LLMCache) -> None:
+    ordered = sorted(latencies)
+    print(
+        f"{label:>9}: {len(latencies) / wall:8.1f} req/s  "
+        f"p50 {statistics.median(ordered) * 1000:7.1f} ms  "
+        f"p95 {ordered[int(len(ordered) * 0.95) - 1] * 1000:7.1f} ms  "
+        f"upstream calls {client.calls:5d}  {cache.stats.as_dict()}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--policies", type=int, default=300)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of wording popularity")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.4, help="fake upstream seconds per call")
+    parser.add_argument("--cache-size", type=int, default=2048)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    stream = workload(args.requests, args.policies, args.skew, args.seed)
+    for label, cache in (
+        ("uncached", UncachedCache()),
+        ("cached", LLMCache(TTLLRU(args.cache_size, ttl=3600))),
+    ):
+        client = FakeModelClient(latency=args.latency)
+        start = time.perf_counter()
+        latencies = await run(AIService(client=client, cache=cache), stream, args.concurrency)
+        report(label, latencies, time.perf_counter() - start, client, cache)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Scenario evaluation throughput on a synthetic site frame (no database).
+
+Builds a ``SiteFrame`` of ``--sites`` call-for-sites rows and ``--goals``
+goals, then evaluates ``--scenarios`` random what-if variants (a handful of
+sites excluded, a density uplift on one constraint category) one at a time
+as a single batch, derived incrementally from one cached baseline state, and
+split across a ``--workers`` process pool as ``/scenarios/compare`` does.
+
+    python -m benchmarks.scenario_eval --sites 20000 --scenarios 1000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from app.services.scenarios_service import ScenarioEngine, ScenarioPool, SiteFrame
+
+USES = ["Residential", "Mixed Use", "Employment", "Residential", "Open Space"]
+CONSTRAINTS = [("Flood Zone 3", "High"), ("Conservation Area", "Medium"), ("Green Belt", "High"), ("SSSI", "Low")]
+ALIGNMENTS = ["Supports", "Partially Aligns", "Undermines"]
+
+
+def synthetic(sites: int, goals: int):
+    goal_rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "target_metric": random.choice(["Net additional dwellings", "Jobs created", "Biodiversity net gain"]),
+            "target_value": random.choice([None, 5000.0, 20000.0]),
+            "contributing_site_ids": None,
+        }
+        for _ in range(goals)
+    ]
+    site_rows = []
+    for i in range(sites):
+        constraint = random.choice(CONSTRAINTS)
+        site_rows.append(
+            {
+                "id": str(uuid.uuid4()),
+                "area_ha": round(random.uniform(0.1, 40.0), 2),
+                "proposed_use_plan_making": random.choice(USES),
+                "parish": f"Parish {i % 40}",
+                "constraints": [{"type": constraint[0], "severity": constraint[1]}] if i % 4 == 0 else [],
+                "deliverability_assessment": [{"name": "Achievability", "score": random.random()}],
+                "strategic_goal_contributions": [
+                    {"goalId": goal["id"], "alignment": random.choice(ALIGNMENTS)}
+                    for goal in random.sample(goal_rows, min(3, goals))
+                ],
+            }
+        )
+    policies = [{"id": f"policy-{name}", "affected_site_categories": [name]} for name, _ in CONSTRAINTS]
+    return site_rows, goal_rows, policies
+
+
+def variant(site_ids, policies) -> dict:
+    policy = random.choice(policies)
+    return {
+        "excludedSiteIds": random.sample(site_ids, 20),
+        "modifiedPolicies": [{"policyId": policy["id"], "changes": {"densityUplift": random.uniform(0, 0.3)}}],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sites", type=int, default=20000)
+    parser.add_argument("--goals", type=int, default=30)
+    parser.add_argument("--scenarios", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size; default CPU count")
+    args = parser.parse_args()
+
+    sites, goals, policies = synthetic(args.sites, args.goals)
+    started = time.perf_counter()
+    frame = SiteFrame.build(sites, goals, policies)
+    print(f"frame: {args.sites} sites x {args.goals} goals built in {time.perf_counter() - started:.2f}s")
+
+    engine = ScenarioEngine(frame)
+    site_ids = frame.site_ids
+    scenarios = [variant(site_ids, policies) for _ in range(args.scenarios)]
+
+    started = time.perf_counter()
+    for scenario in scenarios:
+        engine.evaluate(scenario)
+    elapsed = time.perf_counter() - started
+    print(f"one at a time: {args.scenarios / elapsed:8.0f} scenarios/s")
+
+    started = time.perf_counter()
+    engine.evaluate_many(scenarios)
+    elapsed = time.perf_counter() - started
+    print(f"batched:       {args.scenarios / elapsed:8.0f} scenarios/s")
+
+    baseline = engine.state({"excludedSiteIds": []})
+    started = time.perf_counter()
+    for scenario in scenarios:
+        engine.result(engine.derive(scenario, baseline), None)
+    elapsed = time.perf_counter() - started
+    print(f"incremental:   {args.scenarios / elapsed:8.0f} scenarios/s")
+
+    pool = ScenarioPool(args.workers)
+    asyncio.run(pool.totals(frame, scenarios[:1]))  # start the workers and ship them the frame
+    started = time.perf_counter()
+    scaled, fixed = asyncio.run(pool.totals(frame, scenarios))
+    engine.reduce(scaled, fixed, [None] * len(scenarios))
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+    print(f"pool ({pool.workers} procs): {args.scenarios / elapsed:8.0f} scenarios/s")
+
+
+if __name__ == "__main__":
+    main()
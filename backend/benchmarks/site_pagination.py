@@ -0,0 +1,122 @@
+"""
+Walk the sites table page by page and report per-page latency.
+
+Seeds synthetic call-for-sites rows (with realistically sized JSON blobs) when
+the table holds fewer than ``--rows``, then lists every page through
+``SiteCRUD.list_page`` using the map-view projection (the first page doubles
+as a round-trip check that PostGIS geometry arrives as a GeoJSON object).
+Keyset pages should cost the same at page 10,000 as at page 1;
+``--offset-samples`` times the equivalent LIMIT/OFFSET query at a few depths
+for contrast.
+
+    python -m benchmarks.site_pagination --rows 500000 --limit 200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.sites import SiteCRUD
+from app.db import engine
+from app.db_models.sites import Site
+
+MAP_FIELDS = ["id", "name", "coordinates", "areaHa", "planMakingStatus"]
+
+
+def synthetic_site(i: int) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "name": f"Synthetic site {i}",
+        "address": f"{i} Example Road",
+        "uprn": str(100000000000 + i),
+        "coordinates": f"SRID=4326;POINT({-1.0 + random.random()} {51.0 + random.random()})",
+        "area_ha": round(random.uniform(0.1, 40.0), 2),
+        "parish": f"Parish {i % 120}",
+        "plan_making_status": random.choice(["Submitted", "Assessed", "Allocated", "Rejected"]),
+        "deliverability_assessment": [
+            {"name": name, "score": random.random(), "rationale": "x" * 400}
+            for name in ("Suitability", "Availability", "Achievability")
+        ],
+        "soundness_checks_plan_making": [
+            {"criterion": c, "status": "⚪ Not Assessed", "rationale": "y" * 300}
+            for c in ("Positively prepared", "Justified", "Effective", "Consistent with national policy")
+        ],
+    }
+
+
+async def seed(rows: int, batch: int = 5000) -> None:
+    async with engine.begin() as conn:
+        existing = (await conn.execute(select(func.count()).select_from(Site))).scalar_one()
+        for start in range(existing, rows, batch):
+            chunk = [synthetic_site(i) for i in range(start, min(start + batch, rows))]
+            await conn.execute(insert(Site), chunk)
+        if existing < rows:
+            print(f"seeded {rows - existing} sites")
+
+
+def check_geometry(items: list) -> None:
+    """Geometry must reach the API as decoded GeoJSON, not as the JSON text."""
+    for item in items:
+        geometry = item.get("coordinates")
+        if geometry is not None and not (isinstance(geometry, dict) and "coordinates" in geometry):
+            raise SystemExit(f"site {item['id']}: coordinates came back as {type(geometry).__name__}: {geometry!r:.80}")
+
+
+async def walk(limit: int) -> list:
+    timings = []
+    cursor = None
+    async with AsyncSession(bind=engine) as db:
+        crud = SiteCRUD(db)
+        while True:
+            started = time.perf_counter()
+            page = await crud.list_page(cursor=cursor, limit=limit, fields=MAP_FIELDS)
+            timings.append(time.perf_counter() - started)
+            if cursor is None:
+                check_geometry(page.items)
+            cursor = page.nextCursor
+            if cursor is None:
+                return timings
+
+
+async def offset_samples(limit: int, total: int, samples: int) -> None:
+    async with AsyncSession(bind=engine) as db:
+        for depth in [int(total * k / samples) for k in range(samples)]:
+            stmt = select(Site.id, Site.name, Site.coordinates).order_by(Site.id).offset(depth).limit(limit)
+            started = time.perf_counter()
+            await db.execute(stmt)
+            print(f"  OFFSET {depth:>9}: {(time.perf_counter() - started) * 1000:8.2f} ms")
+
+
+def summarise(label: str, timings: list) -> None:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[int(len(ms) * 0.95) - 1] if len(ms) > 1 else ms[0]
+    print(f"  {label:<12} pages={len(ms):>6}  p50={statistics.median(ms):7.2f} ms  p95={p95:7.2f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--offset-samples", type=int, default=0)
+    args = parser.parse_args()
+
+    await seed(args.rows)
+    timings = await walk(args.limit)
+    decile = max(1, len(timings) // 10)
+    print(f"keyset walk over {args.rows} sites, {args.limit} per page:")
+    summarise("first 10%", timings[:decile])
+    summarise("last 10%", timings[-decile:])
+    summarise("all", timings)
+    if args.offset_samples:
+        print("LIMIT/OFFSET for comparison:")
+        await offset_samples(args.limit, args.rows, args.offset_samples)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
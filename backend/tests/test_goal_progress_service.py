@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.db_models.goal_progress import GoalProgress, GoalSnapshot, SiteProgressFacts
+from app.db_models.goals import Goal
+from app.db_models.links import GoalSite
+from app.db_models.planning_applications import PlanningApplication
+from app.db_models.sites import Site
+from app.models.shared import ApplicationStatus, ApplicationType, GoalStatus, GoalType
+from app.services.goal_progress_service import GoalProgressService
+from app.services.scenarios_service import indicative_yield
+
+TABLES = [Site, PlanningApplication, Goal, GoalSite, SiteProgressFacts, GoalProgress, GoalSnapshot]
+
+
+def application(site_id: uuid.UUID, status: ApplicationStatus) -> PlanningApplication:
+    return PlanningApplication(
+        reference_number=f"APP/{uuid.uuid4().hex[:8]}",
+        address="1 Example Road",
+        site_id=site_id,
+        proposal_details="Residential development",
+        application_type=ApplicationType.Full,
+        status=status,
+        received_date=datetime(2026, 1, 1),
+    )
+
+
+def test_rebuild_then_refresh_settles_goal(pg_db, run):
+    north, south = Site(area_ha=2.0, proposed_use_plan_making="Residential"), Site(
+        area_ha=4.0, proposed_use_plan_making="Residential"
+    )
+    goal = Goal(
+        name="Housing delivery",
+        category="Housing",
+        target_metric="Homes delivered",
+        target_value=1000,
+        status=GoalStatus.NotStarted,
+        type=GoalType.Monitoring,
+    )
+    (north_homes, south_homes), _ = indicative_yield([2.0, 4.0], ["Residential", "Residential"])
+
+    async def scenario():
+        db = await pg_db(TABLES)
+        db.add_all([north, south, goal])
+        await db.flush()
+        db.add_all([GoalSite(goal_id=goal.id, site_id=north.id), GoalSite(goal_id=goal.id, site_id=south.id)])
+        db.add(application(north.id, ApplicationStatus.Approved))
+        await db.commit()
+
+        service = GoalProgressService(db)
+        rebuilt = await service.rebuild(snapshot=True)
+        after_rebuild = (await db.execute(select(GoalProgress.__table__))).mappings().one()
+
+        db.add(application(south.id, ApplicationStatus.Approved))
+        await db.commit()
+        refreshed = await service.refresh(site_ids=[south.id])
+        after_refresh = (await db.execute(select(GoalProgress.__table__))).mappings().one()
+        snapshots = (
+            await db.execute(select(GoalSnapshot.value, GoalSnapshot.status).order_by(GoalSnapshot.id))
+        ).all()
+        await db.close()
+        return rebuilt, after_rebuild, refreshed, after_refresh, snapshots
+
+    rebuilt, after_rebuild, refreshed, after_refresh, snapshots = run(scenario())
+
+    assert (rebuilt.goalsUpdated, rebuilt.snapshotsWritten) == (1, 1)
+    assert after_rebuild["sites"] == 2
+    assert after_rebuild["approved"] == 1
+    assert after_rebuild["value"] == north_homes
+    assert after_rebuild["status"] is not None
+
+    assert (refreshed.goalsUpdated, refreshed.snapshotsWritten) == (1, 1)
+    assert after_refresh["approved"] == 2
+    assert after_refresh["value"] == north_homes + south_homes
+    assert after_refresh["progress"] == round((north_homes + south_homes) / 1000, 4)
+    assert [value for value, _ in snapshots] == [north_homes, north_homes + south_homes]
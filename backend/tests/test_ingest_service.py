@@ -0,0 +1,30 @@
+from app.services.ingest_service import ENTITIES, BulkLoader
+
+
+def test_prepare_reports_supplied_columns():
+    loader = BulkLoader(None, ENTITIES["sites"])
+    _, present, errors = loader.prepare({"uprn": "100", "name": "North field", "area_ha": "2.5"})
+    assert errors == []
+    assert present == {"uprn", "name", "area_ha"}
+
+    feature = {"type": "Feature", "properties": {"uprn": "100"}, "geometry": {"type": "Point", "coordinates": [0, 51]}}
+    _, present, errors = loader.prepare(feature)
+    assert errors == []
+    assert present == {"uprn", "coordinates"}
+
+
+def test_rows_supplying_different_columns_load_separately(run):
+    loader = BulkLoader(None, ENTITIES["sites"], batch_size=10)
+    flushed = []
+
+    async def flush(batch, present):
+        flushed.append(([line for line, _ in batch], present))
+
+    async def rows():
+        for line, row in enumerate([{"uprn": "1", "name": "a"}, {"uprn": "2", "name": "b"}, {"uprn": "3"}], start=1):
+            yield line, row
+
+    loader.flush = flush
+    report = run(loader.run(rows()))
+    assert report.rowsRead == 3
+    assert flushed == [([1, 2], {"uprn", "name"}), ([3], {"uprn"})]
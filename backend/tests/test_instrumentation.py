@@ -0,0 +1,51 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.instrumentation import REQUEST_SECONDS, REQUEST_SERIALIZE_SECONDS, InstrumentationMiddleware, InstrumentedRoute
+
+
+class Item(BaseModel):
+    name: str
+
+
+def client() -> TestClient:
+    router = APIRouter(prefix="/instrumented", route_class=InstrumentedRoute)
+
+    @router.get("/ok", response_model=Item)
+    async def ok():
+        return {"name": "site"}
+
+    @router.get("/invalid", response_model=Item)
+    async def invalid():
+        return {"title": "no name"}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(InstrumentationMiddleware)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def samples(route: str) -> dict:
+    """The serialise histogram's unbucketed samples for ``route``, by suffix (count, sum, created)."""
+    metric = REQUEST_SERIALIZE_SECONDS.labels("GET", route)
+    return {
+        sample.name.rsplit("_", 1)[-1]: sample.value for sample in metric.collect()[0].samples if "le" not in sample.labels
+    }
+
+
+def test_serialisation_is_timed():
+    response = client().get("/instrumented/ok")
+    assert response.status_code == 200
+    assert "serialize;dur=" in response.headers["server-timing"]
+    observed = samples("/instrumented/ok")
+    assert observed["count"] == 1
+    assert observed["sum"] >= 0
+
+
+def test_failed_serialisation_is_not_observed():
+    response = client().get("/instrumented/invalid")
+    assert response.status_code == 500
+    assert REQUEST_SECONDS.labels("GET", "/instrumented/invalid")._sum.get() > 0
+    observed = samples("/instrumented/invalid")
+    assert (observed["count"], observed["sum"]) == (0, 0)
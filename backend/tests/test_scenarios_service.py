@@ -0,0 +1,53 @@
+import uuid
+
+from sqlalchemy import select
+
+from app.db_models.scenarios import Scenario
+from app.services.scenarios_service import FrameCache, ScenarioService, SiteFrame
+
+SITE_A, SITE_B = uuid.uuid4(), uuid.uuid4()
+GOAL = uuid.uuid4()
+
+
+def frames() -> FrameCache:
+    cache = FrameCache(ttl=3600)
+    cache.frame = SiteFrame.build(
+        [
+            {"id": SITE_A, "area_ha": 2.0, "proposed_use_plan_making": "Residential", "parish": "North"},
+            {"id": SITE_B, "area_ha": 5.0, "proposed_use_plan_making": "Employment", "parish": "South"},
+        ],
+        [{"id": GOAL, "target_metric": "homes", "target_value": 100, "contributing_site_ids": [str(SITE_A)]}],
+        [],
+    )
+    return cache
+
+
+def test_evaluate_persists_metrics(sqlite_db, run):
+    async def scenario():
+        db = await sqlite_db([Scenario])
+        baseline = Scenario(name="Baseline")
+        db.add(baseline)
+        await db.flush()
+        variant = Scenario(name="North only", baseline_scenario_id=baseline.id, included_site_ids=[str(SITE_A)])
+        db.add(variant)
+        await db.commit()
+
+        service = ScenarioService(db, frames=frames())
+        single = await service.evaluate(baseline.id)
+        variants = await service.evaluate_variants(baseline.id)
+        stored = {
+            row.id: row
+            for row in (await db.execute(select(Scenario.id, Scenario.summary_metrics, Scenario.goal_performance)))
+        }
+        await db.close()
+        return single, variants, stored, baseline.id, variant.id
+
+    single, variants, stored, baseline_id, variant_id = run(scenario())
+
+    assert single.scenarioId == str(baseline_id)
+    assert [result.scenarioId for result in variants] == [str(baseline_id), str(variant_id)]
+    for result in variants:
+        row = stored[uuid.UUID(result.scenarioId)]
+        assert row.summary_metrics == result.summaryMetrics.model_dump()
+        assert row.goal_performance == result.goalPerformance
+    assert stored[variant_id].summary_metrics["totalHomes"] <= stored[baseline_id].summary_metrics["totalHomes"]
@@ -0,0 +1,40 @@
+from app.services.search_service import InvertedIndex, highlight, terms
+
+
+def index() -> InvertedIndex:
+    policies = InvertedIndex()
+    policies.add(
+        "H1",
+        [("H1", "A"), ("Housing mix", "A"), ("Developments of ten or more homes should provide a mix of sizes.", "B")],
+        {"reference": "H1"},
+    )
+    policies.add(
+        "E2",
+        [("E2", "A"), ("Employment land", "A"), ("Existing employment sites are protected from housing.", "B")],
+        {"reference": "E2"},
+    )
+    policies.add("D3", [("D3", "A"), ("Design", "A"), ("High quality design is expected.", "B")], {"reference": "D3"})
+    return policies
+
+
+def test_matches_every_term_and_ranks_title_hits_first():
+    policies = index()
+    assert [key for key, _ in policies.search("housing")] == ["H1", "E2"]
+    assert [key for key, _ in policies.search("housing employment")] == ["E2"]
+    assert policies.search("housing design") == []
+    assert policies.search("the of") == []
+
+
+def test_readding_a_key_replaces_its_postings():
+    policies = index()
+    policies.add("D3", [("D3", "A"), ("Design", "A"), ("Housing design codes.", "B")], {"reference": "D3"})
+    assert {key for key, _ in policies.search("housing")} == {"H1", "E2", "D3"}
+    policies.remove("D3")
+    assert {key for key, _ in policies.search("design")} == set()
+    assert "D3" not in policies.payloads
+
+
+def test_highlight_marks_stemmed_matches():
+    snippet = highlight("Developments should provide homes in a mix of sizes.", terms("development home"))
+    assert snippet == "<mark>Developments</mark> should provide <mark>homes</mark> in a mix of sizes …"
+    assert highlight("Nothing relevant here.", terms("housing")) is None